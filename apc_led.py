@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+LED frame planner for the APC mini mk2 pad grid.
+
+The colour plugins send one 16-byte SysEx per pad change and the blinker a
+Note On per blink, so a whole grid changing at once queues up hundreds of
+bytes on the link and the LEDs trail the music.  This module turns a stream
+of desired grids into a rate-limited message schedule instead:
+
+  diff        each frame is compared against what the device will show
+              once the messages already on the wire have landed; only pads
+              that differ are sent.
+  coalesce    RGB pads go out as one "set range" SysEx (F0 47 7F 4F 24 ...)
+              holding several pad ranges.  Ranges are applied in order, so
+              the planner paints like a printer: a wide range first, then
+              the exceptions on top, choosing the fewest ranges for each
+              frame.  Palette/blink states (Note On, channel = behaviour)
+              are sent as single Note Ons.
+  rate limit  messages are laid out back to back at `budget` bytes per ms.
+              When a new frame arrives, queued frames that have not
+              started yet are dropped and the new one is planned against
+              the grid the device will show, so a saturated link skips to
+              the latest grid rather than working through stale ones.  A
+              frame that has started is always sent whole.
+
+Pads are numbered as the mk2 sends them: 0 bottom-left to 63 top-right,
+row by row.  A pad state is one int: 0xRRGGBB for an RGB colour (0 = off),
+or note(channel, velocity) for a palette colour with the behaviour the
+channel selects (6 = solid 100 %, 7..15 pulse/blink).
+
+The schedule file is plain numbers for apc_led_player.jsfx: the message
+count, then one line per message `start_ms length byte...`.
+
+  python apc_led.py frames.txt -o schedule.txt
+  python apc_led.py frames.txt --budget 1.5 --naive
+
+A frames file has one line per frame: `time_ms pad0 pad1 ... pad63`, where a
+pad is hex RGB (`ff0000`, `0` = off), `channel/velocity` for a Note state,
+or `.` to keep the previous frame's value.  Missing pads keep theirs too;
+lines starting with # are comments.
+
+bench_apc_led.py compares the planner with per-pad sending.
+"""
+
+import argparse
+import math
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+PADS = 64
+OFF = 0
+NOTE_FLAG = 1 << 24
+SYSEX_HEAD = bytes((0xF0, 0x47, 0x7F, 0x4F, 0x24))
+RANGE_BYTES = 8                         # first pad, last pad, R/G/B as MSB+LSB
+MAX_RANGES = 8                          # ranges per SysEx: bounds how long one message holds the link
+DEFAULT_BUDGET = 3.125                  # bytes per ms: a 31250 baud MIDI link
+
+Stroke = Tuple[int, int, int]           # (first pad, last pad, rgb)
+
+
+def rgb(r: int, g: int, b: int) -> int:
+    return (r & 0xFF) << 16 | (g & 0xFF) << 8 | (b & 0xFF)
+
+
+def note(channel: int, velocity: int) -> int:
+    """Pad state lit by Note On: palette colour `velocity`, behaviour `channel`."""
+    return NOTE_FLAG | (channel & 0x0F) << 8 | (velocity & 0x7F)
+
+
+def is_note(state: int) -> bool:
+    return state >= NOTE_FLAG
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Messages
+# ═══════════════════════════════════════════════════════════════════════════
+
+def sysex_ranges(strokes: Sequence[Stroke]) -> bytes:
+    """One "set RGB range" SysEx painting the strokes in order."""
+    n = len(strokes) * RANGE_BYTES
+    out = bytearray(SYSEX_HEAD)
+    out += bytes((n >> 7, n & 0x7F))
+    for lo, hi, c in strokes:
+        r, g, b = c >> 16, (c >> 8) & 0xFF, c & 0xFF
+        out += bytes((lo, hi, r >> 7, r & 0x7F, g >> 7, g & 0x7F, b >> 7, b & 0x7F))
+    out.append(0xF7)
+    return bytes(out)
+
+
+def note_on(pad: int, state: int) -> bytes:
+    return bytes((0x90 | (state >> 8) & 0x0F, pad, state & 0x7F))
+
+
+def apply(frame: List[int], msg: bytes):
+    """Update a device model with one message, as the APC would."""
+    if msg[0] == 0xF0:
+        if msg[:len(SYSEX_HEAD)] != SYSEX_HEAD:
+            return
+        n = msg[5] << 7 | msg[6]
+        for p in range(7, 7 + n - RANGE_BYTES + 1, RANGE_BYTES):
+            lo, hi = msg[p], msg[p + 1]
+            c = rgb(msg[p + 2] << 7 | msg[p + 3], msg[p + 4] << 7 | msg[p + 5],
+                    msg[p + 6] << 7 | msg[p + 7])
+            for pad in range(lo, min(hi, PADS - 1) + 1):
+                frame[pad] = c
+    elif msg[0] & 0xF0 == 0x90 and msg[1] < PADS:
+        frame[msg[1]] = note(msg[0] & 0x0F, msg[2])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Frame planning
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _paint(runs: List[Tuple[int, int, int, bool]]) -> List[Stroke]:
+    """
+    Fewest strokes, bottom first, that leave every changed run at its colour.
+
+    runs are (first pad, last pad, colour, changed) with neighbours of
+    different colours.  A stroke may cover unchanged runs only if it or a
+    later stroke leaves them at their colour.  Interval DP as for the
+    "strange printer": the stroke that paints run i may stretch to any
+    later run k of the same colour, with the runs in between painted on
+    top of it.
+    """
+    m = len(runs)
+    col = [r[2] for r in runs]
+    same = [[k for k in range(i + 1, m) if col[k] == col[i]] for i in range(m)]
+    # f[i][j]: strokes to paint every run in [i, j); h[i]: changed runs in
+    # [i, m) with run i painted; g[i]: changed runs in [i, m)
+    f = [[0] * (m + 1) for _ in range(m + 1)]
+    fk = [[-1] * (m + 1) for _ in range(m + 1)]
+    h = [0] * (m + 1)
+    hk = [-1] * (m + 1)
+    g = [0] * (m + 1)
+    skip = [False] * (m + 1)
+    for i in range(m - 1, -1, -1):
+        fi, fn, ki, ks = f[i], f[i + 1], fk[i], same[i]
+        for j in range(i + 1, m + 1):
+            best, bk = 1 + fn[j], -1
+            for k in ks:
+                if k >= j:
+                    break
+                c = fn[k] + f[k][j]
+                if c < best:
+                    best, bk = c, k
+            fi[j], ki[j] = best, bk
+        best, bk = 1 + g[i + 1], -1
+        for k in ks:
+            c = fn[k] + h[k]
+            if c < best:
+                best, bk = c, k
+        h[i], hk[i] = best, bk
+        if not runs[i][3] and g[i + 1] <= best:
+            g[i], skip[i] = g[i + 1], True
+        else:
+            g[i] = best
+
+    def full(i, j):
+        if i >= j:
+            return []
+        k = fk[i][j]
+        if k < 0:
+            return [(i, i)] + full(i + 1, j)
+        sub = full(k, j)
+        return [(i, sub[0][1])] + full(i + 1, k) + sub[1:]
+
+    def head(i):
+        k = hk[i]
+        if k < 0:
+            return [(i, i)] + changed(i + 1)
+        sub = head(k)
+        return [(i, sub[0][1])] + full(i + 1, k) + sub[1:]
+
+    def changed(i):
+        while i < m and skip[i]:
+            i += 1
+        return head(i) if i < m else []
+
+    return [(runs[a][0], runs[b][1], col[a]) for a, b in changed(0)]
+
+
+def _runs(target: Sequence[int], current: Sequence[int], lo: int, hi: int):
+    runs = []
+    for pad in range(lo, hi):
+        c, chg = target[pad], target[pad] != current[pad]
+        if runs and runs[-1][2] == c:
+            r = runs[-1]
+            runs[-1] = (r[0], pad, c, r[3] or chg)
+        else:
+            runs.append((pad, pad, c, chg))
+    return runs
+
+
+def plan_strokes(target: Sequence[int], current: Sequence[int]) -> List[Stroke]:
+    """RGB strokes, bottom first, turning current into target on the RGB pads."""
+    strokes = []
+    pad = 0
+    while pad < PADS:                       # Note-state pads split the grid
+        if is_note(target[pad]):
+            pad += 1
+            continue
+        end = pad
+        while end < PADS and not is_note(target[end]):
+            end += 1
+        if any(target[p] != current[p] for p in range(pad, end)):
+            strokes += _paint(_runs(target, current, pad, end))
+        pad = end
+    return strokes
+
+
+def plan_frame(target: Sequence[int], current: Sequence[int],
+               max_ranges: int = MAX_RANGES) -> List[bytes]:
+    """Messages turning current into target: range SysExes, then Note Ons."""
+    strokes = plan_strokes(target, current)
+    msgs = [sysex_ranges(strokes[i:i + max_ranges]) for i in range(0, len(strokes), max_ranges)]
+    msgs += [note_on(pad, target[pad]) for pad in range(PADS)
+             if is_note(target[pad]) and target[pad] != current[pad]]
+    return msgs
+
+
+def naive_frame(target: Sequence[int], current: Sequence[int]) -> List[bytes]:
+    """One message per changed pad, as the colour plugins send them."""
+    return [note_on(pad, t) if is_note(t) else sysex_ranges([(pad, pad, t)])
+            for pad, t in enumerate(target[:PADS]) if t != current[pad]]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Scheduling
+# ═══════════════════════════════════════════════════════════════════════════
+
+class FrameStats:
+    """What happened to one frame: messages, bytes, when it was fully shown."""
+    __slots__ = ('t', 'msgs', 'bytes', 'done', 'superseded')
+
+    def __init__(self, t: float):
+        self.t = t
+        self.msgs = 0
+        self.bytes = 0
+        self.done = t
+        self.superseded = False
+
+    @property
+    def latency(self) -> float:
+        return self.done - self.t
+
+
+class LEDPlanner:
+    """
+    Turns desired grids into a message schedule at `budget` bytes per ms.
+
+    push(t, grid) plans a frame at time t (ms, non-decreasing); frames
+    whose first message starts before t are committed to the schedule.  With
+    coalesce=False every frame is sent in full, in order, one message per
+    pad change, which is what the plugins do today.
+    """
+    __slots__ = ('budget', 'max_ranges', 'coalesce', 'device', 'planned',
+                 'queue', 'free_at', 'schedule', 'frames')
+
+    def __init__(self, budget: float = DEFAULT_BUDGET, max_ranges: int = MAX_RANGES,
+                 coalesce: bool = True, start: Optional[Sequence[int]] = None):
+        self.budget = budget
+        self.max_ranges = max_ranges
+        self.coalesce = coalesce
+        self.device = list(start) if start else [OFF] * PADS   # after committed messages
+        self.planned = list(self.device)                       # after everything queued
+        self.queue = []             # (start ms, end ms, message, FrameStats), by start
+        self.free_at = 0.0          # end of the last committed message
+        self.schedule: List[Tuple[float, bytes]] = []
+        self.frames: List[FrameStats] = []
+
+    def _commit(self, before: float):
+        n = 0
+        sending = None
+        for start, end, msg, fs in self.queue:
+            if start >= before and fs is not sending:    # a started frame goes out whole
+                break
+            sending = fs
+            apply(self.device, msg)
+            self.schedule.append((start, msg))
+            self.free_at = end
+            n += 1
+        del self.queue[:n]
+
+    def push(self, t: float, target: Sequence[int]) -> FrameStats:
+        self._commit(t)
+        fs = FrameStats(t)
+        if self.coalesce:
+            for q in self.queue:
+                q[3].superseded = True
+            self.queue.clear()
+            msgs = plan_frame(target, self.device, self.max_ranges)
+        else:
+            msgs = naive_frame(target, self.planned)
+        at = max(t, self.queue[-1][1] if self.queue else self.free_at)
+        for msg in msgs:
+            end = at + len(msg) / self.budget
+            self.queue.append((at, end, msg, fs))
+            at = end
+        fs.msgs, fs.bytes, fs.done = len(msgs), sum(map(len, msgs)), at
+        self.planned = list(target[:PADS])
+        self.frames.append(fs)
+        return fs
+
+    def flush(self) -> List[Tuple[float, bytes]]:
+        """Commit everything still queued and return the schedule."""
+        self._commit(math.inf)
+        return self.schedule
+
+
+def write_schedule(path: str, schedule: Sequence[Tuple[float, bytes]]):
+    with open(path, 'w') as fh:
+        fh.write(f"{len(schedule)}\n")
+        for start, msg in schedule:
+            fh.write(f"{start:.3f} {len(msg)} {' '.join(map(str, msg))}\n")
+
+
+def read_frames(path: str) -> List[Tuple[float, List[int]]]:
+    frames = []
+    grid = [OFF] * PADS
+    with open(path) as fh:
+        for n, line in enumerate(fh, 1):
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            grid = list(grid)
+            try:
+                t = float(parts[0])
+                for pad, tok in enumerate(parts[1:PADS + 1]):
+                    if tok == '.':
+                        continue
+                    if '/' in tok:
+                        ch, vel = tok.split('/')
+                        grid[pad] = note(int(ch), int(vel))
+                    else:
+                        grid[pad] = int(tok, 16) & 0xFFFFFF
+            except ValueError:
+                raise ValueError(f"{path}:{n}: bad frame line: {line.strip()}") from None
+            frames.append((t, grid))
+    return frames
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Command line
+# ═══════════════════════════════════════════════════════════════════════════
+
+def summarize(frames: Sequence[FrameStats]) -> str:
+    shown = sorted(f.latency for f in frames if not f.superseded)
+    if not frames:
+        return "no frames"
+    p95 = shown[min(len(shown) - 1, int(len(shown) * 0.95))] if shown else 0.0
+    return (f"{len(frames)} frames, {sum(f.msgs for f in frames) / len(frames):.1f} msgs "
+            f"and {sum(f.bytes for f in frames) / len(frames):.0f} bytes per frame, "
+            f"latency mean {sum(shown) / max(len(shown), 1):.1f} ms p95 {p95:.1f} ms "
+            f"max {shown[-1] if shown else 0.0:.1f} ms, "
+            f"{sum(f.superseded for f in frames)} superseded")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    ap.add_argument('frames', help='frames file (time_ms pad0 .. pad63 per line)')
+    ap.add_argument('-o', '--out', help='write the schedule for apc_led_player.jsfx')
+    ap.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='link bytes per ms')
+    ap.add_argument('--max-ranges', type=int, default=MAX_RANGES, help='pad ranges per SysEx')
+    ap.add_argument('--naive', action='store_true', help='one message per pad change, no dropping')
+    ap.add_argument('-q', '--quiet', action='store_true', help='summary only')
+    a = ap.parse_args(argv)
+    try:
+        frames = read_frames(a.frames)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    planner = LEDPlanner(a.budget, a.max_ranges, coalesce=not a.naive)
+    for t, grid in frames:
+        planner.push(t, grid)
+    schedule = planner.flush()
+    if not a.quiet:
+        print(f"{'time ms':>10} {'msgs':>5} {'bytes':>6} {'latency':>8}")
+        for f in planner.frames:
+            lat = 'dropped' if f.superseded else f"{f.latency:.1f}"
+            print(f"{f.t:>10.1f} {f.msgs:>5} {f.bytes:>6} {lat:>8}")
+    print(summarize(planner.frames))
+    if a.out:
+        write_schedule(a.out, schedule)
+        print(f"{len(schedule)} messages written to {a.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
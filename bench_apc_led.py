@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: APC mini LED traffic, per-pad sending against the frame planner.
+
+Simulates a light show on the 8x8 grid at a fixed frame rate, feeds every
+frame through apc_led.LEDPlanner twice — once sending one message per
+changed pad in order (what the colour plugins and the blinker do today),
+once diffed, coalesced into range SysExes and replanned when the link is
+behind — and prints per scenario:
+
+  msgs/fr     messages sent per frame
+  bytes/fr    bytes sent per frame
+  mean/p95/max  ms from a frame being requested to the last of its LEDs
+              being set, over the frames that were shown
+  dropped     frames replaced by a newer one before they were fully sent
+  plan µs     planning time per frame
+  exact       whether the simulated device ends on the last requested grid
+
+  python bench_apc_led.py                              # all scenarios, 30 fps
+  python bench_apc_led.py --fps 60 --budget 1.5 --scenario flash meter
+"""
+
+import argparse
+import random
+import time
+
+from apc_led import PADS, LEDPlanner, apply, note, rgb
+
+RED, GREEN, YELLOW, BLUE, WHITE = (rgb(255, 0, 0), rgb(0, 255, 0), rgb(255, 200, 0),
+                                   rgb(0, 80, 255), rgb(255, 255, 255))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Scenarios
+# ═══════════════════════════════════════════════════════════════════════════
+
+def flash(n, rng):
+    """The whole grid on and off every other frame."""
+    return [[WHITE if i % 2 == 0 else 0] * PADS for i in range(n)]
+
+
+def chase(n, rng):
+    """One white pad running over a blue background."""
+    return [[WHITE if p == i % PADS else BLUE for p in range(PADS)] for i in range(n)]
+
+
+def meter(n, rng):
+    """Eight level meters, one per column, green/yellow/red by row."""
+    colour = [GREEN] * 5 + [YELLOW] * 2 + [RED]
+    levels = [0] * 8
+    out = []
+    for _ in range(n):
+        levels = [max(0, min(8, v + rng.randint(-2, 2))) for v in levels]
+        out.append([colour[p // 8] if p // 8 < levels[p % 8] else 0 for p in range(PADS)])
+    return out
+
+
+def sparkle(n, rng):
+    """Eight random pads change to random colours each frame."""
+    grid = [0] * PADS
+    out = []
+    for _ in range(n):
+        grid = list(grid)
+        for p in rng.sample(range(PADS), 8):
+            grid[p] = rgb(rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        out.append(grid)
+    return out
+
+
+def rainbow(n, rng):
+    """A colour per column, scrolling one column per frame."""
+    cols = [rgb(255, 0, 0), rgb(255, 128, 0), rgb(255, 255, 0), rgb(0, 255, 0),
+            rgb(0, 255, 255), rgb(0, 0, 255), rgb(128, 0, 255), rgb(255, 0, 255)]
+    return [[cols[(p % 8 + i) % 8] for p in range(PADS)] for i in range(n)]
+
+
+def blink(n, rng):
+    """Clip-launcher style: half the grid pulsing palette colours, toggling."""
+    out = []
+    for i in range(n):
+        lit = (i // 4) % 2
+        out.append([note(10 if lit else 6, 5 + p % 8 * 8) if p % 2 else GREEN
+                    for p in range(PADS)])
+    return out
+
+
+SCENARIOS = {f.__name__: f for f in (flash, chase, meter, sparkle, rainbow, blink)}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Measurement
+# ═══════════════════════════════════════════════════════════════════════════
+
+def simulate(frames, fps, budget, coalesce):
+    planner = LEDPlanner(budget, coalesce=coalesce)
+    t0 = time.perf_counter()
+    for i, grid in enumerate(frames):
+        planner.push(i * 1000.0 / fps, grid)
+    plan = time.perf_counter() - t0
+    schedule = planner.flush()
+    device = [0] * PADS
+    for _, msg in schedule:
+        apply(device, msg)
+    shown = sorted(f.latency for f in planner.frames if not f.superseded)
+    n = len(frames)
+    return (len(schedule) / n, sum(len(m) for _, m in schedule) / n,
+            sum(shown) / max(len(shown), 1),
+            shown[min(len(shown) - 1, int(len(shown) * 0.95))] if shown else 0.0,
+            shown[-1] if shown else 0.0,
+            sum(f.superseded for f in planner.frames),
+            plan / n, device == list(frames[-1]))
+
+
+def run(names, seconds, fps, budget, seed):
+    n = int(seconds * fps)
+    print(f"{n} frames at {fps:g} fps, link {budget:g} bytes/ms "
+          f"({budget * 1000 / fps:.0f} bytes per frame interval)")
+    print(f"  {'scenario':<9} {'mode':<8} {'msgs/fr':>8} {'bytes/fr':>9} {'mean ms':>8} "
+          f"{'p95 ms':>8} {'max ms':>8} {'dropped':>8} {'plan µs':>8} {'exact':>6}")
+    for name in names:
+        frames = SCENARIOS[name](n, random.Random(seed))
+        for mode, coalesce in (('per-pad', False), ('planned', True)):
+            msgs, nbytes, mean, p95, worst, dropped, plan, exact = simulate(frames, fps, budget, coalesce)
+            print(f"  {name:<9} {mode:<8} {msgs:>8.1f} {nbytes:>9.0f} {mean:>8.1f} {p95:>8.1f} "
+                  f"{worst:>8.1f} {dropped:>8} {plan * 1e6:>8.0f} {'yes' if exact else 'NO':>6}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    ap.add_argument('--scenario', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    ap.add_argument('--seconds', type=float, default=10.0)
+    ap.add_argument('--fps', type=float, default=30.0)
+    ap.add_argument('--budget', type=float, default=3.125, help='link bytes per ms')
+    ap.add_argument('--seed', type=int, default=1)
+    a = ap.parse_args()
+    run(a.scenario, a.seconds, a.fps, a.budget, a.seed)
+
+
+if __name__ == '__main__':
+    main()
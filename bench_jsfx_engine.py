@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the JSFX MIDI chain's reference engines under dense input.
+
+Generates a synthetic performance (CC1/CC7 controller sweeps on four
+channels, a bouncing CC64 pedal, note on/off pairs and pitch bend) cut
+into audio blocks, runs it through each plugin model on its own and
+through the whole chain, and prints per plugin:
+
+  ev/s        events processed per second by the NumPy model
+  worst µs    slowest single block of the model
+  work        worst per-block handler steps of the plugin itself (events
+              received + midisends + internal loop iterations)
+  out/in      events sent per event received
+
+  python bench_jsfx_engine.py                        # default density sweep
+  python bench_jsfx_engine.py --events 2000 --blocks 500 --block-len 128
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from jsfx_engine import (BeatQuantizer, CCMapper, Chain, ChannelRouter,
+                         DualRegionFilter, NoteShift, Transport, make_events)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Synthetic performance
+# ═══════════════════════════════════════════════════════════════════════════
+
+def dense_stream(blocks: int, per_block: int, block_len: int, seed: int = 1):
+    """List of per-block event arrays, per_block events each on average."""
+    rng = np.random.default_rng(seed)
+    out = []
+    held = [[] for _ in range(4)]                   # sounding notes per channel
+    pedal = 0.0
+    for b in range(blocks):
+        n = int(rng.poisson(per_block))
+        kind = rng.choice(4, n, p=(0.6, 0.1, 0.2, 0.1))
+        ch = rng.integers(0, 4, n)
+        msg1 = np.empty(n, np.uint8)
+        msg2 = np.empty(n, np.uint8)
+        msg3 = np.empty(n, np.uint8)
+
+        cc = kind == 0                              # controller sweeps
+        msg1[cc] = 0xB0 | ch[cc]
+        msg2[cc] = np.where(rng.random(np.count_nonzero(cc)) < 0.7, 1, 7)
+        msg3[cc] = (np.arange(n)[cc] + b * 7) % 128
+
+        ped = kind == 1                             # pedal going up and down
+        pedal = (pedal + 0.05) % 2.0
+        msg1[ped] = 0xB0 | ch[ped]
+        msg2[ped] = 64
+        msg3[ped] = int(127 * abs(1.0 - pedal))
+
+        for i in np.flatnonzero(kind == 2):         # note pairs
+            c = ch[i]
+            if held[c] and rng.random() < 0.5:
+                msg1[i], msg2[i], msg3[i] = 0x80 | c, held[c].pop(0), 0
+            else:
+                note = int(rng.integers(30, 100))
+                held[c].append(note)
+                msg1[i], msg2[i], msg3[i] = 0x90 | c, note, int(rng.integers(1, 128))
+
+        pb = kind == 3                              # pitch bend
+        msg1[pb] = 0xE0 | ch[pb]
+        msg2[pb] = 0
+        msg3[pb] = rng.integers(0, 128, np.count_nonzero(pb))
+
+        out.append(make_events(np.sort(rng.integers(0, block_len, n)), msg1, msg2, msg3))
+    return out
+
+
+def live_rig():
+    """One instance of each plugin, set up as in the live template."""
+    return [
+        ChannelRouter(enable1=1, in1=1, out1=3, enable2=1, in2=2, out2=4),
+        DualRegionFilter(a_in_ch=3, a_low=36, a_high=60, b_in_ch=4, b_low=48,
+                         b_high=84, b_shift=12, out_ch=1),
+        NoteShift(shift=-12),
+        CCMapper(src_cc=1, enable1=1, cc1=11, enable2=1, cc2=74, enable3=1, cc3=71),
+        BeatQuantizer(channel=0, grid=3),
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Measurement
+# ═══════════════════════════════════════════════════════════════════════════
+
+def measure(engine, stream, block_len: int, srate: float):
+    """(events in, events out, seconds, worst block seconds, worst work)."""
+    transport = Transport(srate=srate)
+    n_in = n_out = 0
+    worst_t = worst_work = 0
+    t_total = time.perf_counter()
+    for ev in stream:
+        t0 = time.perf_counter()
+        out = engine.process_block(ev, transport)
+        dt = time.perf_counter() - t0
+        worst_t = max(worst_t, dt)
+        worst_work = max(worst_work, engine.work)
+        n_in += len(ev)
+        n_out += len(out)
+        transport.advance(block_len)
+    return n_in, n_out, time.perf_counter() - t_total, worst_t, worst_work
+
+
+def run(densities, blocks, block_len, srate, repeat, seed):
+    budget = block_len / srate
+    print(f"block: {block_len} samples @ {srate:g} Hz = {budget * 1e6:.0f} µs budget")
+    for per_block in densities:
+        stream = dense_stream(blocks, per_block, block_len, seed)
+        print(f"\n{per_block} events/block, {blocks} blocks")
+        print(f"  {'plugin':<24} {'ev/s':>12} {'worst µs':>9} {'% budget':>9} "
+              f"{'work':>7} {'out/in':>7}")
+        names = [e.NAME for e in live_rig()] + ['chain']
+        for k, name in enumerate(names):
+            best = None
+            for _ in range(repeat):
+                engines = live_rig()
+                engine = Chain(*engines) if name == 'chain' else engines[k]
+                res = measure(engine, stream, block_len, srate)
+                if best is None or res[2] < best[2]:
+                    best = res
+            n_in, n_out, total, worst_t, worst_work = best
+            print(f"  {name:<24} {n_in / total:>12,.0f} {worst_t * 1e6:>9.0f} "
+                  f"{worst_t / budget * 100:>8.1f}% {worst_work:>7} {n_out / max(n_in, 1):>7.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    ap.add_argument('--events', type=int, nargs='+', default=[16, 128, 1024],
+                    help='mean events per block')
+    ap.add_argument('--blocks', type=int, default=2000)
+    ap.add_argument('--block-len', type=int, default=512, help='samples per block')
+    ap.add_argument('--srate', type=float, default=48000.0)
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--seed', type=int, default=1)
+    a = ap.parse_args()
+    run(a.events, a.blocks, a.block_len, a.srate, a.repeat, a.seed)
+
+
+if __name__ == '__main__':
+    main()
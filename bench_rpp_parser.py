@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chunk-tokenizer RPP parser vs. the original per-line parser.
+
+Generates synthetic live-set projects (many tracks, large base64 plugin
+state, MIDI items, PROGRAMENV/MIDIPLINK bindings, AUXRECV routing), checks
+that both parsers build the same track model (and that a lazy load flags
+the same tracks as having MIDI links) and prints load timings for
+the legacy parser, the tokenizer on a read buffer, the tokenizer on a
+memory-mapped file and a lazy (track headers only) load of the mapping.
+
+  python bench_rpp_parser.py                    # default size sweep
+  python bench_rpp_parser.py --tracks 2000 --blob-lines 400 --repeat 3
+"""
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+from reaper_project_midi_cc_routing import REAPERProject, decode_midi_ch_field
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Synthetic project generator
+# ═══════════════════════════════════════════════════════════════════════════
+
+_B64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+def write_synthetic_project(path: str, n_tracks: int = 500, fx_per_track: int = 3,
+                            params_per_fx: int = 4, blob_lines: int = 60,
+                            midi_events: int = 400, seed: int = 1) -> int:
+    """Write a synthetic .RPP to path and return its size in bytes."""
+    rnd = random.Random(seed)
+    blob = [''.join(rnd.choice(_B64) for _ in range(128)) for _ in range(16)]
+
+    with open(path, 'w', newline='\n') as f:
+        w = f.write
+        w('<REAPER_PROJECT 0.1 "7.0/linux-x86_64" 1700000000\n')
+        w('  RIPPLE 0\n  TEMPO 120 4 4\n  SAMPLERATE 48000 0 0\n')
+        for t in range(n_tracks):
+            w(f'  <TRACK {{{t:08X}-0000-0000-0000-000000000000}}\n')
+            w(f'    NAME "Track {t}"\n')
+            w('    PEAKCOL 16576\n    BEAT -1\n    AUTOMODE 0\n')
+            w('    VOLPAN 1 0 -1 -1 1\n    MUTESOLO 0 0 0\n')
+            w(f'    ISBUS {1 if t % 16 == 0 else 0} {1 if t % 16 == 0 else 0}\n')
+            w('    NCHAN 2\n    FX 1\n    TRACKID {0}\n    PERF 0\n')
+            if t:
+                for _ in range(rnd.randint(0, 2)):
+                    src = rnd.randrange(t)
+                    midi = rnd.choice([0, 17, 1 + 32 * rnd.randint(0, 16), rnd.randint(1, 16)])
+                    ach = rnd.choice([-1, 0])
+                    w(f"    AUXRECV {src} 0 1 0 0 0 0 {ach} 0 -1:U {midi} -1 ''\n")
+            w('    MIDIOUT -1\n    MAINSEND 1 0\n')
+            w('    <FXCHAIN\n      WNDRECT 0 0 0 0\n      SHOW 0\n      LASTSEL 0\n      DOCKED 0\n')
+            for fx in range(fx_per_track):
+                w('      BYPASS 0 0 0\n')
+                w(f'      <VST "VST3: Synth {fx} (Vendor)" synth{fx}.vst3 0 "" 1{fx:09d}{{ABCDEF}} ""\n')
+                for i in range(blob_lines):
+                    w(f'        {blob[(t + fx + i) % 16]}\n')
+                w('        AAAQAAAA\n      >\n')
+                w('      PRESETNAME "Init"\n      FLOATPOS 0 0 0 0\n')
+                w(f'      FXID {{{t:08X}-{fx:04X}-0000-0000-000000000000}}\n')
+                for p in range(params_per_fx):
+                    w(f'      <PROGRAMENV {p} 0 "Param {p}"\n')
+                    w('        PARAMBASE 0\n        LFO 0\n        LFOWT 1 1\n        AUDIOCTL 0\n')
+                    w('        AUDIOCTLWT 1 1\n        PLINK 1 -100 -1 0\n')
+                    if t % 5 != 4:                  # some chains have no MIDI links
+                        w(f'        MIDIPLINK 0 {rnd.randint(0, 15)} 176 {rnd.randint(0, 127)}\n')
+                    w('      >\n')
+                w('      WAK 0 0\n')
+            w('    >\n')
+            w('    <ITEM\n      POSITION 0\n      LENGTH 16\n      LOOP 1\n')
+            w('      <SOURCE MIDI\n        HASDATA 1 960 QN\n')
+            for e in range(midi_events):
+                w(f'        E {120 if e else 0} {"90" if e % 2 == 0 else "80"} {60 + e % 40:x} 60\n')
+            w('        E 960 b0 7b 00\n      >\n    >\n')
+            w('  >\n')
+        w('>\n')
+    return os.path.getsize(path)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Baseline: the original per-line regex-dispatch parser
+# ═══════════════════════════════════════════════════════════════════════════
+
+def legacy_parse(lines):
+    tracks = []
+    current_track = None
+    current_fx = None
+    current_programenv = None
+    in_fxchain = False
+    fxchain_depth = 0
+
+    for i, line in enumerate(lines):
+        indent = len(line) - len(line.lstrip())
+        stripped = line.strip()
+
+        if stripped.startswith('<TRACK '):
+            guid_match = re.search(r'\{([^}]+)\}', stripped)
+            current_track = {
+                'guid': guid_match.group(1) if guid_match else 'Unknown',
+                'name': None, 'fx_list': [], 'receives': [], 'sends': [],
+                'folder_depth': 0, 'line_num': i,
+            }
+            tracks.append(current_track)
+            in_fxchain = False
+            current_fx = None
+            current_programenv = None
+
+        elif current_track:
+            if stripped.startswith('NAME '):
+                name = stripped[5:].strip('"')
+                current_track['name'] = name if name else None
+
+            elif stripped.startswith('ISBUS '):
+                parts = stripped.split()
+                if len(parts) >= 2:
+                    try:
+                        current_track['folder_depth'] = int(parts[1])
+                    except ValueError:
+                        pass
+
+            elif stripped.startswith('AUXRECV '):
+                parts = stripped.split()
+                try:
+                    src_idx    = int(parts[1])
+                    fader_mode = int(parts[2])   if len(parts) > 2  else 0
+                    src_ach    = int(parts[8])   if len(parts) > 8  else 0
+                    dst_ach    = int(parts[9])   if len(parts) > 9  else 0
+                    midi_field = int(parts[11])  if len(parts) > 11 else 0
+                    has_midi, midi_src_ch, midi_dst_ch = decode_midi_ch_field(midi_field)
+                    current_track['receives'].append({
+                        'src_idx': src_idx, 'fader_mode': fader_mode,
+                        'has_audio': src_ach != -1, 'src_ach': src_ach, 'dst_ach': dst_ach,
+                        'has_midi': has_midi, 'midi_src_ch': midi_src_ch,
+                        'midi_dst_ch': midi_dst_ch, 'midi_raw': midi_field,
+                    })
+                except (ValueError, IndexError):
+                    pass
+
+            elif stripped.startswith('<FXCHAIN'):
+                in_fxchain = True
+                fxchain_depth = indent
+                current_fx = None
+                current_programenv = None
+
+            elif in_fxchain:
+                fx_match = re.match(r'<(VST|AU|JS|VST3|CLAP)\s+"(.+?)"', stripped)
+                if fx_match:
+                    current_fx = {'type': fx_match.group(1), 'name': fx_match.group(2),
+                                  'line_num': i, 'modulations': []}
+                    current_track['fx_list'].append(current_fx)
+                    current_programenv = None
+
+                elif stripped.startswith('<PROGRAMENV '):
+                    m = re.match(r'<PROGRAMENV\s+(\S+)\s+(\d+)\s+"([^"]+)"', stripped)
+                    if m:
+                        current_programenv = {
+                            'param_id': m.group(1), 'param_name': m.group(3),
+                            'bypass_flag': int(m.group(2)), 'midi_cc': None,
+                            'midi_channel': None, 'midi_bus': None, 'midi_msg_type': None,
+                            'programenv_line': i, 'midiplink_line': None,
+                        }
+                        if current_fx:
+                            current_fx['modulations'].append(current_programenv)
+                        elif current_track['fx_list']:
+                            current_track['fx_list'][-1]['modulations'].append(current_programenv)
+
+                elif stripped.startswith('MIDIPLINK ') and current_programenv:
+                    mm = re.match(r'MIDIPLINK\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)', stripped)
+                    if mm:
+                        current_programenv['midi_bus']       = int(mm.group(1))
+                        current_programenv['midi_channel']   = int(mm.group(2))
+                        current_programenv['midi_msg_type']  = int(mm.group(3))
+                        current_programenv['midiplink_line'] = i
+                        if int(mm.group(3)) == 176:
+                            current_programenv['midi_cc'] = int(mm.group(4))
+                        else:
+                            current_programenv['midi_note'] = int(mm.group(4))
+
+                elif stripped == '>' and current_programenv:
+                    current_programenv = None
+
+                if stripped == '>' and indent <= fxchain_depth:
+                    in_fxchain = False
+                    current_fx = None
+                    current_programenv = None
+
+    for dst_idx, track in enumerate(tracks):
+        for recv in track['receives']:
+            src_idx = recv['src_idx']
+            if 0 <= src_idx < len(tracks):
+                tracks[src_idx]['sends'].append({
+                    'dst_idx': dst_idx, 'fader_mode': recv['fader_mode'],
+                    'has_audio': recv['has_audio'], 'src_ach': recv['src_ach'],
+                    'dst_ach': recv['dst_ach'], 'has_midi': recv['has_midi'],
+                    'midi_src_ch': recv['midi_src_ch'], 'midi_dst_ch': recv['midi_dst_ch'],
+                })
+    return tracks
+
+
+def legacy_load(path):
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        lines = f.readlines()
+    return legacy_parse(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Runner
+# ═══════════════════════════════════════════════════════════════════════════
+
+def comparable(tracks):
+    """Convert model objects to the legacy dict shape for comparison."""
+    def mod(m):
+        d = {'param_id': m.param_id, 'param_name': m.param_name,
+             'bypass_flag': m.bypass_flag, 'midi_cc': m.midi_cc,
+             'midi_channel': m.midi_channel, 'midi_bus': m.midi_bus,
+             'midi_msg_type': m.midi_msg_type, 'programenv_line': m.programenv_line,
+             'midiplink_line': m.midiplink_line}
+        if m.midi_msg_type is not None and m.midi_msg_type != 176:
+            d['midi_note'] = m.midi_note
+        return d
+
+    def conn(c):
+        return {'fader_mode': c.fader_mode, 'has_audio': c.has_audio,
+                'src_ach': c.src_ach, 'dst_ach': c.dst_ach, 'has_midi': c.has_midi,
+                'midi_src_ch': c.midi_src_ch, 'midi_dst_ch': c.midi_dst_ch}
+
+    return [{'guid': t.guid, 'name': t.name, 'folder_depth': t.folder_depth,
+             'line_num': t.line_num,
+             'fx_list': [{'type': f.type, 'name': f.name, 'line_num': f.line_num,
+                          'modulations': [mod(m) for m in f.modulations]}
+                         for f in t.fx_list],
+             'receives': [{'src_idx': r.src_idx, **conn(r), 'midi_raw': r.midi_raw}
+                          for r in t.receives],
+             'sends': [{'dst_idx': s.dst_idx, **conn(s)} for s in t.sends]}
+            for t in tracks]
+
+
+def best_of(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def run(sizes, fx_per_track, params_per_fx, blob_lines, midi_events, repeat):
+    print(f"{'tracks':>7} {'MB':>8} {'legacy s':>10} {'tokenizer s':>12} {'mapped s':>9} "
+          f"{'headers s':>10} {'speed-up':>9}  model")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f'synthetic_{n}.RPP')
+            size = write_synthetic_project(path, n, fx_per_track, params_per_fx,
+                                           blob_lines, midi_events)
+            t_old, old_tracks = best_of(lambda: legacy_load(path), repeat)
+
+            def load_new(mapped, lazy=False):
+                p = REAPERProject()
+                p.load_file(path, mapped=mapped, lazy=lazy)
+                p.close()
+                return p.tracks
+            t_new, new_tracks = best_of(lambda: load_new(False), repeat)
+            t_map, _ = best_of(lambda: load_new(True), repeat)
+            t_hdr, hdr_tracks = best_of(lambda: load_new(True, lazy=True), repeat)
+
+            same = ('identical' if old_tracks == comparable(new_tracks) and
+                    [t.has_midiplink for t in hdr_tracks] ==
+                    [t.has_midiplink for t in new_tracks]
+                    else 'MISMATCH')
+            print(f'{n:>7} {size / 1e6:>8.1f} {t_old:>10.3f} {t_new:>12.3f} {t_map:>9.3f} '
+                  f'{t_hdr:>10.3f} {t_old / t_map:>8.1f}x  {same}')
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    ap.add_argument('--tracks', type=int, nargs='+', default=[100, 500, 2000])
+    ap.add_argument('--fx', type=int, default=3, help='FX per track')
+    ap.add_argument('--params', type=int, default=4, help='MIDI-linked params per FX')
+    ap.add_argument('--blob-lines', type=int, default=60, help='base64 state lines per FX')
+    ap.add_argument('--midi-events', type=int, default=400, help='MIDI events per item')
+    ap.add_argument('--repeat', type=int, default=3)
+    a = ap.parse_args()
+    run(a.tracks, a.fx, a.params, a.blob_lines, a.midi_events, a.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1376 @@
+#!/usr/bin/env python3
+"""
+Static audit of the JSFX plugins: local-memory layout and per-block cost.
+
+Parses each .jsfx (EEL2) and, without running it:
+
+  memory      every array access (x[i], memset, memcpy, midisend_buf) is
+              traced to its base constant, e.g. LOG_BASE + log_head *
+              LOG_FIELDS + 4, and the index ranges are bounded by interval
+              analysis (slider ranges, MIDI byte masks, `% N` ring indices,
+              loop counters, `i < N ? ...` guards).  The resulting regions
+              are checked for overlaps, negative or unbounded indices, bases
+              that are never assigned (EEL2 variables start at 0) and for
+              running past a documented `100..195` layout.
+  cost        worst-case operations (operators, calls, assignments,
+              memory accesses) for one pass through the midirecv loop, for
+              the rest of @block and for one @sample, plus midisends per
+              event.  Loops count at their largest trip count; per-event
+              loops of LOOP_WARN iterations or more and unrolled runs like
+              slot0_..slot9_ are listed.
+
+  python jsfx_audit.py                        # every .jsfx next to this script
+  python jsfx_audit.py midi_input_quantizer.jsfx --layout
+  python jsfx_audit.py --events 512 --block-len 256 --json audit.json
+  python jsfx_audit.py --self-test            # check the analysis on known cases
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+INF = math.inf
+LOOP_WARN = 16          # per-event loops at least this long are reported
+UNROLL_MIN = 4          # identical statements differing only in digit suffixes
+WIDEN_AFTER = 8         # fixpoint rounds before growing bounds jump to the next threshold
+MAX_ROUNDS = 256
+NARROW_ROUNDS = 8       # descending rounds after widening, to win back overshoot
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  EEL2 parser
+# ═══════════════════════════════════════════════════════════════════════════
+
+class JSFXSyntaxError(ValueError):
+    pass
+
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>[ \t\r\n]+|//[^\n]*|/\*.*?\*/)
+  | (?P<str>"(?:[^"\\]|\\.)*")
+  | (?P<chr>'(?:[^'\\]|\\.){1,4}')
+  | (?P<hex>(?:0x|\$x)[0-9A-Fa-f]+)
+  | (?P<dchr>\$'.')
+  | (?P<const>\$(?:pi|phi|e)\b)
+  | (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_#][A-Za-z0-9_.]*)
+  | (?P<op>===|!==|<<=|>>=|==|!=|<=|>=|<<|>>|&&|\|\||\+=|-=|\*=|/=|%=|\|=|&=|\^=|~=|[-+*/%^|&~!<>=?:;,()\[\]])
+""", re.S | re.X)
+
+_CONSTS = {'$pi': math.pi, '$phi': (1 + 5 ** 0.5) / 2, '$e': math.e}
+
+# Binary operators, loosest first (EEL2 operator reference)
+_LEVELS = [('||',), ('&&',), ('==', '!=', '===', '!==', '<', '>', '<=', '>='),
+           ('|', '&', '~'), ('+', '-'), ('*', '/'), ('<<', '>>'), ('%',), ('^',)]
+_PREC = {op: i for i, ops in enumerate(_LEVELS) for op in ops}
+_ASSIGN = ('=', '+=', '-=', '*=', '/=', '%=', '|=', '&=', '^=', '~=', '<<=', '>>=')
+_FUNC_MODS = ('local', 'instance', 'global', 'globals', 'static')
+
+
+def tokenize(text: str, line: int = 1):
+    """(kind, value, line) tokens of EEL2 code; comments are dropped."""
+    out = []
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m:
+            raise JSFXSyntaxError(f"line {line}: unexpected {text[pos]!r}")
+        kind, value = m.lastgroup, m.group()
+        if kind == 'hex':
+            out.append(('num', int(value[2:], 16), line))
+        elif kind in ('chr', 'dchr'):
+            chars = value[2:-1] if kind == 'dchr' else value[1:-1]
+            out.append(('num', int.from_bytes(chars.encode('latin-1', 'replace'), 'big'), line))
+        elif kind == 'const':
+            out.append(('num', _CONSTS[value], line))
+        elif kind == 'num':
+            out.append(('num', float(value) if any(c in value for c in '.eE') else int(value),
+                        line))
+        elif kind != 'ws':
+            out.append((kind, value, line))
+        line += value.count('\n')
+        pos = m.end()
+    out.append(('eof', None, line))
+    return out
+
+
+class Function:
+    __slots__ = ('name', 'params', 'locals', 'body', 'section', 'line')
+
+    def __init__(self, name, params, local_names, body, section, line):
+        self.name    = name
+        self.params  = params           # mangled names
+        self.locals  = local_names
+        self.body    = body
+        self.section = section
+        self.line    = line
+
+
+class Parser:
+    """
+    Recursive-descent EEL2 parser producing tuple nodes (kind, line, ...):
+
+      ('num', l, v)  ('str', l, s)  ('var', l, name)  ('idx', l, base, i)
+      ('un', l, op, x)  ('bin', l, op, a, b)  ('cond', l, c, a, b|None)
+      ('set', l, op, target, value)  ('call', l, name, [args])
+      ('loop', l, n, body)  ('while', l, cond, body|None)  ('seq', l, [stmts])
+      ('func', l, name)
+
+    Parameters and local() variables of a function are renamed
+    'func:name' so they do not alias globals of the same name.
+    """
+
+    def __init__(self, functions: Dict[str, Function]):
+        self.functions = functions
+        self.scope: Optional[Tuple[str, set]] = None
+
+    def parse(self, text: str, line: int, section: str):
+        self.toks = tokenize(text, line)
+        self.i = 0
+        self.section = section
+        body = self.seq(('eof',))
+        return body
+
+    # ── token helpers ──
+
+    def peek(self, value=None):
+        kind, v, _ = self.toks[self.i]
+        if value is None:
+            return kind, v
+        return kind == 'op' and v == value
+
+    def take(self, value=None):
+        tok = self.toks[self.i]
+        if value is not None and not (tok[0] == 'op' and tok[1] == value):
+            raise JSFXSyntaxError(f"line {tok[2]}: expected {value!r}, got {tok[1]!r}")
+        self.i += 1
+        return tok
+
+    def line(self) -> int:
+        return self.toks[self.i][2]
+
+    # ── grammar ──
+
+    def seq(self, stop):
+        line = self.line()
+        stmts = []
+        while True:
+            kind, v = self.peek()
+            if kind == 'eof' or (kind == 'op' and v in stop):
+                if kind == 'eof' and 'eof' not in stop:
+                    raise JSFXSyntaxError(f"line {self.line()}: unexpected end of code")
+                break
+            if kind == 'op' and v == ';':
+                self.take()
+                continue
+            stmts.append(self.statement())
+            if self.peek(';'):
+                self.take()
+            elif not (self.peek()[0] == 'eof' or (self.peek()[0] == 'op' and self.peek()[1] in stop)):
+                raise JSFXSyntaxError(f"line {self.line()}: expected ';' before {self.peek()[1]!r}")
+        return ('seq', line, stmts)
+
+    def statement(self):
+        if self.peek() == ('name', 'function'):
+            return self.function()
+        return self.expr()
+
+    def function(self):
+        line = self.take()[2]
+        name = self.take()[1]
+        self.take('(')
+        params = []
+        while not self.peek(')'):
+            params.append(self.take()[1])
+            if self.peek(','):
+                self.take()
+        self.take(')')
+        local_names = []
+        while self.peek()[0] == 'name' and self.peek()[1] in _FUNC_MODS:
+            mod = self.take()[1]
+            self.take('(')
+            while not self.peek(')'):
+                n = self.take()[1]
+                if mod == 'local':
+                    local_names.append(n)
+                if self.peek(','):
+                    self.take()
+            self.take(')')
+        outer = self.scope
+        self.scope = (name, set(params) | set(local_names))
+        self.take('(')
+        body = self.seq((')',))
+        self.take(')')
+        self.scope = outer
+        self.functions[name] = Function(name, [f"{name}:{p}" for p in params],
+                                        [f"{name}:{n}" for n in local_names],
+                                        body, self.section, line)
+        return ('func', line, name)
+
+    def expr(self):
+        line = self.line()
+        lhs = self.conditional()
+        kind, v = self.peek()
+        if kind == 'op' and v in _ASSIGN:
+            self.take()
+            return ('set', line, v, lhs, self.expr())
+        return lhs
+
+    def conditional(self):
+        line = self.line()
+        c = self.binary(0)
+        if not self.peek('?'):
+            return c
+        self.take()
+        a = self.expr()
+        b = None
+        if self.peek(':'):
+            self.take()
+            b = self.expr()
+        return ('cond', line, c, a, b)
+
+    def binary(self, level: int):
+        if level == len(_LEVELS):
+            return self.unary()
+        line = self.line()
+        lhs = self.binary(level + 1)
+        while True:
+            kind, v = self.peek()
+            if kind != 'op' or v not in _LEVELS[level]:
+                return lhs
+            self.take()
+            lhs = ('bin', line, v, lhs, self.binary(level + 1))
+
+    def unary(self):
+        kind, v = self.peek()
+        if kind == 'op' and v in ('!', '-', '+'):
+            line = self.take()[2]
+            return ('un', line, v, self.unary())
+        return self.postfix()
+
+    def postfix(self):
+        node = self.primary()
+        while self.peek('['):
+            line = self.take()[2]
+            index = ('num', line, 0) if self.peek(']') else self.expr()
+            self.take(']')
+            node = ('idx', line, node, index)
+        return node
+
+    def primary(self):
+        kind, v, line = self.take()
+        if kind == 'num':
+            return ('num', line, v)
+        if kind == 'str':
+            return ('str', line, v)
+        if kind == 'op' and v == '(':
+            body = self.seq((')',))
+            self.take(')')
+            return body
+        if kind != 'name':
+            raise JSFXSyntaxError(f"line {line}: unexpected {v!r}")
+        if not self.peek('('):
+            if self.scope and v in self.scope[1]:
+                v = f"{self.scope[0]}:{v}"
+            return ('var', line, v)
+        self.take('(')
+        if v == 'while':
+            cond = self.seq((')',))
+            self.take(')')
+            body = None
+            if self.peek('('):
+                self.take()
+                body = self.seq((')',))
+                self.take(')')
+            return ('while', line, cond, body)
+        args = []
+        while not self.peek(')'):
+            args.append(self.seq((',', ')')))
+            if self.peek(','):
+                self.take()
+        self.take(')')
+        if v == 'loop' and len(args) == 2:
+            return ('loop', line, args[0], args[1])
+        return ('call', line, v, args)
+
+
+_SLIDER_RE = re.compile(r'^slider(\d+):\s*(?:(\w+)\s*=\s*)?[-\d.]+\s*<\s*([-\d.]+)\s*,\s*([-\d.]+)'
+                        r'(?:\s*,\s*([-\d.]+))?', re.M)
+_SECTION_RE = re.compile(r'^@(\w+)[^\n]*$', re.M)
+_DOC_RANGE_RE = re.compile(r'\b(\d+)\s*\.\.\s*(\d+)\b')
+
+
+class JSFXSource:
+    """One .jsfx file: its code sections parsed, sliders and documented ranges."""
+
+    def __init__(self, path: str, text: Optional[str] = None):
+        self.path = path
+        self.name = os.path.basename(path)
+        if text is None:
+            with open(path, 'rb') as f:
+                text = f.read().decode('utf-8', 'replace')
+        self.functions: Dict[str, Function] = {}
+        self.sections: Dict[str, tuple] = {}
+        self.errors: List[str] = []
+        marks = list(_SECTION_RE.finditer(text))
+        header = text[:marks[0].start()] if marks else text
+        self.sliders: Dict[int, Tuple[float, float, bool, Optional[str]]] = {}
+        for m in _SLIDER_RE.finditer(header):
+            lo, hi = float(m.group(3)), float(m.group(4))
+            step = float(m.group(5) or 0)
+            integral = step == int(step) and lo == int(lo) and step > 0
+            self.sliders[int(m.group(1))] = (min(lo, hi), max(lo, hi), integral, m.group(2))
+        # 'a..b' ranges documented in the header or in comments
+        self.doc_ranges = sorted({(int(a), int(b)) for a, b in _DOC_RANGE_RE.findall(text)
+                                  if int(a) < int(b)})
+        parser = Parser(self.functions)
+        for k, m in enumerate(marks):
+            end = marks[k + 1].start() if k + 1 < len(marks) else len(text)
+            line = text.count('\n', 0, m.end()) + 1
+            name = m.group(1)
+            try:
+                self.sections[name] = parser.parse(text[m.end():end], line, name)
+            except JSFXSyntaxError as e:
+                self.errors.append(f"@{name}: {e}")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Value ranges
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Range:
+    """Closed interval of values; `bits` bounds the set bits of a
+    non-negative integer (so msg23 & 0xFF stays 0..127)."""
+    __slots__ = ('lo', 'hi', 'integral', 'bits')
+
+    def __init__(self, lo, hi, integral=False, bits=None):
+        self.lo = lo
+        self.hi = hi
+        self.integral = integral
+        self.bits = bits
+
+    def key(self):
+        return (self.lo, self.hi, self.integral, self.bits)
+
+    @property
+    def finite(self) -> bool:
+        return self.lo > -INF and self.hi < INF
+
+    def __repr__(self):
+        return f"Range({self.lo}, {self.hi})"
+
+
+UNKNOWN = Range(-INF, INF)
+BOOL = Range(0, 1, True, 1)
+ZERO = Range(0, 0, True, 0)
+
+
+def const_range(v) -> Range:
+    if isinstance(v, int) or (isinstance(v, float) and v.is_integer()):
+        v = int(v)
+        return Range(v, v, True, v if v >= 0 else None)
+    return Range(v, v)
+
+
+def union(a: Optional[Range], b: Optional[Range]) -> Optional[Range]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    bits = a.bits | b.bits if a.bits is not None and b.bits is not None else None
+    return Range(min(a.lo, b.lo), max(a.hi, b.hi), a.integral and b.integral, bits)
+
+
+def _mask(r: Range) -> Optional[int]:
+    if r.bits is not None:
+        return r.bits
+    if r.lo >= 0 and r.hi < INF:
+        return (1 << int(r.hi).bit_length()) - 1
+    return None
+
+
+def _mul(x, y):
+    return 0 if x == 0 or y == 0 else x * y
+
+
+def _is_const(r: Range) -> bool:
+    return r.lo == r.hi and r.finite
+
+
+def arith(op: str, a: Range, b: Range) -> Range:
+    both = a.integral and b.integral
+    if op == '+':
+        return Range(a.lo + b.lo, a.hi + b.hi, both)
+    if op == '-':
+        return Range(a.lo - b.hi, a.hi - b.lo, both)
+    if op == '*':
+        p = [_mul(x, y) for x in (a.lo, a.hi) for y in (b.lo, b.hi)]
+        return Range(min(p), max(p), both)
+    if op == '/':
+        if b.lo > 0 or b.hi < 0:
+            q = [x / y if abs(y) < INF else 0.0 for x in (a.lo, a.hi) for y in (b.lo, b.hi)]
+            if any(math.isnan(v) for v in q):
+                return UNKNOWN
+            bits = None
+            if _is_const(b) and b.lo > 0 and a.bits is not None and b.integral \
+                    and int(b.lo) & (int(b.lo) - 1) == 0:
+                bits = a.bits >> (int(b.lo).bit_length() - 1)
+            return Range(min(q), max(q), False, bits)
+        return UNKNOWN
+    if op == '%':
+        if b.lo >= 1 and b.hi < INF:
+            m = math.ceil(b.hi) - 1
+            if a.lo >= 0:
+                return Range(0, min(m, math.floor(a.hi)) if a.hi < INF else m, True)
+            return Range(-m, m, True)
+        return Range(-INF, INF, True)
+    if op == '&':
+        ma, mb = _mask(a), _mask(b)
+        if ma is None and mb is None:
+            return Range(-INF, INF, True)
+        bits = ma & mb if ma is not None and mb is not None else (ma if mb is None else mb)
+        return Range(0, bits, True, bits)
+    if op in ('|', '~'):
+        if _is_const(b) and b.lo == 0:                       # x|0 truncates
+            return Range(math.trunc(a.lo) if a.lo > -INF else a.lo,
+                         math.trunc(a.hi) if a.hi < INF else a.hi, True, a.bits)
+        ma, mb = _mask(a), _mask(b)
+        if ma is None or mb is None:
+            return Range(-INF, INF, True)
+        bits = ma | mb
+        lo = max(math.trunc(a.lo), math.trunc(b.lo)) if op == '|' else 0
+        return Range(lo, bits, True, bits)
+    if op in ('<<', '>>') and _is_const(b) and 0 <= b.lo < 53:
+        k = int(b.lo)
+        if op == '<<':
+            return Range(a.lo * (1 << k), a.hi * (1 << k), True,
+                         a.bits << k if a.bits is not None else None)
+        f = 1 << k
+        return Range(math.floor(a.lo / f) if a.lo > -INF else a.lo,
+                     math.floor(a.hi / f) if a.hi < INF else a.hi, True,
+                     a.bits >> k if a.bits is not None else None)
+    if op in _LEVELS[0] + _LEVELS[1] + _LEVELS[2]:
+        return BOOL
+    return UNKNOWN
+
+
+_NEGATE = {'<': '>=', '>=': '<', '>': '<=', '<=': '>', '==': '!=', '!=': '==',
+           '===': '!==', '!==': '==='}
+_FLIP = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '==': '==', '!=': '!=',
+         '===': '===', '!==': '!=='}
+
+
+def _atoms(cond, pol: bool):
+    """(op, lhs, rhs) comparisons implied by cond being `pol`."""
+    k = cond[0]
+    if k == 'seq' and len(cond[2]) == 1:
+        yield from _atoms(cond[2][0], pol)
+    elif k == 'un' and cond[2] == '!':
+        yield from _atoms(cond[3], not pol)
+    elif k == 'bin' and ((cond[2] == '&&' and pol) or (cond[2] == '||' and not pol)):
+        yield from _atoms(cond[3], pol)
+        yield from _atoms(cond[4], pol)
+    elif k == 'bin' and cond[2] in _NEGATE:
+        yield (cond[2] if pol else _NEGATE[cond[2]], cond[3], cond[4])
+
+
+def narrow(r: Range, op: str, e: Range) -> Optional[Range]:
+    lo, hi = r.lo, r.hi
+    step = 1 if r.integral and e.integral else 0
+    if op == '<':
+        hi = min(hi, e.hi - step)
+    elif op == '<=':
+        hi = min(hi, e.hi)
+    elif op == '>':
+        lo = max(lo, e.lo + step)
+    elif op == '>=':
+        lo = max(lo, e.lo)
+    elif op in ('==', '==='):
+        lo, hi = max(lo, e.lo), min(hi, e.hi)
+    if lo > hi:
+        return None                         # branch unreachable
+    return Range(lo, hi, r.integral, r.bits)
+
+
+# Host variables: value ranges where they matter, anything else is unknown
+_HOST = {'srate': Range(8000, 768000), 'samplesblock': Range(1, 8192, True),
+         'tempo': Range(1, 960), 'play_state': Range(0, 6, True, 7),
+         'beat_position': Range(0, INF), 'play_position': Range(0, INF),
+         'ts_num': Range(1, 64, True), 'ts_denom': Range(1, 64, True),
+         'num_ch': Range(0, 64, True)}
+_HOST_PREFIX = re.compile(r'^(gfx_|mouse_|spl\d|slider\d|reg\d\d$|ext_|pdc_|trigger$)')
+# midirecv(offset, msg1, msg23) / midirecv(offset, msg1, msg2, msg3)
+_MIDIRECV_3 = (Range(0, 8191, True), Range(0x80, 0xEF, True, 0xFF), Range(0, 0x7F7F, True, 0x7F7F))
+_MIDIRECV_4 = _MIDIRECV_3[:2] + (Range(0, 127, True, 0x7F),) * 2
+_SEND = {'midisend', 'midisend_buf', 'midisend_str', 'midisyx'}
+_MEM_LEN = {'memset': (0, 2), 'midisend_buf': (1, 2), 'midisyx': (1, 2),
+            'midirecv_buf': (1, 2), 'mem_set_values': None, 'mem_get_values': None}
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Analysis
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Region:
+    __slots__ = ('root', 'names', 'lo', 'hi', 'lines', 'writes', 'implicit')
+
+    def __init__(self, root, names, implicit):
+        self.root = root
+        self.names = names
+        self.lo = INF
+        self.hi = -INF
+        self.lines: set = set()
+        self.writes = False
+        self.implicit = implicit
+
+    @property
+    def label(self) -> str:
+        return '/'.join(self.names)
+
+    def to_json(self) -> dict:
+        return {'name': self.label, 'lo': _num(self.lo), 'hi': _num(self.hi),
+                'lines': sorted(self.lines), 'writes': self.writes,
+                'implicit_base': self.implicit}
+
+
+def _num(v):
+    return None if abs(v) == INF else (int(v) if float(v).is_integer() else round(v, 3))
+
+
+class Audit:
+    """Memory layout and cost of one plugin (see the module docstring)."""
+
+    def __init__(self, src: JSFXSource):
+        self.src = src
+        self.findings: List[Tuple[str, int, str]] = []       # (kind, line, message)
+        for err in src.errors:
+            self.findings.append(('parse', 0, err))
+        self.code = [(name, body) for name, body in src.sections.items()]
+        self._collect_assignments()
+        self._find_constants()
+        self._find_pointers()
+        self.contribs: List[tuple] = []                     # (target, expr, ctx)
+        self.accesses: List[tuple] = []
+        for name, body in self.code:
+            self._walk(body, ((), {}))
+        for fn in src.functions.values():
+            self._walk(fn.body, ((), {}))
+            if fn.body[2]:
+                self.contribs.append((f"{fn.name}()", fn.body[2][-1], ((), {})))
+        self._solve()
+        self._layout()
+        self._costs()
+
+    # ── structure ──
+
+    def _walk_all(self, node, visit):
+        """Pre-order over node and its children (function bodies excluded)."""
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            if n is None:
+                continue
+            visit(n)
+            k = n[0]
+            if k == 'seq':
+                stack.extend(n[2])
+            elif k == 'call':
+                stack.extend(n[3])
+            elif k in ('idx', 'loop', 'while'):
+                stack.extend((n[2], n[3]))
+            elif k == 'un':
+                stack.append(n[3])
+            elif k == 'bin':
+                stack.extend((n[3], n[4]))
+            elif k == 'cond':
+                stack.extend((n[2], n[3], n[4]))
+            elif k == 'set':
+                stack.extend((n[3], n[4]))
+
+    def _bodies(self):
+        for name, body in self.code:
+            yield name, body
+        for fn in self.src.functions.values():
+            yield fn.section, fn.body
+
+    def _collect_assignments(self):
+        self.assigned: Dict[str, List[tuple]] = {}
+        self.direct_bases: set = set()
+        for fn in self.src.functions.values():
+            for p in fn.params:
+                self.assigned.setdefault(p, []).append(('param', None, None))
+
+        def visit(n):
+            k = n[0]
+            if k == 'set' and n[3][0] == 'var':
+                self.assigned.setdefault(n[3][2], []).append((n[2], n[4], n))
+            elif k == 'call' and n[2] in ('midirecv', 'midirecv_buf', 'midirecv_str'):
+                for a in n[3][1:]:
+                    v = _single(a)
+                    if v[0] == 'var':
+                        self.assigned.setdefault(v[2], []).append(('out', None, n))
+            if k == 'idx':
+                v = _single(n[2])
+                if v[0] == 'var':
+                    self.direct_bases.add(v[2])
+            elif k == 'call' and n[2] in _MEM_LEN and n[3]:
+                arg = _MEM_LEN[n[2]]
+                v = _single(n[3][arg[0] if arg else 0])
+                if v[0] == 'var':
+                    self.direct_bases.add(v[2])
+
+        for _, body in self._bodies():
+            self._walk_all(body, visit)
+
+    def _find_constants(self):
+        """Variables assigned exactly once, at the top level of @init, to a
+        value computable from literals and earlier constants."""
+        self.consts: Dict[str, float] = {}
+        self.alias: Dict[str, str] = {}
+        init = self.src.sections.get('init')
+        if init is None:
+            return
+        for stmt in init[2]:
+            if stmt[0] != 'set' or stmt[2] != '=' or stmt[3][0] != 'var':
+                continue
+            name = stmt[3][2]
+            if len(self.assigned.get(name, ())) != 1:
+                continue
+            value = self._const_eval(stmt[4])
+            if value is not None:
+                self.consts[name] = value
+                rhs = _single(stmt[4])
+                if rhs[0] == 'var':
+                    self.alias[name] = self.alias.get(rhs[2], rhs[2])
+
+    def _const_eval(self, n):
+        k = n[0]
+        if k == 'num':
+            return n[2]
+        if k == 'var':
+            return self.consts.get(n[2])
+        if k == 'seq' and len(n[2]) == 1:
+            return self._const_eval(n[2][0])
+        if k == 'un' and n[2] in '-+':
+            v = self._const_eval(n[3])
+            return None if v is None else (-v if n[2] == '-' else v)
+        if k == 'bin':
+            a, b = self._const_eval(n[3]), self._const_eval(n[4])
+            if a is None or b is None:
+                return None
+            r = arith(n[2], const_range(a), const_range(b))
+            return r.lo if _is_const(r) else None
+        return None
+
+    def _implicit(self, name: str) -> bool:
+        """Never assigned anywhere: an EEL2 variable that stays 0."""
+        return (name not in self.assigned and name not in self.consts and name not in _HOST
+                and not _HOST_PREFIX.match(name) and ':' not in name)
+
+    def root_of(self, name: str) -> Optional[str]:
+        if name in self.consts:
+            return self.alias.get(name, name)
+        if self._implicit(name):
+            return name
+        return self.pointers.get(name)
+
+    def _split(self, expr):
+        """(root, [offset terms]) when expr is root + offsets, else None."""
+        terms, stack = [], [expr]
+        while stack:
+            n = _single(stack.pop())
+            if n[0] == 'bin' and n[2] == '+':
+                stack.extend((n[4], n[3]))
+            else:
+                terms.append(n)
+        cands = [i for i, t in enumerate(terms) if t[0] == 'var' and self.root_of(t[2])]
+        if not cands:
+            return None
+        preferred = [i for i in cands if terms[i][2] in self.direct_bases
+                     or terms[i][2] in self.pointers]
+        if len(preferred) != 1 and len(cands) != 1:
+            return None
+        i = (preferred or cands)[0]
+        v = terms[i][2]
+        rest = terms[:i] + terms[i + 1:]
+        if v in self.pointers:
+            rest.append(('var', terms[i][1], '&' + v))
+        return self.root_of(v), rest
+
+    def _find_pointers(self):
+        """Variables only ever set to `BASE + offset` (or moved by += / -=):
+        accesses through them belong to BASE's region."""
+        self.pointers: Dict[str, str] = {}
+        changed = True
+        while changed:
+            changed = False
+            for name, sets in self.assigned.items():
+                if name in self.consts or name in self.pointers:
+                    continue
+                roots = set()
+                for op, rhs, _ in sets:
+                    if op == '=':
+                        split = self._split(rhs)
+                        roots.add(split[0] if split else None)
+                    elif op not in ('+=', '-='):
+                        roots.add(None)
+                if len(roots) == 1 and None not in roots:
+                    self.pointers[name] = roots.pop()
+                    changed = True
+
+    # ── contributions ──
+
+    def _walk(self, node, ctx, store: bool = False):
+        k = node[0]
+        if k == 'seq':
+            inits = {}
+            for s in node[2]:
+                if s[0] == 'loop':
+                    self._walk_loop(s, ctx, inits)
+                else:
+                    self._walk(s, ctx)
+                if s[0] == 'set' and s[3][0] == 'var':
+                    inits[s[3][2]] = s[4] if s[2] == '=' else None
+        elif k == 'set':
+            op, tgt, val = node[2], node[3], node[4]
+            self._walk(val, ctx)
+            expr = val if op == '=' else ('bin', node[1], op[:-1], tgt, val)
+            tgt = _single(tgt)
+            if tgt[0] == 'var':
+                name = tgt[2]
+                self.contribs.append((name, expr, ctx))
+                if name in self.pointers:
+                    if op == '=':
+                        rest = self._split(val)[1]
+                        off = _sum(rest, node[1])
+                    else:
+                        off = ('bin', node[1], op[:-1], ('var', node[1], '&' + name), val)
+                    self.contribs.append(('&' + name, off, ctx))
+            elif tgt[0] == 'idx':
+                self._walk(tgt[2], ctx)
+                self._walk(tgt[3], ctx)
+                self._access(tgt[2], tgt[3], None, ctx, tgt[1], 'w', expr)
+        elif k == 'idx':
+            self._walk(node[2], ctx)
+            self._walk(node[3], ctx)
+            self._access(node[2], node[3], None, ctx, node[1], 'r')
+        elif k == 'cond':
+            self._walk(node[2], ctx)
+            self._walk(node[3], _guard(ctx, node[2], True))
+            if node[4] is not None:
+                self._walk(node[4], _guard(ctx, node[2], False))
+        elif k == 'bin':
+            self._walk(node[3], ctx)
+            if node[2] == '&&':
+                self._walk(node[4], _guard(ctx, node[3], True))
+            elif node[2] == '||':
+                self._walk(node[4], _guard(ctx, node[3], False))
+            else:
+                self._walk(node[4], ctx)
+        elif k == 'un':
+            self._walk(node[3], ctx)
+        elif k == 'loop':
+            self._walk_loop(node, ctx, {})
+        elif k == 'while':
+            self._walk(node[2], ctx)
+            if node[3] is not None:
+                self._walk(node[3], ctx)
+        elif k == 'call':
+            self._walk_call(node, ctx)
+
+    def _walk_loop(self, node, ctx, inits):
+        self._walk(node[2], ctx)
+        body = node[3]
+        over = dict(ctx[1])
+        count = _single(node[2])
+        span = inits.get(count[2]) if count[0] == 'var' else None
+        for s in (body[2] if body[0] == 'seq' else [body]):
+            if s[0] == 'set' and s[2] in ('+=', '-=') and s[3][0] == 'var':
+                name = s[3][2]
+                step = self._const_eval(s[4])
+                if step and inits.get(name) is not None:
+                    over[name] = ('ctr', s[1], inits[name], step if s[2] == '+=' else -step, node[2],
+                                  span or node[2])
+        self._walk(body, (ctx[0], over))
+
+    def _walk_call(self, node, ctx):
+        name, args = node[2], node[3]
+        for a in args:
+            self._walk(a, ctx)
+        if name == 'midirecv':
+            ranges = _MIDIRECV_4 if len(args) == 4 else _MIDIRECV_3
+            for a, r in zip(args, ranges):
+                v = _single(a)
+                if v[0] == 'var':
+                    self.contribs.append((v[2], ('range', node[1], r), ctx))
+        elif name in ('midirecv_buf', 'midirecv_str'):
+            for a in args[:1]:
+                v = _single(a)
+                if v[0] == 'var':
+                    self.contribs.append((v[2], ('range', node[1], _MIDIRECV_3[0]), ctx))
+        elif name == 'memcpy' and len(args) == 3:
+            self._access(args[0], ('num', node[1], 0), args[2], ctx, node[1], 'w',
+                         ('range', node[1], UNKNOWN))
+            self._access(args[1], ('num', node[1], 0), args[2], ctx, node[1], 'r')
+        elif _MEM_LEN.get(name) and len(args) > _MEM_LEN[name][1]:
+            base, length = _MEM_LEN[name]
+            kind = 'w' if name in ('memset', 'midirecv_buf') else 'r'
+            value = args[1] if name == 'memset' else ('range', node[1], Range(0, 255, True, 0xFF))
+            self._access(args[base], ('num', node[1], 0), args[length], ctx, node[1], kind,
+                         value if kind == 'w' else None)
+        fn = self.src.functions.get(name)
+        if fn:
+            for p, a in zip(fn.params, args):
+                self.contribs.append((p, a, ctx))
+
+    def _access(self, base, index, length, ctx, line, kind, value=None):
+        split = self._split(base)
+        if split:
+            root, rest = split
+            self.accesses.append((root, _sum(rest + [index], line), length, ctx, line, kind))
+            if value is not None:
+                self.contribs.append((f"[{root}]", value, ctx))
+        else:
+            self.accesses.append((None, ('bin', line, '+', base, index), length, ctx, line, kind))
+
+    # ── evaluation ──
+
+    def eval(self, n, ctx) -> Optional[Range]:
+        k = n[0]
+        if k == 'num':
+            return const_range(n[2])
+        if k == 'var':
+            return self._var(n[2], ctx)
+        if k == 'seq':
+            return self.eval(n[2][-1], ctx) if n[2] else ZERO
+        if k == 'range':
+            return n[2]
+        if k == 'ctr':
+            start, count = self.eval(n[2], ctx), self.eval(n[4], ctx)
+            if start is None or count is None:
+                return None
+            end = _span_end(n[2], n[5]) if n[3] == 1 else None
+            if end is not None:                     # i = a; loop(b - a + 1, ...; i += 1)
+                e = self.eval(end[0], ctx)
+                if e is not None:
+                    return Range(start.lo, max(start.hi, e.hi - end[1]), start.integral)
+            last = max(count.hi, 1) - 1
+            ends = (start.lo, start.hi + n[3] * last) if n[3] > 0 else (start.lo + n[3] * last, start.hi)
+            return Range(min(ends), max(ends), start.integral)
+        if k == 'idx':
+            split = self._split(n[2])
+            return self.ranges.get(f"[{split[0]}]", ZERO) if split else UNKNOWN
+        if k == 'un':
+            x = self.eval(n[3], ctx)
+            if x is None:
+                return None
+            if n[2] == '-':
+                return Range(-x.hi, -x.lo, x.integral)
+            return BOOL if n[2] == '!' else x
+        if k == 'bin':
+            a = self.eval(n[3], ctx)
+            b = self.eval(n[4], ctx)
+            if a is None or b is None:
+                return BOOL if n[2] in ('&&', '||') else None
+            return arith(n[2], a, b)
+        if k == 'cond':
+            a = self.eval(n[3], _guard(ctx, n[2], True))
+            b = self.eval(n[4], _guard(ctx, n[2], False)) if n[4] is not None else ZERO
+            return union(a, b)
+        if k == 'set':
+            expr = n[4] if n[2] == '=' else ('bin', n[1], n[2][:-1], n[3], n[4])
+            return self.eval(expr, ctx)
+        if k == 'call':
+            name, args = n[2], n[3]
+            if name in ('min', 'max') and len(args) == 2:
+                a, b = self.eval(args[0], ctx), self.eval(args[1], ctx)
+                if a is None or b is None:
+                    return None
+                f = min if name == 'min' else max
+                return Range(f(a.lo, b.lo), f(a.hi, b.hi), a.integral and b.integral)
+            if name == 'abs' and args:
+                a = self.eval(args[0], ctx)
+                if a is None:
+                    return None
+                lo = 0 if a.lo <= 0 <= a.hi else min(abs(a.lo), abs(a.hi))
+                return Range(lo, max(abs(a.lo), abs(a.hi)), a.integral)
+            if name in ('floor', 'ceil') and args:
+                a = self.eval(args[0], ctx)
+                return None if a is None else Range(math.floor(a.lo) if a.lo > -INF else a.lo,
+                                                    math.ceil(a.hi) if a.hi < INF else a.hi, True)
+            if name == 'slider':
+                out = None
+                for lo, hi, integral, _ in self.src.sliders.values():
+                    out = union(out, Range(lo, hi, integral))
+                return out or UNKNOWN
+            if name in ('midirecv', 'midisend', 'midisend_buf'):
+                return BOOL if name == 'midirecv' else UNKNOWN
+            if name in self.src.functions:
+                return self.ranges.get(f"{name}()", UNKNOWN)
+            return UNKNOWN
+        return UNKNOWN
+
+    def _var(self, name, ctx) -> Optional[Range]:
+        guards, over = ctx
+        if name in over:
+            inner = dict(over)
+            del inner[name]
+            r = self.eval(over[name], (guards, inner))
+        elif name in self.consts:
+            r = const_range(self.consts[name])
+        elif name in self.ranges:
+            r = self.ranges[name]
+        elif name in _HOST:
+            r = _HOST[name]
+        elif name.startswith('slider') and name[6:].isdigit() and int(name[6:]) in self.src.sliders:
+            lo, hi, integral, _ = self.src.sliders[int(name[6:])]
+            r = Range(lo, hi, integral)
+        elif self._implicit(name):
+            r = ZERO
+        else:
+            r = UNKNOWN
+        for cond, pol in guards:
+            for op, a, b in _atoms(cond, pol):
+                a, b = _single(a), _single(b)
+                if a[0] == 'var' and a[2] == name:
+                    e = self.eval(b, ((), over))
+                elif b[0] == 'var' and b[2] == name:
+                    op, e = _FLIP[op], self.eval(a, ((), over))
+                else:
+                    continue
+                if e is not None and r is not None:
+                    r = narrow(r, op, e)
+        return r
+
+    def _thresholds(self) -> List[float]:
+        """Widening stops: every literal and constant c of the plugin, and
+        c - 1, so a `% N` ring index settles at N - 1 instead of inf."""
+        found = set(self.consts.values())
+
+        def visit(n):
+            if n[0] == 'num':
+                found.add(n[2])
+
+        for _, body in self._bodies():
+            self._walk_all(body, visit)
+        found |= {v - 1 for v in found}
+        return sorted(found | {-v for v in found})
+
+    def _solve(self):
+        """Least fixpoint of all assignments (every variable starts at 0).
+        Bounds still growing after WIDEN_AFTER rounds jump to the next
+        threshold, and to ±inf past the last one or after MAX_ROUNDS.
+        Widening can overshoot a value derived from one that settles later
+        (base = B + head * 6 jumps before head stops at 9), so up to
+        NARROW_ROUNDS descending rounds then re-evaluate every assignment
+        from the settled ranges and keep the tighter bounds."""
+        targets = {t for t, _, _ in self.contribs}
+        self.ranges: Dict[str, Range] = {t: ZERO for t in targets}
+        stops = self._thresholds()
+
+        def step():
+            new = {t: ZERO for t in targets}
+            for target, expr, ctx in self.contribs:
+                r = self.eval(expr, ctx)
+                if r is not None:
+                    new[target] = union(new[target], r)
+            return new
+
+        for rnd in range(MAX_ROUNDS + 1):
+            new = step()
+            changed = False
+            for t, r in new.items():
+                old = self.ranges[t]
+                r = union(old, r)
+                if r.key() != old.key():
+                    changed = True
+                    if rnd == MAX_ROUNDS:
+                        r = Range(-INF if r.lo < old.lo else r.lo, INF if r.hi > old.hi else r.hi,
+                                  r.integral, None)
+                    elif rnd >= WIDEN_AFTER:
+                        lo = r.lo if r.lo >= old.lo else max((v for v in stops if v <= r.lo),
+                                                             default=-INF)
+                        hi = r.hi if r.hi <= old.hi else min((v for v in stops if v >= r.hi),
+                                                             default=INF)
+                        r = Range(lo, hi, r.integral, r.bits)
+                    self.ranges[t] = r
+            if not changed:
+                break
+
+        for _ in range(NARROW_ROUNDS):
+            changed = False
+            for t, r in step().items():
+                old = self.ranges[t]
+                lo, hi = max(old.lo, r.lo), min(old.hi, r.hi)
+                if (lo, hi) != (old.lo, old.hi) and lo <= hi:
+                    self.ranges[t] = Range(lo, hi, old.integral, old.bits)
+                    changed = True
+            if not changed:
+                break
+
+    # ── memory layout ──
+
+    def _layout(self):
+        regions: Dict[str, Region] = {}
+        for root, offset, length, ctx, line, kind in self.accesses:
+            if root is None:
+                addr = self.eval(offset, ctx)
+                if addr is not None and not addr.finite:
+                    self.findings.append(('unbounded', line,
+                                          "memory access through an untracked pointer"))
+                continue
+            reg = regions.get(root)
+            if reg is None:
+                names = [root] + sorted(n for n, a in self.alias.items() if a == root)
+                reg = regions[root] = Region(root, names, self._implicit(root))
+            off = self.eval(offset, ctx)
+            if off is None:
+                continue                            # unreachable under its guards
+            base = self.consts.get(root, 0)
+            hi = off.hi
+            if length is not None:
+                n = self.eval(length, ctx)
+                hi += (n.hi if n is not None else INF) - 1
+            reg.lo = min(reg.lo, base + off.lo)
+            reg.hi = max(reg.hi, base + hi)
+            reg.lines.add(line)
+            reg.writes |= kind == 'w'
+        self.regions = sorted((r for r in regions.values() if r.lines), key=lambda r: (r.lo, r.hi))
+
+        for reg in self.regions:
+            first = min(reg.lines)
+            if reg.implicit:
+                self.findings.append(('base', first, f"{reg.label} is used as a memory base "
+                                      f"but never assigned, so it points at 0"))
+            if reg.hi == INF or reg.lo == -INF:
+                self.findings.append(('unbounded', first, f"{reg.label}: index range "
+                                      f"{_span(reg)} is not bounded"))
+            elif reg.lo < 0:
+                self.findings.append(('negative', first, f"{reg.label}: index can reach "
+                                      f"{_num(reg.lo)}"))
+            for a, b in self.src.doc_ranges:
+                if reg.lo == a and reg.hi > b:
+                    self.findings.append(('layout', first, f"{reg.label} is documented as "
+                                          f"{a}..{b} but is accessed at {_span(reg)}"))
+        for i, a in enumerate(self.regions):
+            for b in self.regions[i + 1:]:
+                if b.lo > a.hi:
+                    continue
+                lo, hi = max(a.lo, b.lo), min(a.hi, b.hi)
+                self.findings.append(('overlap', min(a.lines | b.lines),
+                                      f"{a.label} {_span(a)} overlaps {b.label} {_span(b)} "
+                                      f"at {_bound(lo)}..{_bound(hi)} (lines "
+                                      f"{_lines(a.lines)} / {_lines(b.lines)})"))
+
+    # ── cost ──
+
+    def _costs(self):
+        self.per_event = (0, 0)
+        self._big_loops: Dict[int, tuple] = {}
+        self._in_event = False
+        self._stack: List[str] = []
+        block = self.src.sections.get('block')
+        sample = self.src.sections.get('sample')
+        self.per_block = self.cost(block) if block else (0, 0)
+        self.per_sample = self.cost(sample) if sample else (0, 0)
+        for line, (count, where) in sorted(self._big_loops.items()):
+            self.findings.append(('scan', line, f"loop of {_num(count)} iterations runs per "
+                                  f"MIDI event{where}"))
+        for name, body in self._bodies():
+            if name in ('block', 'sample', 'slider'):
+                self._unrolled(body)
+
+    def cost(self, n) -> Tuple[float, float]:
+        """Worst-case (operations, midisends) of evaluating n once."""
+        if n is None:
+            return (0, 0)
+        k = n[0]
+        if k in ('num', 'str', 'var', 'func'):
+            return (0, 0)
+        if k == 'seq':
+            return _add(*(self.cost(s) for s in n[2])) if n[2] else (0, 0)
+        if k == 'idx':
+            return _add((1, 0), self.cost(n[2]), self.cost(n[3]))
+        if k == 'un':
+            return _add((1, 0), self.cost(n[3]))
+        if k == 'bin':
+            return _add((1, 0), self.cost(n[3]), self.cost(n[4]))
+        if k == 'cond':
+            a, b = self.cost(n[3]), self.cost(n[4])
+            return _add((1, 0), self.cost(n[2]), (max(a[0], b[0]), max(a[1], b[1])))
+        if k == 'set':
+            return _add((1, 0), self.cost(n[3]) if n[3][0] == 'idx' else (0, 0), self.cost(n[4]))
+        if k == 'loop':
+            count = self.eval(n[2], ((), {}))
+            trips = max(count.hi, 0) if count is not None else INF
+            if trips == INF:
+                self.findings.append(('unbounded', n[1], "loop count is not bounded"))
+            if self._in_event and trips >= LOOP_WARN:
+                where = f" (in {self._stack[-1]}())" if self._stack else ''
+                self._big_loops.setdefault(n[1], (trips, where))
+            body = self.cost(n[3])
+            return _add(self.cost(n[2]), (_mul(trips, body[0]), _mul(trips, body[1])))
+        if k == 'while':
+            if _calls(n[2], 'midirecv'):
+                outer, self._in_event = self._in_event, True
+                once = _add(self.cost(n[2]), self.cost(n[3]))
+                self._in_event = outer
+                self.per_event = (max(self.per_event[0], once[0]), max(self.per_event[1], once[1]))
+                return (1, 0)                       # the midirecv that ends the loop
+            self.findings.append(('unbounded', n[1], "while loop with no bound"))
+            return (INF, INF)
+        if k == 'call':
+            total = _add((1, 1 if n[2] in _SEND else 0), *(self.cost(a) for a in n[3]))
+            fn = self.src.functions.get(n[2])
+            if fn and fn.name not in self._stack:
+                self._stack.append(fn.name)
+                total = _add(total, self.cost(fn.body))
+                self._stack.pop()
+            return total
+        return (0, 0)
+
+    def _unrolled(self, body):
+        def visit(n):
+            if n[0] != 'seq':
+                return
+            run = [n[2][0]] if n[2] else []
+            for s in n[2][1:] + [None]:
+                if s is not None and _shape(s) == _shape(run[-1]) and '#' in _shape(s):
+                    run.append(s)
+                    continue
+                if len(run) >= UNROLL_MIN:
+                    a, b = _names(run[0]), _names(run[-1])
+                    pair = next(((x, y) for x, y in zip(a, b) if x != y), None)
+                    what = f"{pair[0]}..{pair[1]}" if pair else 'statements'
+                    self.findings.append(('unrolled', run[0][1], f"{len(run)} unrolled "
+                                          f"{what} statements (lines {run[0][1]}-{run[-1][1]}): "
+                                          f"a linear scan per pass"))
+                run = [s]
+        self._walk_all(body, visit)
+
+    # ── report ──
+
+    def totals(self, events: int, block_len: int) -> float:
+        return (self.per_block[0] + events * self.per_event[0] + block_len * self.per_sample[0])
+
+    def to_json(self, events: int, block_len: int) -> dict:
+        return {
+            'plugin': self.src.name,
+            'regions': [r.to_json() for r in self.regions],
+            'ops_per_event': _num(self.per_event[0]), 'sends_per_event': _num(self.per_event[1]),
+            'ops_per_block_fixed': _num(self.per_block[0]),
+            'ops_per_sample': _num(self.per_sample[0]),
+            'ops_per_block': _num(self.totals(events, block_len)),
+            'findings': [{'kind': k, 'line': l, 'message': m}
+                         for k, l, m in sorted(self.findings, key=lambda f: f[1])],
+        }
+
+
+def _single(n):
+    while n[0] == 'seq' and len(n[2]) == 1:
+        n = n[2][0]
+    return n
+
+
+def _sum(terms, line):
+    if not terms:
+        return ('num', line, 0)
+    out = terms[0]
+    for t in terms[1:]:
+        out = ('bin', line, '+', out, t)
+    return out
+
+
+def _same(a, b) -> bool:
+    """Structural equality of two nodes, ignoring line numbers."""
+    if isinstance(a, tuple) and isinstance(b, tuple):
+        return len(a) == len(b) and a[0] == b[0] and all(_same(x, y) for x, y in zip(a[2:], b[2:]))
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def _span_end(start, count):
+    """(b, k) when count is `b - start + 1 - k`: the counter ends at b - k."""
+    count = _single(count)
+    k = 0
+    if count[0] == 'bin' and count[2] in '+-' and _single(count[4])[0] == 'num':
+        k = -_single(count[4])[2] if count[2] == '+' else _single(count[4])[2]
+        count = _single(count[3])
+    if count[0] == 'bin' and count[2] == '-' and _same(_single(count[4]), _single(start)):
+        return count[3], k + 1
+    return None
+
+
+def _guard(ctx, cond, pol):
+    return (ctx[0] + ((cond, pol),), ctx[1])
+
+
+def _add(*costs):
+    return (sum(c[0] for c in costs), sum(c[1] for c in costs))
+
+
+def _calls(node, name) -> bool:
+    if not isinstance(node, tuple):
+        return False
+    if node[0] == 'call' and node[2] == name:
+        return True
+    return any(_calls(c, name) for c in node[2:] if isinstance(c, tuple)) or \
+        any(_calls(c, name) for c in node[2:] if isinstance(c, list) for c in c)
+
+
+def _shape(n) -> str:
+    if not isinstance(n, tuple):
+        return repr(n) if not isinstance(n, list) else '[' + ','.join(map(_shape, n)) + ']'
+    k = n[0]
+    if k == 'num':
+        return 'N'
+    if k == 'var':
+        return re.sub(r'\d+', '#', n[2])
+    return k + '(' + ','.join(_shape(c) for c in n[2:]) + ')'
+
+
+def _names(n) -> List[str]:
+    out = []
+    if isinstance(n, list):
+        for c in n:
+            out += _names(c)
+    elif isinstance(n, tuple):
+        if n[0] == 'var':
+            return [n[2]]
+        for c in n[2:]:
+            out += _names(c)
+    return out
+
+
+def _bound(v) -> str:
+    return str(_num(v)) if abs(v) < INF else ('inf' if v > 0 else '-inf')
+
+
+def _span(r: Region) -> str:
+    return f"{_bound(r.lo)}..{_bound(r.hi)}"
+
+
+def _lines(lines) -> str:
+    lines = sorted(lines)
+    return ', '.join(map(str, lines[:4])) + (', …' if len(lines) > 4 else '')
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Report
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _fmt(v) -> str:
+    return '∞' if v == INF else f"{v:,.0f}"
+
+
+def format_table(audits: List[Audit], events: int, block_len: int, layout: bool) -> str:
+    lines = [f"{'plugin':<32} {'regions':>7} {'top':>5} {'overlap':>7} {'ops/event':>9} "
+             f"{'sends/ev':>8} {'ops/block':>9} {'ops/smp':>7} {'@load':>10}",
+             f"{'':<32} {'':>7} {'':>5} {'':>7} {'':>9} {'':>8} {'fixed':>9} {'':>7} "
+             f"{f'{events}ev/{block_len}':>10}"]
+    for a in audits:
+        top = max((r.hi for r in a.regions), default=-1)
+        overlaps = sum(1 for f in a.findings if f[0] == 'overlap')
+        lines.append(f"{a.src.name[:32]:<32} {len(a.regions):>7} "
+                     f"{_fmt(top) if top >= 0 else '-':>5} {overlaps:>7} "
+                     f"{_fmt(a.per_event[0]):>9} {_fmt(a.per_event[1]):>8} "
+                     f"{_fmt(a.per_block[0]):>9} {_fmt(a.per_sample[0]):>7} "
+                     f"{_fmt(a.totals(events, block_len)):>10}")
+    for a in audits:
+        if not (a.findings or layout):
+            continue
+        lines.append('')
+        lines.append(a.src.name)
+        if layout:
+            for r in a.regions:
+                lines.append(f"  {_span(r):>12}  {r.label:<28} {'rw' if r.writes else 'r ':<3} "
+                             f"lines {_lines(r.lines)}")
+        for kind, line, msg in sorted(a.findings, key=lambda f: (f[1], f[0])):
+            lines.append(f"  {kind:<9} {f'line {line}' if line else '':<9} {msg}")
+    return '\n'.join(lines)
+
+
+def find_jsfx(paths: List[str]) -> List[str]:
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            out += sorted(glob.glob(os.path.join(p, '*.jsfx')))
+        else:
+            out.append(p)
+    return [p for p in out if not os.path.basename(p).startswith('._')]   # macOS resource forks
+
+
+# (name, source, {region label: (lo, hi)}) the analysis must reproduce exactly
+SELF_TESTS = [
+    ('ring buffer next to a table', """desc: ring
+@init
+LOG_BASE = 660;
+TABLE = 720;
+@block
+while (midirecv(ofs, m1, m2, m3)) (
+  base = LOG_BASE + log_head * 6;
+  base[0] = m1; base[5] = ofs;
+  log_head = (log_head + 1) % 10;
+  TABLE[m2 & 15] = m3;
+);
+""", {'LOG_BASE': (660, 719), 'TABLE': (720, 735)}),
+]
+
+
+def self_test() -> int:
+    failed = 0
+    for name, text, want in SELF_TESTS:
+        audit = Audit(JSFXSource(name + '.jsfx', text))
+        got = {r.label: (r.lo, r.hi) for r in audit.regions}
+        bad = [k for k, _, _ in audit.findings if k in ('overlap', 'unbounded', 'parse')]
+        ok = got == want and not bad
+        failed += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name}" +
+              ('' if ok else f": regions {got}, findings {bad}"))
+    return 1 if failed else 0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    ap.add_argument('paths', nargs='*', help=".jsfx files or directories (default: this "
+                                             "script's directory)")
+    ap.add_argument('--events', type=int, default=128,
+                    help="MIDI events per block for the @load column (default: %(default)s)")
+    ap.add_argument('--block-len', type=int, default=512,
+                    help="samples per block for the @load column (default: %(default)s)")
+    ap.add_argument('--layout', action='store_true', help="list every plugin's memory regions")
+    ap.add_argument('--json', metavar='PATH', help="write the full report as JSON ('-' = stdout)")
+    ap.add_argument('--check', action='store_true',
+                    help="exit with status 1 if any region overlaps or is unbounded")
+    ap.add_argument('--self-test', action='store_true',
+                    help="audit the built-in known cases and exit")
+    a = ap.parse_args(argv)
+    if a.self_test:
+        return self_test()
+
+    paths = find_jsfx(a.paths or [os.path.dirname(os.path.abspath(__file__))])
+    if not paths:
+        print("No .jsfx files found.", file=sys.stderr)
+        return 1
+    audits = [Audit(JSFXSource(p)) for p in paths]
+    if a.json:
+        report = [x.to_json(a.events, a.block_len) for x in audits]
+        if a.json == '-':
+            json.dump(report, sys.stdout, indent=1)
+        else:
+            with open(a.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=1)
+    else:
+        print(format_table(audits, a.events, a.block_len, a.layout))
+    bad = any(k in ('overlap', 'unbounded', 'parse') for x in audits for k, _, _ in x.findings)
+    return 1 if a.check and bad else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
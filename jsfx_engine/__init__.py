@@ -0,0 +1,19 @@
+"""
+Headless reference engines for the rig's JSFX MIDI chain.
+
+Each engine models one plugin's @slider/@block behaviour over NumPy event
+arrays (see events.EVENT_DTYPE), so a block of input can be run through
+channel_midi_routing → split_channel_per_note → midi_note_shift →
+midi_cc_mapper → midi_input_quantizer without REAPER:
+
+    from jsfx_engine import Chain, ChannelRouter, NoteShift, make_events
+    chain = Chain(ChannelRouter(enable1=1, in1=1, out1=3), NoteShift(shift=12))
+    out = chain.process_block(make_events([0, 64], 0x90, [60, 62], 100))
+
+bench_jsfx_engine.py measures throughput and per-block work.
+"""
+
+from .events import (EVENT_DTYPE, NOTE_OFF, NOTE_ON, CC, Transport,
+                     make_events, empty_events, note_flags, iter_blocks)
+from .plugins import (JSFXEngine, ChannelRouter, DualRegionFilter, NoteShift,
+                      CCMapper, BeatQuantizer, Chain, ENGINES)
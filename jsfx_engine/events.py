@@ -0,0 +1,76 @@
+"""
+MIDI event arrays and transport state shared by the plugin engines.
+
+A block's events are one structured array in the order midirecv() returns
+them: sample offset within the block plus the three message bytes (msg23
+of the JSFX API is msg2 | msg3 << 8).
+"""
+
+from typing import Iterator, Tuple
+
+import numpy as np
+
+EVENT_DTYPE = np.dtype([('offset', '<i4'), ('msg1', 'u1'), ('msg2', 'u1'), ('msg3', 'u1')])
+
+NOTE_OFF = 0x80
+NOTE_ON  = 0x90
+CC       = 0xB0
+
+
+def make_events(offset, msg1, msg2, msg3) -> np.ndarray:
+    """Event array from equal-length columns (scalars broadcast)."""
+    offset, msg1, msg2, msg3 = np.broadcast_arrays(offset, msg1, msg2, msg3)
+    ev = np.empty(offset.shape[0] if offset.ndim else 1, EVENT_DTYPE)
+    ev['offset'] = offset
+    ev['msg1'] = msg1
+    ev['msg2'] = msg2
+    ev['msg3'] = msg3
+    return ev
+
+
+def empty_events() -> np.ndarray:
+    return np.empty(0, EVENT_DTYPE)
+
+
+def note_flags(ev: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(status, channel, is_note_on, is_note_off) as the plugins compute them."""
+    status = ev['msg1'] & 0xF0
+    ch = ev['msg1'] & 0x0F
+    on = (status == NOTE_ON) & (ev['msg3'] > 0)
+    off = (status == NOTE_OFF) | ((status == NOTE_ON) & (ev['msg3'] == 0))
+    return status, ch, on, off
+
+
+def iter_blocks(time: np.ndarray, events: np.ndarray,
+                block_len: int) -> Iterator[np.ndarray]:
+    """
+    Split events stamped with absolute sample times (sorted) into
+    consecutive blocks of block_len samples with block-relative offsets.
+    Empty blocks are yielded too, so block i always covers
+    [i * block_len, (i + 1) * block_len).
+    """
+    if not len(time):
+        return
+    n_blocks = int(time[-1]) // block_len + 1
+    bounds = np.searchsorted(time, np.arange(n_blocks + 1) * block_len)
+    for b in range(n_blocks):
+        ev = events[bounds[b]:bounds[b + 1]].copy()
+        ev['offset'] = time[bounds[b]:bounds[b + 1]] - b * block_len
+        yield ev
+
+
+class Transport:
+    """The @block transport variables (tempo, play_state, beat_position)."""
+    __slots__ = ('tempo', 'play_state', 'beat_position', 'srate')
+
+    def __init__(self, tempo: float = 120.0, play_state: int = 1,
+                 beat_position: float = 0.0, srate: float = 48000.0):
+        self.tempo = tempo
+        self.play_state = play_state
+        self.beat_position = beat_position
+        self.srate = srate
+
+    def advance(self, samples: int):
+        """Move the play position on by one block of samples."""
+        if self.play_state:
+            self.beat_position += samples / self.srate * self.tempo / 60.0
@@ -0,0 +1,506 @@
+"""
+Block processors for the JSFX plugins of the live rig.
+
+Each class models one .jsfx file: its sliders, the state its @init/@slider
+sections keep, and what one @block call sends for the events it receives.
+Event classification, remapping and output assembly are NumPy array
+operations over the whole block; only the order-dependent parts that the
+plugin itself runs as a state machine (the beat quantizer's pedal logic)
+loop in Python, and then only over the events that reach them.
+
+Display-only state (event logs, "last note" readouts) is not modelled
+beyond what later processing reads.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .events import CC, EVENT_DTYPE, NOTE_OFF, NOTE_ON, Transport, make_events, note_flags
+
+
+class JSFXEngine:
+    """
+    One plugin instance.  SLIDERS lists (name, default) in slider order;
+    set() changes sliders as @slider would, and Note Offs that @slider
+    flushes go out at offset 0 ahead of the next block's output.
+
+    work counts the handler steps of the last block: one per received
+    event, one per midisend and one per iteration of the plugin's internal
+    loops.  It is the per-block cost model the benchmark reports.
+    """
+    NAME = ''
+    SLIDERS: Tuple[Tuple[str, int], ...] = ()
+
+    def __init__(self, **sliders):
+        self.slider: Dict[str, int] = {name: default for name, default in self.SLIDERS}
+        self.work = 0
+        self._pending: List[np.ndarray] = []
+        self._init()
+        self.set(**sliders)
+
+    def set(self, **sliders):
+        for name, value in sliders.items():
+            if name not in self.slider:
+                raise KeyError(f"{self.NAME} has no slider {name!r}")
+            self.slider[name] = int(value)
+        flushed = self._on_slider()
+        if flushed is not None and len(flushed):
+            self._pending.append(flushed)
+
+    def process_block(self, ev: np.ndarray,
+                      transport: Optional[Transport] = None) -> np.ndarray:
+        """Run @block over one block's events; returns the events sent."""
+        self.work = len(ev)
+        out = self._block(ev, transport)
+        self.work += len(out)
+        if self._pending:
+            out = np.concatenate(self._pending + [out])
+            self._pending = []
+        return out
+
+    def _init(self):
+        pass
+
+    def _on_slider(self) -> Optional[np.ndarray]:
+        return None
+
+    def _block(self, ev: np.ndarray, transport: Optional[Transport]) -> np.ndarray:
+        raise NotImplementedError
+
+
+def _select(ev: np.ndarray, emit: np.ndarray, msg1, msg2, msg3) -> np.ndarray:
+    """Rewritten events ev[emit] with the given message bytes."""
+    out = np.empty(int(np.count_nonzero(emit)), EVENT_DTYPE)
+    out['offset'] = ev['offset'][emit]
+    out['msg1'] = np.asarray(msg1)[emit]
+    out['msg2'] = np.asarray(msg2)[emit]
+    out['msg3'] = np.asarray(msg3)[emit]
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  channel_midi_routing.jsfx
+# ═══════════════════════════════════════════════════════════════════════════
+
+class ChannelRouter(JSFXEngine):
+    """MIDI 4 Channel Router: the first enabled slot whose input channel
+    matches rewrites the channel; everything else passes through."""
+    NAME = 'channel_midi_routing'
+    SLIDERS = tuple((f'{field}{k}', default)
+                    for k in range(1, 5)
+                    for field, default in (('enable', 0), ('in', k), ('out', k)))
+
+    def _init(self):
+        self.last_note = np.full(4, -1)
+        self.last_vel = np.zeros(4, int)
+        self.active = np.zeros(4, bool)
+        self.routed = np.zeros(4, int)
+        self.out_ch = np.full(4, -1)
+
+    def _on_slider(self):
+        # Release held notes on the channel they were routed to
+        held = np.flatnonzero(self.active & (self.last_note >= 0))
+        flushed = make_events(0, NOTE_OFF | self.out_ch[held], self.last_note[held], 64)
+        self.active[:] = False
+        self.last_note[:] = -1
+
+        s = self.slider
+        en = [s[f'enable{k}'] for k in range(1, 5)]
+        self._in = [s[f'in{k}'] - 1 for k in range(1, 5)]
+        out = [s[f'out{k}'] - 1 for k in range(1, 5)]
+        # Per input channel: matching slot (first enabled) and the first
+        # slot listening on it at all (passthrough Note Offs clear that one)
+        self._slot_of = np.full(16, -1)
+        self._first_in = np.full(16, -1)
+        self._out_of = np.arange(16)
+        for k in reversed(range(4)):
+            if 0 <= self._in[k] < 16:
+                self._first_in[self._in[k]] = k
+                if en[k]:
+                    self._slot_of[self._in[k]] = k
+                    self._out_of[self._in[k]] = out[k]
+        self._out = out
+        return flushed
+
+    def _block(self, ev, transport):
+        status, ch, on, off = note_flags(ev)
+        slot = self._slot_of[ch]
+        matched = slot >= 0
+        msg1 = np.where(matched, status | self._out_of[ch], ev['msg1'])
+
+        notes = on | off
+        first_in = self._first_in[ch]
+        for k in range(4):
+            last = -1
+            hit = np.flatnonzero((slot == k) & notes)
+            if hit.size:
+                self.routed[k] += int(np.count_nonzero(on[hit]))
+                last = hit[-1]
+                if on[last]:
+                    self.last_note[k] = ev['msg2'][last]
+                    self.last_vel[k] = ev['msg3'][last]
+                    self.active[k] = True
+                    self.out_ch[k] = self._out[k]
+                else:
+                    self.active[k] = False
+                    self.last_note[k] = -1
+            cleared = np.flatnonzero(~matched & off & (first_in == k))
+            if cleared.size and cleared[-1] > last:
+                self.active[k] = False
+        return _select(ev, np.ones(len(ev), bool), msg1, ev['msg2'], ev['msg3'])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  split_channel_per_note.jsfx
+# ═══════════════════════════════════════════════════════════════════════════
+
+class DualRegionFilter(JSFXEngine):
+    """
+    MIDI Dual Region Filter: two channel + note-range regions with their
+    own pitch shift feed one output channel.  note_region/note_shifted
+    remember how each sounding note was routed so its Note Off follows.
+    """
+    NAME = 'split_channel_per_note'
+    SLIDERS = (('a_in_ch', 1), ('a_low', 36), ('a_high', 60), ('a_shift', 0),
+               ('b_in_ch', 2), ('b_low', 48), ('b_high', 84), ('b_shift', 0),
+               ('out_ch', 1), ('overlap', 0), ('other', 0))
+
+    def _init(self):
+        self.note_region = np.zeros(128, np.int8)     # 0 free, 1 A, 2 B, 3 both
+        self.note_shifted = np.zeros(128, np.int16)
+        self.a_blocked = 0
+        self.b_blocked = 0
+        self._out_ch = 0
+
+    def _on_slider(self):
+        live = np.flatnonzero(self.note_region > 0)
+        flushed = make_events(0, NOTE_OFF | self._out_ch, self.note_shifted[live], 0)
+        self.note_region[:] = 0
+        self.note_shifted[:] = 0
+
+        s = self.slider
+        self._a_in, self._b_in = s['a_in_ch'] - 1, s['b_in_ch'] - 1
+        self._a_lo, self._a_hi = sorted((s['a_low'], s['a_high']))
+        self._b_lo, self._b_hi = sorted((s['b_low'], s['b_high']))
+        self._a_shift, self._b_shift = s['a_shift'], s['b_shift']
+        self._out_ch = s['out_ch'] - 1
+        return flushed
+
+    def _block(self, ev, transport):
+        status, ch, on, off = note_flags(ev)
+        note = ev['msg2'].astype(np.int16)
+        a_in, b_in = self._a_in, self._b_in
+        range_a = (note >= self._a_lo) & (note <= self._a_hi)
+        range_b = (note >= self._b_lo) & (note <= self._b_hi)
+        in_a = (ch == a_in) & range_a
+        in_b = (ch == b_in) & range_b
+        blocked_a = range_a & (ch != a_in) & ~in_b
+        blocked_b = range_b & (ch != b_in) & ~in_a
+
+        # Note On: region it is tracked under and the note sent
+        overlap = (3, 1, 2)[min(max(self.slider['overlap'], 0), 2)]
+        region_on = np.where(in_a & in_b, overlap,
+                             np.where(in_a, 1, np.where(in_b, 2, 0))).astype(np.int8)
+        shifted_on = np.clip(note + np.where(region_on == 2, self._b_shift, self._a_shift),
+                             0, 127).astype(np.int16)
+        accepted = on & (region_on > 0)
+        rejected = on & ~accepted
+        self.a_blocked += int(np.count_nonzero(rejected & blocked_a))
+        self.b_blocked += int(np.count_nonzero(rejected & ~blocked_a & blocked_b))
+
+        msg1 = ev['msg1'].copy()
+        msg2 = ev['msg2'].copy()
+        msg3 = ev['msg3'].copy()
+        emit = accepted.copy()
+        if self.slider['other'] == 0:
+            emit |= ~(on | off)
+        msg1[accepted] = NOTE_ON | self._out_ch
+        msg2[accepted] = shifted_on[accepted]
+
+        # Note Off: grouped per note in arrival order, each run starting at
+        # an accepted Note On (or the state carried in) is one "anchor";
+        # the first Off on a matching channel releases it
+        seq = np.flatnonzero(accepted | off)
+        if seq.size:
+            idx = seq[np.argsort(note[seq], kind='stable')]
+            ns = note[idx]
+            is_on = accepted[idx]
+            new_note = np.r_[True, ns[1:] != ns[:-1]]
+            starts = np.flatnonzero(is_on | new_note)
+            run = np.cumsum(is_on | new_note) - 1
+            first = idx[starts]
+            anchor_region = np.where(is_on[starts], region_on[first],
+                                     self.note_region[ns[starts]])
+            anchor_note = np.where(is_on[starts], shifted_on[first],
+                                   self.note_shifted[ns[starts]])
+            region = anchor_region[run]
+            c = ch[idx]
+            match = ~is_on & (((region == 1) & (c == a_in)) | ((region == 2) & (c == b_in)) |
+                              ((region == 3) & ((c == a_in) | (c == b_in))))
+            before = np.cumsum(match) - match
+            before -= before[starts][run]               # matches earlier in the run
+            released = match & (before == 0)
+            region_before = np.where(before > 0, 0, region)
+
+            offs = ~is_on
+            missed = offs & ~released & (region_before > 0)
+            self.a_blocked += int(np.count_nonzero(missed & (region_before == 1)))
+            self.b_blocked += int(np.count_nonzero(missed & (region_before == 2)))
+            free = offs & (region_before == 0)
+            ba, bb = blocked_a[idx], blocked_b[idx]
+            self.a_blocked += int(np.count_nonzero(free & ba))
+            self.b_blocked += int(np.count_nonzero(free & ~ba & bb))
+
+            pos = idx[released]
+            emit[pos] = True
+            msg1[pos] = NOTE_OFF | self._out_ch
+            msg2[pos] = anchor_note[run[released]]
+            msg3[pos] = 0
+
+            # Carry out the state of each note's last run
+            groups = np.flatnonzero(new_note)
+            last = np.r_[groups[1:] - 1, len(idx) - 1]
+            ended = np.bincount(run[released], minlength=len(starts)) > 0
+            last_run = run[last]
+            keep = ~ended[last_run]
+            self.note_region[ns[last]] = np.where(keep, anchor_region[last_run], 0)
+            self.note_shifted[ns[last]] = np.where(keep, anchor_note[last_run], 0)
+        return _select(ev, emit, msg1, msg2, msg3)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  midi_note_shift.jsfx
+# ═══════════════════════════════════════════════════════════════════════════
+
+class NoteShift(JSFXEngine):
+    """MIDI Note Shift: notes move by a fixed interval and are dropped when
+    that leaves 0..127; other messages pass through."""
+    NAME = 'midi_note_shift'
+    SLIDERS = (('shift', 0),)
+
+    def _init(self):
+        self.blocked_count = 0
+
+    def _block(self, ev, transport):
+        status, ch, on, off = note_flags(ev)
+        shifted = ev['msg2'].astype(np.int16) + self.slider['shift']
+        fits = (shifted >= 0) & (shifted <= 127)
+        self.blocked_count += int(np.count_nonzero(on & ~fits))
+        emit = ((on | off) & fits) | ~(on | off)
+        msg1 = np.where(on, NOTE_ON | ch, np.where(off, NOTE_OFF | ch, ev['msg1']))
+        msg2 = np.where(on | off, shifted, ev['msg2'])
+        msg3 = np.where(off, 0, ev['msg3'])
+        return _select(ev, emit, msg1, msg2, msg3)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  midi_cc_mapper.jsfx
+# ═══════════════════════════════════════════════════════════════════════════
+
+class CCMapper(JSFXEngine):
+    """MIDI CC Mapper: the source CC is replaced by a copy for each enabled
+    target CC; everything else passes through."""
+    NAME = 'midi_cc_mapper'
+    SLIDERS = (('src_cc', 1), ('channel', 0)) + tuple(
+        (f'{field}{k}', default) for k in range(1, 5)
+        for field, default in (('cc', 1), ('enable', 0)))
+
+    def _init(self):
+        self.target_val = np.zeros(4, int)
+
+    def _on_slider(self):
+        s = self.slider
+        self._src_cc = s['src_cc']
+        self._src_ch = s['channel'] - 1                # -1 = omni
+        return None
+
+    def _block(self, ev, transport):
+        s = self.slider
+        status = ev['msg1'] & 0xF0
+        ch = ev['msg1'] & 0x0F
+        matched = (status == CC) & (ev['msg2'] == self._src_cc)
+        if self._src_ch >= 0:
+            matched &= ch == self._src_ch
+        enabled = [k for k in range(4) if s[f'enable{k+1}']]
+        targets = np.array([s[f'cc{k+1}'] for k in enabled], np.uint8)
+        self.work += 4 * int(np.count_nonzero(matched))
+
+        hits = np.flatnonzero(matched)
+        if hits.size:
+            self.target_val[enabled] = ev['msg3'][hits[-1]]
+        counts = np.where(matched, len(targets), 1)
+        rows = np.repeat(np.arange(len(ev)), counts)
+        out = ev[rows]
+        mapped = matched[rows]
+        if mapped.any():
+            k = np.arange(len(rows)) - (np.cumsum(counts) - counts)[rows]
+            out['msg1'][mapped] = CC | ch[rows][mapped]
+            out['msg2'][mapped] = targets[k[mapped]]
+        return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  midi_input_quantizer.jsfx
+# ═══════════════════════════════════════════════════════════════════════════
+
+QUEUE_SIZE = 32
+CC64_ARM_THRESH = 10
+CC64_KILL_THRESH = 5
+CC64_REARM_THRESH = 40
+
+
+class BeatQuantizer(JSFXEngine):
+    """
+    MIDI Beat Quantizer: Note Ons wait in a 32-entry queue for the next
+    grid line; Note Offs are held until then too, unless a CC64 release
+    (with arm/kill/re-arm hysteresis) kills every sounding note first.
+
+    Note Ons and Offs are applied as array updates between pedal events;
+    the CC64 state machine steps through the pedal events in order.
+    """
+    NAME = 'midi_input_quantizer'
+    SLIDERS = (('channel', 0), ('grid', 0))
+
+    def _init(self):
+        self.queue: List[Tuple[int, int, int]] = []
+        self.active_valid = np.zeros(128, np.int8)    # 0 free, 1 active, 2 off pending in queue
+        self.active_ch = np.zeros(128, np.uint8)
+        self.pending_off = np.zeros(128, bool)
+        self.generation = np.zeros(128, int)
+        self.active_count = 0
+        self.pedal_generation = 0
+        self.last_beat = -1
+        self.queued_count = 0
+        self.fired_count = 0
+        self.cc64_kills = 0
+        self.cc64_armed = False
+        self.cc64_rearm_ok = True
+
+    def _on_slider(self):
+        s = self.slider
+        self._chan = s['channel'] - 1 if s['channel'] else -1
+        self._subdiv = (1.0, 2.0, 4.0, 8.0)[min(max(s['grid'], 0), 3)]
+        return None
+
+    def _note_offs(self, notes: np.ndarray, offset: int) -> np.ndarray:
+        out = make_events(offset, NOTE_OFF | self.active_ch[notes], notes, 0)
+        self.active_valid[notes] = 0
+        self.active_ch[notes] = 0
+        self.pending_off[notes] = False
+        self.generation[notes] = 0
+        self.active_count = max(0, self.active_count - len(notes))
+        return out
+
+    def _on_beat(self) -> List[np.ndarray]:
+        # flush_pending_offs(0), then flush_queue(0)
+        self.work += 128 + len(self.queue)
+        out = []
+        if not self.cc64_armed:
+            due = np.flatnonzero((self.active_valid == 1) & self.pending_off)
+            out.append(self._note_offs(due, 0))
+        if self.queue:
+            q = np.array(self.queue)
+            out.append(make_events(0, NOTE_ON | q[:, 2], q[:, 0], q[:, 1]))
+            for note, vel, ch in self.queue:
+                pre_off = self.active_valid[note] == 2
+                if self.active_valid[note] != 1:
+                    self.active_count += 1
+                self.active_ch[note] = ch
+                self.pending_off[note] = pre_off
+                self.generation[note] = self.pedal_generation
+                self.active_valid[note] = 1
+            self.fired_count += len(self.queue)
+            self.queue = []
+        return out
+
+    def _mark_off(self, notes: np.ndarray):
+        active = self.active_valid[notes] == 1
+        self.pending_off[notes[active]] = True
+        self.active_valid[notes[~active]] = 2
+
+    def _kill_all(self, offset: int) -> np.ndarray:
+        self.work += 128
+        self.pedal_generation += 1
+        kill = np.flatnonzero((self.active_valid == 1) &
+                              (self.generation < self.pedal_generation))
+        self.active_valid[self.active_valid == 2] = 0
+        self.cc64_kills += 1
+        return self._note_offs(kill, offset)
+
+    def _block(self, ev, transport):
+        out: List[np.ndarray] = []
+        if transport is not None and transport.tempo > 0:
+            beat = int(transport.beat_position * self._subdiv)
+            if transport.play_state and beat != self.last_beat:
+                out += self._on_beat()
+                self.last_beat = beat
+            if not transport.play_state:
+                self.last_beat = -1
+
+        status, ch, on, off = note_flags(ev)
+        note = ev['msg2']
+        in_chan = (ch == self._chan) if self._chan >= 0 else np.ones(len(ev), bool)
+        q_on = on & in_chan
+        q_off = off & in_chan & ~q_on
+        pedal = (status == CC) & (note == 64) & in_chan & ~q_on & ~q_off
+        emit = ~(q_on | q_off | pedal)
+
+        ons = np.flatnonzero(q_on)
+        self.queued_count += len(ons)
+        room = QUEUE_SIZE - len(self.queue)
+        self.queue += zip(note[ons[:room]].tolist(), ev['msg3'][ons[:room]].tolist(),
+                          ch[ons[:room]].tolist())
+
+        offs = np.flatnonzero(q_off)
+        kills: List[Tuple[int, np.ndarray]] = []
+        done = 0
+        killed = False
+        for i in np.flatnonzero(pedal):
+            upto = np.searchsorted(offs, i)
+            self._mark_off(note[offs[done:upto]].astype(np.intp))
+            done = upto
+            val = int(ev['msg3'][i])
+            if val >= CC64_REARM_THRESH:
+                self.cc64_rearm_ok = True
+            if val >= CC64_ARM_THRESH and self.cc64_rearm_ok:
+                self.cc64_armed = True
+            if val < CC64_KILL_THRESH and self.cc64_armed and not killed:
+                kills.append((i, self._kill_all(int(ev['offset'][i]))))
+                self.cc64_armed = False
+                self.cc64_rearm_ok = False
+                killed = True
+            else:
+                emit[i] = True
+        self._mark_off(note[offs[done:]].astype(np.intp))
+
+        start = 0
+        for i, sent in kills:
+            out.append(ev[start:i][emit[start:i]])
+            out.append(sent)
+            start = i + 1
+        out.append(ev[start:][emit[start:]])
+        return np.concatenate(out) if len(out) > 1 else out[0]
+
+
+ENGINES = {cls.NAME: cls for cls in
+           (ChannelRouter, DualRegionFilter, NoteShift, CCMapper, BeatQuantizer)}
+
+
+class Chain:
+    """Engines in series: each block's output is the next engine's input."""
+    __slots__ = ('engines',)
+
+    def __init__(self, *engines: JSFXEngine):
+        self.engines = list(engines)
+
+    def process_block(self, ev: np.ndarray,
+                      transport: Optional[Transport] = None) -> np.ndarray:
+        for engine in self.engines:
+            ev = engine.process_block(ev, transport)
+        return ev
+
+    @property
+    def work(self) -> int:
+        return sum(e.work for e in self.engines)
+
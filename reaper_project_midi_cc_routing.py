@@ -4,6 +4,16 @@ REAPER MIDI CC Editor - GUI Application Version 1.1
 - View & edit MIDI CC assignments in REAPER .RPP files
 - Multi-row selection for bulk CC / Channel / Bus reassignment
 - Routing visualisation: node graph, matrix, text list (separate window)
+- Headless batch report over many projects:
+    reaper_project_midi_cc_routing.py batch DIR... [-j N] [--json F] [--csv F]
+- Headless SVG/PNG export of the routing graph or matrix:
+    reaper_project_midi_cc_routing.py export PROJECT.RPP OUT.svg [--view matrix]
+- Offline replay of a MIDI file through the MIDI sends, with hit counts
+  and timing per MIDI-linked parameter (needs NumPy):
+    reaper_project_midi_cc_routing.py replay PROJECT.RPP TAKE.mid [--track N] [--json F]
+- APC mini pad map of the toggle/LED JS plugins (slider windows, output CCs,
+  MIDIPLINKs they drive) with conflicts, and conflict-free auto-assignment:
+    reaper_project_midi_cc_routing.py pads PROJECT.RPP [--assign -o OUT.RPP] [--json F]
 
 AUXRECV format per official CockosWiki / ReaTeam/Doc:
   AUXRECV src_idx mode vol pan mute mono_sum phase src_ach dst_ach panlaw midi_ch auto_mode
@@ -24,12 +34,40 @@ AUXRECV format per official CockosWiki / ReaTeam/Doc:
   field 12: int   - automation mode (-1 = use track mode)
 """
 
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
 import re
+import csv
+import json
 import math
+import time
+import mmap
+import bisect
+import shutil
+import tempfile
+import hashlib
+import marshal
+import struct
+import zlib
+import argparse
+import html
+import queue
+import threading
+from collections import Counter, deque
+from itertools import compress
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Dict, Tuple, Optional
 import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:     # optional: only the force-directed layout needs it
+    np = None
+
+try:
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox, scrolledtext
+except ImportError:     # optional: only the GUI needs it; the subcommands run headless
+    tk = None
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -52,10 +90,49 @@ def decode_midi_ch_field(val: int):
     src_raw = val & 0x1F
     dst_raw = val >> 5          # same as floor(val/32)
 
-    src_label = 'All' if src_raw == 17 else (f'Ch {src_raw - 1}' if src_raw else '?')
-    dst_label = 'Original' if dst_raw == 0 else (f'Ch {dst_raw - 1}')
+    return True, midi_src_label(src_raw), midi_dst_label(dst_raw)
+
+
+def midi_src_label(src_raw: int) -> str:
+    return 'All' if src_raw == 17 else (f'Ch {src_raw - 1}' if src_raw else '?')
+
+
+def midi_dst_label(dst_raw: int) -> str:
+    return 'Original' if dst_raw == 0 else f'Ch {dst_raw - 1}'
+
 
-    return True, src_label, dst_label
+def midi_src_mask(src_raw: int) -> int:
+    """Channels a send picks up as a 16-bit mask (bit n = ch n)."""
+    if src_raw == 17:
+        return 0xFFFF
+    return 1 << (src_raw - 1) if 1 <= src_raw <= 16 else 0
+
+
+def midi_dst_mask(src_raw: int, dst_raw: int) -> int:
+    """Channels a send can emit: its target channel, or the picked-up
+    channels when it passes them through ('Original')."""
+    if dst_raw == 0:
+        return midi_src_mask(src_raw)
+    return 1 << (dst_raw - 1) if 1 <= dst_raw <= 16 else 0
+
+
+ALL_CHANNELS = 0xFFFF
+
+
+def channel_mask_label(mask: int) -> str:
+    """'All', 'None', or the channels as ranges, e.g. '0, 3-5'."""
+    if mask == ALL_CHANNELS:
+        return 'All'
+    chans = [ch for ch in range(16) if mask >> ch & 1]
+    if not chans:
+        return 'None'
+    runs = []
+    for ch in chans:
+        if runs and runs[-1][1] == ch - 1:
+            runs[-1][1] = ch
+        else:
+            runs.append([ch, ch])
+    return ', '.join(str(a) if a == b else f'{a}-{b}' for a, b in runs)
 
 
 def decode_audio_ch(val: int) -> str:
@@ -69,195 +146,2225 @@ def decode_audio_ch(val: int) -> str:
 FADER_MODES = {0: 'Post Fader', 1: 'Pre FX', 3: 'Pre Fader'}
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+#  Track model
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Connection:
+    """
+    One AUXRECV entry.  The same object appears in the destination track's
+    receives and in the source track's sends, so sends are views, not copies.
+
+    MIDI channels are kept as the raw AUXRECV field 11 codes:
+      midi_src  0 = no MIDI, 1-16 = ch 0-15, 17 = all channels
+      midi_dst  0 = original channel, 1-16 = ch 0-15
+    and decoded into 16-bit channel masks (bit n = ch n) for filtering.
+    """
+    __slots__ = ('src_idx', 'dst_idx', 'fader_mode', 'src_ach', 'dst_ach',
+                 'midi_raw', 'has_audio', 'has_midi', 'midi_src', 'midi_dst',
+                 'src_mask', 'dst_mask')
+
+    def __init__(self, src_idx: int, dst_idx: int, fader_mode: int,
+                 src_ach: int, dst_ach: int, midi_raw: int):
+        self.src_idx    = src_idx
+        self.dst_idx    = dst_idx
+        self.fader_mode = fader_mode
+        self.src_ach    = src_ach
+        self.dst_ach    = dst_ach
+        self.midi_raw   = midi_raw
+        self.has_audio  = src_ach != -1
+        self.has_midi   = midi_raw != 0
+        self.midi_src   = midi_raw & 0x1F
+        self.midi_dst   = midi_raw >> 5
+        self.src_mask   = midi_src_mask(self.midi_src) if midi_raw else 0
+        self.dst_mask   = midi_dst_mask(self.midi_src, self.midi_dst) if midi_raw else 0
+
+    @property
+    def midi_src_ch(self) -> Optional[str]:
+        """Display label, e.g. 'Ch 3', 'All', or None without MIDI."""
+        return midi_src_label(self.midi_src) if self.has_midi else None
+
+    @property
+    def midi_dst_ch(self) -> Optional[str]:
+        """Display label, e.g. 'Ch 1', 'Original', or None without MIDI."""
+        return midi_dst_label(self.midi_dst) if self.has_midi else None
+
+
+class Modulation:
+    """A PROGRAMENV parameter modulation and its MIDIPLINK binding, if any."""
+    __slots__ = ('param_id', 'param_name', 'bypass_flag', 'midi_cc', 'midi_note',
+                 'midi_channel', 'midi_bus', 'midi_msg_type', 'programenv_line',
+                 'midiplink_line', 'midiplink_span')
+
+    def __init__(self, param_id: str, param_name: str, bypass_flag: int,
+                 midi_cc=None, midi_note=None, midi_channel=None, midi_bus=None,
+                 midi_msg_type=None, programenv_line=None, midiplink_line=None,
+                 midiplink_span=None):
+        self.param_id        = param_id
+        self.param_name      = param_name
+        self.bypass_flag     = bypass_flag
+        self.midi_cc         = midi_cc          # set when msg type is 176 (CC)
+        self.midi_note       = midi_note        # set for any other msg type
+        self.midi_channel    = midi_channel
+        self.midi_bus        = midi_bus
+        self.midi_msg_type   = midi_msg_type
+        self.programenv_line = programenv_line
+        self.midiplink_line  = midiplink_line
+        self.midiplink_span  = midiplink_span   # (start, end) byte offsets
+
+
+class FX:
+    __slots__ = ('type', 'name', 'line_num', 'modulations', 'sliders', 'slider_span')
+
+    def __init__(self, type: str, name: str, line_num=None, modulations=None,
+                 sliders=None, slider_span=None):
+        self.type        = type
+        self.name        = name
+        self.line_num    = line_num
+        self.modulations: List[Modulation] = modulations if modulations is not None else []
+        self.sliders: Optional[List[Optional[float]]] = sliders   # JS: slider1.., None = unused
+        self.slider_span = slider_span      # (start, end) byte offsets of the JS state line
+
+
+class Track:
+    __slots__ = ('guid', 'name', 'folder_depth', 'line_num', 'fx_list',
+                 'fxchain_spans', 'has_midiplink', 'receives', 'sends')
+
+    def __init__(self, guid: str, line_num=None, lazy: bool = False):
+        self.guid          = guid
+        self.name: Optional[str] = None
+        self.folder_depth  = 0
+        self.line_num      = line_num
+        self.fx_list: Optional[List[FX]] = None if lazy else []   # None = not parsed yet
+        self.fxchain_spans: List[Tuple[int, int]] = []   # file offsets of FXCHAIN bodies
+        self.has_midiplink = False
+        self.receives: List[Connection] = []   # parsed AUXRECV data
+        self.sends:    List[Connection] = []   # same objects, derived in post-pass
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  RPP chunk tokenizer
+# ═══════════════════════════════════════════════════════════════════════════
+
+# A line whose first non-blank character opens ('<') or closes ('>') a chunk.
+# Anchored on the preceding newline (not '^') so the regex engine can use a
+# literal-prefix scan over long base64 / MIDI event runs.
+_CHUNK_EDGE_RE = re.compile(rb'\n[ \t]*([<>])')
+
+_GUID_RE       = re.compile(rb'\{([^}]+)\}')
+_FX_RE         = re.compile(rb'<(VST|AU|JS|VST3|CLAP)\s+(?:"(.+?)"|(\S+))')
+_PROGRAMENV_RE = re.compile(rb'<PROGRAMENV\s+(\S+)\s+(\d+)\s+"([^"]+)"')
+_MIDIPLINK_RE  = re.compile(rb'MIDIPLINK\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)')
+_TOKEN_RE      = re.compile(rb'\S+')
+
+JS_SLIDERS = 64     # slider values on the first line of a <JS ...> chunk
+
+
+class RPPTokenizer:
+    """
+    Single-pass walker over the <...> chunk structure of an RPP buffer.
+
+    children() yields (tag, line, offset) for each direct child of the
+    current chunk: tag is None for attribute lines and the chunk name
+    (e.g. b'TRACK') for nested chunk headers; line is stripped bytes.
+    A nested chunk is only entered if the caller iterates children() again
+    before advancing; otherwise its body is skipped in bulk, visiting only
+    chunk edges, so base64 plugin state, MIDI event lists and envelopes
+    never reach Python code.
+
+    buf may be a slice of the project read from file offset origin; yielded
+    offsets are always file offsets.
+    """
+
+    def __init__(self, buf, count_lines: bool = True, origin: int = 0):
+        self.buf = buf
+        self.pos = 0
+        self.origin = origin
+        self._pending = False   # a chunk header was yielded but not entered
+        self._count_lines = count_lines
+        self._nl_pos = 0
+        self._nl_count = 0
+
+    def children(self):
+        buf = self.buf
+        n = len(buf)
+        self._pending = False
+        while self.pos < n:
+            start = self.pos
+            nl = buf.find(b'\n', start)
+            self.pos = n if nl < 0 else nl + 1
+            line = buf[start:self.pos].strip()
+            if not line:
+                continue
+            c = line[0]
+            if c == 0x3E:                       # '>'
+                return
+            if c == 0x3C:                       # '<'
+                sp = line.find(b' ')
+                self._pending = True
+                yield (line[1:] if sp < 0 else line[1:sp]), line, start + self.origin
+                if self._pending:
+                    self.skip()
+            else:
+                yield None, line, start + self.origin
+
+    def skip(self):
+        """Advance past the '>' closing the chunk whose header was just read."""
+        self._pending = False
+        buf = self.buf
+        depth = 1
+        for m in _CHUNK_EDGE_RE.finditer(buf, self.pos - 1):
+            if m.group(1) == b'<':
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 0:
+                nl = buf.find(b'\n', m.end())
+                self.pos = len(buf) if nl < 0 else nl + 1
+                return
+        self.pos = len(buf)
+
+    @property
+    def offset(self) -> int:
+        """File offset of the next unread line."""
+        return self.pos + self.origin
+
+    def find(self, sub: bytes, offset: int, end: Optional[int] = None) -> int:
+        """File offset of the first sub between file offsets offset and end, or -1."""
+        i = self.buf.find(sub, offset - self.origin,
+                          len(self.buf) if end is None else end - self.origin)
+        return -1 if i < 0 else i + self.origin
+
+    def line_no(self, offset: int) -> Optional[int]:
+        """
+        0-based line number of offset; offsets must be non-decreasing.
+        Returns None when line counting is off (memory-mapped buffers).
+        """
+        if not self._count_lines:
+            return None
+        self._nl_count += self.buf.count(b'\n', self._nl_pos, offset)
+        self._nl_pos = offset
+        return self._nl_count
+
+
+def _text(raw: bytes) -> str:
+    return raw.decode('utf-8', errors='ignore')
+
+
+def parse_js_sliders(line: bytes) -> List[Optional[float]]:
+    """Slider values from a JS state line; '-' (unused slider) is None."""
+    values = []
+    for tok in line.split()[:JS_SLIDERS]:
+        try:
+            values.append(None if tok == b'-' else float(tok))
+        except ValueError:
+            values.append(None)
+    return values
+
+
+def js_slider_text(value: float) -> str:
+    return ('%.6f' % value).rstrip('0').rstrip('.') or '0'
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Byte-range file copy
+# ═══════════════════════════════════════════════════════════════════════════
+
+COPY_CHUNK = 4 * 1024 * 1024
+
+
+def _write_all(fd: int, data) -> None:
+    with memoryview(data) as mv:
+        while mv:
+            mv = mv[os.write(fd, mv):]
+
+
+def copy_range(src_fd: int, dst_fd: int, offset: int, count: int) -> None:
+    """
+    Append count bytes starting at offset of src_fd to dst_fd's current
+    position.  Uses copy_file_range / sendfile so the data stays in the
+    kernel where available, and falls back to large buffered reads.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while count > 0:
+                n = os.copy_file_range(src_fd, dst_fd, count, offset)
+                if n == 0:
+                    break
+                offset += n
+                count -= n
+        except OSError:
+            pass            # e.g. EXDEV on older kernels: try the next method
+    if count > 0 and sys.platform.startswith('linux'):
+        try:
+            while count > 0:
+                n = os.sendfile(dst_fd, src_fd, offset, count)
+                if n == 0:
+                    break
+                offset += n
+                count -= n
+        except OSError:
+            pass
+    if count > 0:
+        buf = bytearray(min(count, COPY_CHUNK))
+        with open(src_fd, 'rb', buffering=0, closefd=False) as src:
+            src.seek(offset)
+            while count > 0:
+                n = src.readinto(memoryview(buf)[:min(count, len(buf))])
+                if not n:
+                    raise EOFError('source file is shorter than expected')
+                _write_all(dst_fd, memoryview(buf)[:n])
+                count -= n
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Parsed-project cache
+# ═══════════════════════════════════════════════════════════════════════════
+
+CACHE_MAX_BYTES  = 512 * 1024 * 1024
+CACHE_HASH_BYTES = 1024 * 1024          # content hash covers the file's first MiB
+
+
+def _default_cache_dir() -> str:
+    base = os.environ.get('XDG_CACHE_HOME')
+    if not base and os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'reaper_midi_cc_editor')
+
+
+# Entries store each record as a tuple in constructor order.  Sends are not
+# stored; they are re-derived from the receives on load.
+
+def _encode_tracks(tracks: List[Track]) -> bytes:
+    def mod(m):
+        return (m.param_id, m.param_name, m.bypass_flag, m.midi_cc, m.midi_note,
+                m.midi_channel, m.midi_bus, m.midi_msg_type, m.programenv_line,
+                m.midiplink_line, m.midiplink_span)
+
+    def fx(f):
+        return (f.type, f.name, f.line_num, [mod(m) for m in f.modulations],
+                f.sliders, f.slider_span)
+
+    rows = []
+    for t in tracks:
+        rows.append((t.guid, t.name, t.folder_depth, t.line_num, t.has_midiplink,
+                     t.fxchain_spans,
+                     [(r.src_idx, r.dst_idx, r.fader_mode, r.src_ach, r.dst_ach, r.midi_raw)
+                      for r in t.receives],
+                     None if t.fx_list is None else [fx(f) for f in t.fx_list]))
+    return zlib.compress(marshal.dumps(rows), 1)
+
+
+def _decode_tracks(payload: bytes) -> List[Track]:
+    tracks = []
+    for guid, name, depth, line_num, hint, spans, recvs, fx_rows in \
+            marshal.loads(zlib.decompress(payload)):
+        t = Track(guid, line_num, lazy=fx_rows is None)
+        t.name          = name
+        t.folder_depth  = depth
+        t.has_midiplink = hint
+        t.fxchain_spans = spans
+        t.receives      = [Connection(*r) for r in recvs]
+        if fx_rows is not None:
+            t.fx_list = [FX(ftype, fname, fline, [Modulation(*m) for m in mods], sliders, span)
+                         for ftype, fname, fline, mods, sliders, span in fx_rows]
+        tracks.append(t)
+    return tracks
+
+
+class ProjectCache:
+    """
+    On-disk cache of parsed project models, one entry per project path.
+
+    An entry is only used if the file's size, mtime and a hash of its first
+    CACHE_HASH_BYTES all match; otherwise the project is parsed again and
+    the entry overwritten.  Entries are marshal + zlib, and the directory is
+    trimmed least-recently-used first once it grows past max_bytes.
+    """
+
+    MAGIC  = b'RPPC'
+    FORMAT = 5
+    _HEADER = struct.Struct('<4sBQq16s')     # magic, format, size, mtime_ns, hash
+
+    def __init__(self, directory: Optional[str] = None,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory or _default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, filepath: str) -> str:
+        key = hashlib.sha1(os.path.abspath(filepath).encode('utf-8', 'surrogatepass'))
+        return os.path.join(self.directory, key.hexdigest() + '.rppc')
+
+    @staticmethod
+    def fingerprint(f) -> bytes:
+        """Hash of the first CACHE_HASH_BYTES of the open binary file f."""
+        f.seek(0)
+        digest = hashlib.blake2b(f.read(CACHE_HASH_BYTES), digest_size=16).digest()
+        f.seek(0)
+        return digest
+
+    def get(self, filepath: str, st: os.stat_result, digest: bytes) -> Optional[List[Track]]:
+        entry = self._entry_path(filepath)
+        try:
+            with open(entry, 'rb') as f:
+                magic, fmt, size, mtime, h = self._HEADER.unpack(f.read(self._HEADER.size))
+                if (magic, fmt, size, mtime, h) != (self.MAGIC, self.FORMAT, st.st_size,
+                                                    st.st_mtime_ns, digest):
+                    return None
+                tracks = _decode_tracks(f.read())
+            os.utime(entry)                  # mark as recently used
+            return tracks
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, TypeError, struct.error, zlib.error):
+            self._discard(entry)
+            return None
+
+    def put(self, filepath: str, st: os.stat_result, digest: bytes,
+            tracks: List[Track]) -> bool:
+        """Store tracks for filepath.  Best effort: I/O errors return False."""
+        tmp = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._HEADER.pack(self.MAGIC, self.FORMAT, st.st_size,
+                                          st.st_mtime_ns, digest))
+                f.write(_encode_tracks(tracks))
+            os.replace(tmp, self._entry_path(filepath))
+            self._evict()
+            return True
+        except OSError:
+            if tmp:
+                self._discard(tmp)
+            return False
+
+    def _evict(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for e in it:
+                if e.name.endswith('.rppc'):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  MIDI binding index
+# ═══════════════════════════════════════════════════════════════════════════
+
+BindingKey = Tuple[int, int, int, int]   # (bus, channel, msg_type, cc or note)
+ModRef     = Tuple[int, int, int]        # (track_idx, fx_idx, mod_idx)
+
+MSG_CC = 176
+
+
+def binding_key(mod: Modulation) -> Optional[BindingKey]:
+    if mod.midi_msg_type is None:
+        return None
+    number = mod.midi_cc if mod.midi_msg_type == MSG_CC else mod.midi_note
+    return (mod.midi_bus, mod.midi_channel, mod.midi_msg_type, number)
+
+
+class BindingIndex:
+    """
+    Inverted index from (bus, channel, msg_type, cc/note) to the modulations
+    MIDI-linked to it.  Only tracks whose FX chain has been parsed are
+    covered; REAPERProject adds the others as they are parsed.
+    """
+
+    def __init__(self):
+        self._refs: Dict[BindingKey, set] = {}
+        self._used: Dict[Tuple[int, int, int], int] = {}   # (bus, ch, msg) -> number bitmask
+        self._collisions: set = set()                      # keys with more than one ref
+        self._count = Counter()                            # msg_type -> bindings
+
+    def __len__(self) -> int:
+        return sum(self._count.values())
+
+    def count(self, msg_type: int = MSG_CC) -> int:
+        return self._count[msg_type]
+
+    def clear(self):
+        self._refs.clear()
+        self._used.clear()
+        self._collisions.clear()
+        self._count.clear()
+
+    def rebuild(self, tracks: List[Track]):
+        self.clear()
+        for ti, track in enumerate(tracks):
+            if track.fx_list is not None:
+                self.add_track(ti, track.fx_list)
+
+    def add_track(self, track_idx: int, fx_list: List[FX]):
+        for fi, fx in enumerate(fx_list):
+            for mi, mod in enumerate(fx.modulations):
+                key = binding_key(mod)
+                if key is not None:
+                    self.add(key, (track_idx, fi, mi))
+
+    def add(self, key: BindingKey, ref: ModRef):
+        refs = self._refs.get(key)
+        if refs is None:
+            refs = self._refs[key] = set()
+            group = key[:3]
+            self._used[group] = self._used.get(group, 0) | (1 << key[3])
+        refs.add(ref)
+        if len(refs) == 2:
+            self._collisions.add(key)
+        self._count[key[2]] += 1
+
+    def discard(self, key: BindingKey, ref: ModRef):
+        refs = self._refs.get(key)
+        if refs is None or ref not in refs:
+            return
+        refs.remove(ref)
+        self._count[key[2]] -= 1
+        if len(refs) == 1:
+            self._collisions.discard(key)
+        elif not refs:
+            del self._refs[key]
+            group = key[:3]
+            self._used[group] &= ~(1 << key[3])
+
+    def move(self, ref: ModRef, old: Optional[BindingKey], new: Optional[BindingKey]):
+        if old is not None:
+            self.discard(old, ref)
+        if new is not None:
+            self.add(new, ref)
+
+    def refs(self, key: BindingKey) -> List[ModRef]:
+        return sorted(self._refs.get(key, ()))
+
+    def lookup(self, bus: int, channel: int, number: int,
+               msg_type: int = MSG_CC) -> List[ModRef]:
+        return sorted(self._refs.get((bus, channel, msg_type, number), ()))
+
+    def is_free(self, bus: int, channel: int, number: int, msg_type: int = MSG_CC) -> bool:
+        return (bus, channel, msg_type, number) not in self._refs
+
+    def is_shared(self, key: BindingKey) -> bool:
+        return key in self._collisions
+
+    def conflicts(self, ref: ModRef, bus: int, channel: int, number: int,
+                  msg_type: int = MSG_CC) -> List[ModRef]:
+        """Other modulations already on this binding (ref itself excluded)."""
+        refs = self._refs.get((bus, channel, msg_type, number), ())
+        return sorted(r for r in refs if r != ref)
+
+    def free_numbers(self, bus: int, channel: int, msg_type: int = MSG_CC,
+                     count: int = 1, start: int = 0) -> List[int]:
+        """Up to count unused CC/note numbers, searching up from start and
+        wrapping at 127.  start is clamped to 0..127."""
+        start = min(max(start, 0), 127)
+        full = (1 << 128) - 1
+        mask = ~self._used.get((bus, channel, msg_type), 0) & full
+        mask = (mask >> start | mask << (128 - start)) & full   # rotate start to bit 0
+        free = []
+        while mask and len(free) < count:
+            low = mask & -mask
+            free.append((low.bit_length() - 1 + start) & 127)
+            mask ^= low
+        return free
+
+    def select(self, bus=None, channel=None, number=None, msg_type: int = MSG_CC) -> set:
+        """Refs whose binding lies in the given (lo, hi) ranges; None = any."""
+        found = set()
+        for (b, c, t, n), refs in self._refs.items():
+            if (t == msg_type
+                    and (bus is None or bus[0] <= b <= bus[1])
+                    and (channel is None or channel[0] <= c <= channel[1])
+                    and (number is None or number[0] <= n <= number[1])):
+                found |= refs
+        return found
+
+    def collisions(self) -> List[Tuple[BindingKey, List[ModRef]]]:
+        """Bindings shared by more than one modulation, in key order."""
+        return [(key, sorted(self._refs[key])) for key in sorted(self._collisions)]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Parameter search
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Query terms: bare words match the param name; 'track:' / 't:' and 'fx:'
+# match those names; 'cc:', 'ch:' and 'bus:' take a number or a range N-M.
+SEARCH_TEXT_FIELDS   = {'track': 'track', 't': 'track', 'fx': 'fx'}
+SEARCH_NUMBER_FIELDS = {'cc': 'midi_cc', 'ch': 'midi_channel', 'bus': 'midi_bus'}
+
+
+class _TextColumn:
+    """
+    One text field of the search index.  Names repeat a lot (every synth
+    has a 'Volume'), so terms are matched once per distinct lower-cased
+    string and the verdicts are fanned out to entries with compress().
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+        self.of: List[int] = []              # entry -> string id
+
+    def add(self, text: str):
+        sid = self.ids.get(text)
+        if sid is None:
+            sid = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        self.of.append(sid)
+
+    def entries(self, term: str) -> List[int]:
+        hit = [term in s for s in self.strings]
+        return list(compress(range(len(self.of)), map(hit.__getitem__, self.of)))
+
+    def narrow(self, entries: List[int], term: str) -> List[int]:
+        strings, of = self.strings, self.of
+        if len(entries) * 4 < len(strings):
+            return [e for e in entries if term in strings[of[e]]]
+        hit = [term in s for s in strings]
+        return list(compress(entries, map(hit.__getitem__, map(of.__getitem__, entries))))
+
+
+class SearchIndex:
+    """
+    Search over the CC-linked params of parsed tracks (the rows the editor
+    lists), built once per load so names are never lower-cased per query.
+    When a query only lengthens the text terms of the previous one, its
+    hits are narrowed from the previous hits.  cc:/ch:/bus: terms read the
+    live model (alone, through the project's BindingIndex); call forget()
+    after an edit so narrowing does not reuse stale hits.
+    """
+
+    def __init__(self, tracks: List[Track], bindings: BindingIndex):
+        self.bindings = bindings
+        self.refs: List[ModRef] = []
+        self.mods: List[Modulation] = []
+        self.entry_of: Dict[ModRef, int] = {}
+        self.columns = {'param': _TextColumn(), 'fx': _TextColumn(), 'track': _TextColumn()}
+        param, fxcol, trcol = self.columns['param'], self.columns['fx'], self.columns['track']
+        for ti, track in enumerate(tracks):
+            if track.fx_list is None:
+                continue
+            tname = (track.name or f"Track {ti+1}").lower()
+            for fi, fx in enumerate(track.fx_list):
+                fname = fx.name.lower()
+                for mi, mod in enumerate(fx.modulations):
+                    if mod.midi_cc is None:
+                        continue
+                    self.entry_of[ti, fi, mi] = len(self.refs)
+                    self.refs.append((ti, fi, mi))
+                    self.mods.append(mod)
+                    param.add(mod.param_name.lower())
+                    fxcol.add(fname)
+                    trcol.add(tname)
+        self._last = None   # (text terms, number ranges, hits)
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def forget(self):
+        self._last = None
+
+    @staticmethod
+    def parse(query: str) -> Tuple[Dict[str, str], Dict[str, Tuple[int, int]]]:
+        """Split a query into {column: term} and {attribute: (lo, hi)}."""
+        text, numbers, words = {}, {}, []
+        for tok in query.lower().split():
+            field, sep, val = tok.partition(':')
+            if sep and val and field in SEARCH_TEXT_FIELDS:
+                text[SEARCH_TEXT_FIELDS[field]] = val
+                continue
+            if sep and field in SEARCH_NUMBER_FIELDS:
+                lo, dash, hi = val.partition('-')
+                try:
+                    numbers[SEARCH_NUMBER_FIELDS[field]] = (int(lo), int(hi) if dash else int(lo))
+                    continue
+                except ValueError:
+                    pass
+            words.append(tok)
+        if words:
+            text['param'] = ' '.join(words)
+        return text, numbers
+
+    def search(self, query: str) -> List[ModRef]:
+        """Refs matching every term of query, in project order."""
+        text, numbers = self.parse(query)
+        last = self._last
+        if (last is not None and last[1] == numbers and last[0].keys() == text.keys()
+                and all(last[0][f] in term for f, term in text.items())):
+            hits = last[2]
+            for field, term in text.items():
+                if term != last[0][field]:
+                    hits = self.columns[field].narrow(hits, term)
+        else:
+            hits = None
+            for field, term in text.items():
+                col = self.columns[field]
+                hits = col.entries(term) if hits is None else col.narrow(hits, term)
+            if numbers and hits is None:
+                bound = self.bindings.select(bus=numbers.get('midi_bus'),
+                                             channel=numbers.get('midi_channel'),
+                                             number=numbers.get('midi_cc'))
+                entry_of = self.entry_of
+                hits = sorted(entry_of[r] for r in bound if r in entry_of)
+            elif numbers:
+                mods = self.mods
+                for attr, (lo, hi) in numbers.items():
+                    hits = [e for e in hits if lo <= getattr(mods[e], attr) <= hi]
+            if hits is None:
+                hits = list(range(len(self.refs)))
+        self._last = (text, numbers, hits)
+        return list(map(self.refs.__getitem__, hits))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Send graph index
+# ═══════════════════════════════════════════════════════════════════════════
+
+EDGE_AUDIO = 1
+EDGE_MIDI  = 2
+
+
+
+class RoutingIndex:
+    """
+    The send graph in CSR form, built once per load.  Edge e runs from
+    src[e] to dst[e]; track t's sends are edges out_start[t]:out_start[t+1]
+    (by destination) and its receives are in_edges[in_start[t]:in_start[t+1]].
+    Per-track degrees and MIDI channel masks are precomputed for the views.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.conns)
+
+    def clear(self):
+        self.conns: List[Connection] = []
+        self.src:  List[int] = []
+        self.dst:  List[int] = []
+        self.kind: List[int] = []          # EDGE_AUDIO | EDGE_MIDI
+        self.src_mask: List[int] = []      # MIDI channels picked up
+        self.dst_mask: List[int] = []      # MIDI channels emitted
+        self.out_start: List[int] = [0]
+        self.in_start:  List[int] = [0]
+        self.in_edges:  List[int] = []
+        self.audio_out: List[int] = []
+        self.audio_in:  List[int] = []
+        self.midi_out:  List[int] = []
+        self.midi_in:   List[int] = []
+        self.chans_out: List[int] = []     # OR of src_mask over MIDI sends
+        self.chans_in:  List[int] = []     # OR of dst_mask over MIDI receives
+        self._count = Counter()            # EDGE_* -> edges carrying it
+        self._memo: Dict[tuple, object] = {}   # reach() / feedback results
+
+    def rebuild(self, tracks: List[Track]):
+        self.clear()
+        n = len(tracks)
+        conns, src, dst, kind = self.conns, self.src, self.dst, self.kind
+        for ti, t in enumerate(tracks):
+            for c in sorted(t.sends, key=lambda c: c.dst_idx):
+                conns.append(c)
+                src.append(ti)
+                dst.append(c.dst_idx)
+                kind.append(EDGE_AUDIO * c.has_audio | EDGE_MIDI * c.has_midi)
+            self.out_start.append(len(conns))
+        self.src_mask = [c.src_mask for c in conns]
+        self.dst_mask = [c.dst_mask for c in conns]
+
+        # Receives: counting sort of the edges by destination
+        in_start = [0] * (n + 1)
+        for d in dst:
+            in_start[d + 1] += 1
+        for t in range(n):
+            in_start[t + 1] += in_start[t]
+        fill = in_start[:-1]
+        in_edges = [0] * len(conns)
+        for e, d in enumerate(dst):
+            in_edges[fill[d]] = e
+            fill[d] += 1
+        self.in_start, self.in_edges = in_start, in_edges
+
+        audio_out, audio_in = [0] * n, [0] * n
+        midi_out,  midi_in  = [0] * n, [0] * n
+        chans_out, chans_in = [0] * n, [0] * n
+        for e, k in enumerate(kind):
+            s, d = src[e], dst[e]
+            if k & EDGE_AUDIO:
+                audio_out[s] += 1
+                audio_in[d]  += 1
+            if k & EDGE_MIDI:
+                midi_out[s] += 1
+                midi_in[d]  += 1
+                chans_out[s] |= self.src_mask[e]
+                chans_in[d]  |= self.dst_mask[e]
+        self.audio_out, self.audio_in = audio_out, audio_in
+        self.midi_out,  self.midi_in  = midi_out,  midi_in
+        self.chans_out, self.chans_in = chans_out, chans_in
+        self._count[EDGE_AUDIO] = sum(audio_out)
+        self._count[EDGE_MIDI]  = sum(midi_out)
+
+    def count(self, kind: int) -> int:
+        return self._count[kind]
+
+    def out(self, t: int) -> range:
+        """Edge ids of t's sends."""
+        return range(self.out_start[t], self.out_start[t + 1])
+
+    def ins(self, t: int) -> List[int]:
+        """Edge ids of t's receives."""
+        return self.in_edges[self.in_start[t]:self.in_start[t + 1]]
+
+    def degree(self, t: int) -> int:
+        return (self.out_start[t + 1] - self.out_start[t] +
+                self.in_start[t + 1] - self.in_start[t])
+
+    # ── Signal paths ────────────────────────────────────────────────────
+
+    def reach(self, start: int, kind: int = EDGE_MIDI,
+              channels: int = ALL_CHANNELS) -> 'Reach':
+        """
+        Everything a signal leaving `start` arrives at, over any number of
+        hops.  For MIDI the channel set is propagated: a send forwards the
+        arriving channels its src_mask picks up, remapped to its target
+        channel unless it passes them through.  Each track is revisited only
+        when new channels reach it, so the walk is O(16 · E).  Memoised
+        until the next rebuild.
+        """
+        key = (start, kind, channels)
+        hit = self._memo.get(key)
+        if hit is not None:
+            return hit
+        midi = kind == EDGE_MIDI
+        out_start, dst, kinds = self.out_start, self.dst, self.kind
+        src_mask, dst_mask, conns = self.src_mask, self.dst_mask, self.conns
+        masks = {start: channels if midi else 1}
+        via: Dict[int, int] = {}
+        edges: set = set()
+        todo = deque([start])
+        while todo:
+            u = todo.popleft()
+            m = masks[u]
+            for e in range(out_start[u], out_start[u + 1]):
+                if not kinds[e] & kind:
+                    continue
+                if midi:
+                    picked = m & src_mask[e]
+                    if not picked:
+                        continue
+                    out = picked if conns[e].midi_dst == 0 else dst_mask[e]
+                else:
+                    out = 1
+                edges.add(e)
+                d = dst[e]
+                old = masks.get(d, 0)
+                if out & ~old:
+                    masks[d] = old | out
+                    if d not in via and d != start:
+                        via[d] = e
+                    todo.append(d)
+        feedback = any(dst[e] == start for e in edges)
+        result = Reach(start, kind, masks, via, edges, feedback, self.src)
+        self._memo[key] = result
+        return result
+
+    def feedback_edges(self, kind: int = EDGE_MIDI) -> set:
+        """
+        Edges of `kind` lying on a routing loop: both ends in the same
+        strongly connected component (iterative Tarjan, O(V + E)).  The
+        test is structural; reach() tells whether channels come back.
+        """
+        key = ('loops', kind)
+        hit = self._memo.get(key)
+        if hit is not None:
+            return hit
+        n = len(self.out_start) - 1
+        out_start, dst, kinds = self.out_start, self.dst, self.kind
+        order = [-1] * n
+        low = [0] * n
+        comp = [-1] * n
+        on_stack = [False] * n
+        stack: List[int] = []
+        counter = ncomp = 0
+        for root in range(n):
+            if order[root] >= 0:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, out_start[root])]
+            while work:
+                v, e = work[-1]
+                end = out_start[v + 1]
+                while e < end and not kinds[e] & kind:
+                    e += 1
+                if e < end:
+                    work[-1] = (v, e + 1)
+                    w = dst[e]
+                    if order[w] < 0:
+                        order[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, out_start[w]))
+                    elif on_stack[w]:
+                        low[v] = min(low[v], order[w])
+                    continue
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == order[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        comp[w] = ncomp
+                        if w == v:
+                            break
+                    ncomp += 1
+        result = {e for e, k in enumerate(kinds)
+                  if k & kind and comp[self.src[e]] == comp[dst[e]]}
+        self._memo[key] = result
+        return result
+
+    def feedback_loops(self, kind: int = EDGE_MIDI) -> List[List[int]]:
+        """Tracks of each routing loop, as sorted lists."""
+        parent: Dict[int, int] = {}
+
+        def find(t):
+            while parent.setdefault(t, t) != t:
+                parent[t] = parent[parent[t]]
+                t = parent[t]
+            return t
+
+        for e in self.feedback_edges(kind):
+            parent[find(self.src[e])] = find(self.dst[e])
+        loops: Dict[int, List[int]] = {}
+        for t in parent:
+            loops.setdefault(find(t), []).append(t)
+        return sorted(sorted(tracks) for tracks in loops.values())
+
+
+class Reach:
+    """Result of RoutingIndex.reach: the tracks a signal arrives at (with
+    the MIDI channels it arrives on), the edges carrying it, and for each
+    track the edge it was first reached by (fewest hops)."""
+    __slots__ = ('start', 'kind', 'masks', 'via', 'edges', 'feedback', '_src')
+
+    def __init__(self, start, kind, masks, via, edges, feedback, src):
+        self.start    = start
+        self.kind     = kind
+        self.masks: Dict[int, int] = masks
+        self.via:   Dict[int, int] = via
+        self.edges: set = edges
+        self.feedback = feedback            # the signal comes back to start
+        self._src = src
+
+    @property
+    def reached(self) -> List[int]:
+        return sorted(t for t in self.masks if t != self.start)
+
+    def path_to(self, t: int) -> List[int]:
+        """Edge ids of a shortest path from the start to t ([] if unreached)."""
+        path = []
+        while t in self.via:
+            e = self.via[t]
+            path.append(e)
+            t = self._src[e]
+        return path[::-1]
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 #  Data model
 # ═══════════════════════════════════════════════════════════════════════════
 
+# Projects at least this large are parsed from a memory mapping instead of
+# being read into memory first.
+MMAP_MIN_SIZE = 64 * 1024 * 1024
+
+
 class REAPERProject:
     def __init__(self):
         self.filepath = None
-        self.lines: List[str] = []
-        self.tracks: List[dict] = []
+        self.tracks: List[Track] = []
         self.modified = False
-
-    def load_file(self, filepath: str):
+        # The project text is never held as lines: edits are kept as
+        # {start: (end, new_bytes)} byte-range patches over the file on disk
+        # and spliced in by save_file.  Large files stay mapped read-only.
+        self._map: Optional[mmap.mmap] = None
+        self._patches: Dict[int, Tuple[int, bytes]] = {}
+        self._stat: Optional[Tuple[int, int]] = None   # (size, mtime_ns) at load
+        self._cache: Optional[ProjectCache] = None
+        self.bindings = BindingIndex()    # covers tracks whose FX are parsed
+        self.routing  = RoutingIndex()
+
+    @property
+    def mapped(self) -> bool:
+        return self._map is not None
+
+    def load_file(self, filepath: str, mapped: Optional[bool] = None,
+                  lazy: bool = False, cache: Optional[ProjectCache] = None):
+        """
+        Load and parse a project.  mapped=None picks memory-mapped mode for
+        files of MMAP_MIN_SIZE and above; True/False forces either mode.
+
+        With lazy=True only track headers (name, ISBUS, AUXRECV) are parsed;
+        each FXCHAIN's byte range is indexed and its fx_list stays None
+        until fx_list() is first called for that track.
+
+        If a cache is given, a valid entry for this file replaces parsing,
+        and freshly parsed (or saved) models are written back to it.
+        """
+        self.close()
         self.filepath = filepath
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            self.lines = f.readlines()
-        self._parse_structure()
+        self._cache = cache
+        with open(filepath, 'rb') as f:
+            st = os.fstat(f.fileno())
+            self._stat = (st.st_size, st.st_mtime_ns)
+            if mapped is None:
+                mapped = st.st_size >= MMAP_MIN_SIZE
+            digest = tracks = None
+            if cache is not None:
+                digest = cache.fingerprint(f)
+                tracks = cache.get(filepath, st, digest)
+            if mapped and st.st_size:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                data = self._map
+            elif tracks is None:
+                data = f.read()
+        if tracks is not None:
+            self.tracks = tracks
+            self._derive_sends()
+            self.bindings.rebuild(self.tracks)
+            if not lazy:
+                self.load_all_fx()
+        else:
+            self._parse_structure(data, lazy)
+            self.bindings.rebuild(self.tracks)
+            if cache is not None:
+                cache.put(filepath, st, digest, self.tracks)
         self.modified = False
 
-    def _parse_structure(self):
+    def close(self):
+        """Release the file mapping, if any, and drop pending patches."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._patches = {}
+
+    def _parse_structure(self, data, lazy: bool = False):
         self.tracks = []
-        current_track = None
-        current_fx = None
-        current_programenv = None
-        in_fxchain = False
-        fxchain_depth = 0
-
-        for i, line in enumerate(self.lines):
-            indent = len(line) - len(line.lstrip())
-            stripped = line.strip()
-
-            if stripped.startswith('<TRACK '):
-                guid_match = re.search(r'\{([^}]+)\}', stripped)
-                current_track = {
-                    'guid': guid_match.group(1) if guid_match else 'Unknown',
-                    'name': None,
-                    'fx_list': [],
-                    'receives': [],   # parsed AUXRECV data
-                    'sends': [],      # derived in post-pass
-                    'folder_depth': 0,
-                    'line_num': i,
-                }
-                self.tracks.append(current_track)
-                in_fxchain = False
-                current_fx = None
-                current_programenv = None
-
-            elif current_track:
-                if stripped.startswith('NAME '):
-                    name = stripped[5:].strip('"')
-                    current_track['name'] = name if name else None
-
-                elif stripped.startswith('ISBUS '):
-                    parts = stripped.split()
+        tok = RPPTokenizer(data, count_lines=self._map is None)
+        for tag, line, pos in tok.children():
+            if tag == b'REAPER_PROJECT':
+                for tag, line, pos in tok.children():
+                    if tag == b'TRACK':
+                        self._parse_track(tok, line, pos, lazy)
+            elif tag == b'TRACK':           # track template / bare chunk
+                self._parse_track(tok, line, pos, lazy)
+        self._derive_sends()
+
+    def _derive_sends(self):
+        """Link each receive into its source track's sends (no copies) and
+        index the resulting graph."""
+        for track in self.tracks:
+            track.sends = []
+        n = len(self.tracks)
+        for track in self.tracks:
+            for recv in track.receives:
+                if 0 <= recv.src_idx < n:
+                    self.tracks[recv.src_idx].sends.append(recv)
+        self.routing.rebuild(self.tracks)
+
+    def _parse_track(self, tok: RPPTokenizer, header: bytes, pos: int,
+                     lazy: bool = False):
+        guid_match = _GUID_RE.search(header)
+        track = Track(_text(guid_match.group(1)) if guid_match else 'Unknown',
+                      tok.line_no(pos), lazy)
+        dst_idx = len(self.tracks)
+        self.tracks.append(track)
+
+        # Only the track's own attribute lines are inspected; items,
+        # envelopes and other sub-chunks are skipped by the tokenizer.
+        for tag, line, pos in tok.children():
+            if tag is None:
+                if line.startswith(b'NAME '):
+                    name = _text(line[5:].strip(b'"'))
+                    track.name = name if name else None
+
+                elif line.startswith(b'ISBUS '):
+                    parts = line.split()
                     if len(parts) >= 2:
                         try:
-                            current_track['folder_depth'] = int(parts[1])
+                            track.folder_depth = int(parts[1])
                         except ValueError:
                             pass
 
-                elif stripped.startswith('AUXRECV '):
-                    # AUXRECV src mode vol pan mute mono phase src_ach dst_ach panlaw midi_ch auto
-                    #  [0]    [1] [2]  [3] [4] [5]  [6]  [7]   [8]    [9]    [10]   [11]   [12]
-                    parts = stripped.split()
-                    try:
-                        src_idx    = int(parts[1])
-                        fader_mode = int(parts[2])   if len(parts) > 2  else 0
-                        src_ach    = int(parts[8])   if len(parts) > 8  else 0
-                        dst_ach    = int(parts[9])   if len(parts) > 9  else 0
-                        midi_field = int(parts[11])  if len(parts) > 11 else 0
-
-                        has_audio = src_ach != -1
-                        has_midi, midi_src_ch, midi_dst_ch = decode_midi_ch_field(midi_field)
-
-                        current_track['receives'].append({
-                            'src_idx':     src_idx,
-                            'fader_mode':  fader_mode,
-                            'has_audio':   has_audio,
-                            'src_ach':     src_ach,
-                            'dst_ach':     dst_ach,
-                            'has_midi':    has_midi,
-                            'midi_src_ch': midi_src_ch,   # e.g. 'Ch 3', 'All', or None
-                            'midi_dst_ch': midi_dst_ch,   # e.g. 'Ch 1', 'Original', or None
-                            'midi_raw':    midi_field,
-                        })
-                    except (ValueError, IndexError):
-                        pass
-
-                elif stripped.startswith('<FXCHAIN'):
-                    in_fxchain = True
-                    fxchain_depth = indent
-                    current_fx = None
-                    current_programenv = None
-
-                elif in_fxchain:
-                    fx_match = re.match(r'<(VST|AU|JS|VST3|CLAP)\s+"(.+?)"', stripped)
-                    if fx_match:
-                        current_fx = {
-                            'type': fx_match.group(1),
-                            'name': fx_match.group(2),
-                            'line_num': i,
-                            'modulations': [],
-                        }
-                        current_track['fx_list'].append(current_fx)
-                        current_programenv = None
-
-                    elif stripped.startswith('<PROGRAMENV '):
-                        m = re.match(r'<PROGRAMENV\s+(\S+)\s+(\d+)\s+"([^"]+)"', stripped)
-                        if m:
-                            current_programenv = {
-                                'param_id':       m.group(1),
-                                'param_name':     m.group(3),
-                                'bypass_flag':    int(m.group(2)),
-                                'midi_cc':        None,
-                                'midi_channel':   None,
-                                'midi_bus':       None,
-                                'midi_msg_type':  None,
-                                'programenv_line': i,
-                                'midiplink_line': None,
-                            }
-                            if current_fx:
-                                current_fx['modulations'].append(current_programenv)
-                            elif current_track['fx_list']:
-                                current_track['fx_list'][-1]['modulations'].append(current_programenv)
-
-                    elif stripped.startswith('MIDIPLINK ') and current_programenv:
-                        mm = re.match(r'MIDIPLINK\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)', stripped)
+                elif line.startswith(b'AUXRECV '):
+                    recv = self._parse_auxrecv(line, dst_idx)
+                    if recv:
+                        track.receives.append(recv)
+
+            elif tag.startswith(b'FXCHAIN'):
+                start = tok.offset
+                if lazy:
+                    tok.skip()
+                    track.has_midiplink |= tok.find(b'MIDIPLINK', start, tok.offset) >= 0
+                else:
+                    self._parse_fxchain(tok, track)
+                track.fxchain_spans.append((start, tok.offset))
+
+    @staticmethod
+    def _parse_auxrecv(line: bytes, dst_idx: int) -> Optional[Connection]:
+        # AUXRECV src mode vol pan mute mono phase src_ach dst_ach panlaw midi_ch auto
+        #  [0]    [1] [2]  [3] [4] [5]  [6]  [7]   [8]    [9]    [10]   [11]   [12]
+        parts = line.split()
+        try:
+            src_idx    = int(parts[1])
+            fader_mode = int(parts[2])   if len(parts) > 2  else 0
+            src_ach    = int(parts[8])   if len(parts) > 8  else 0
+            dst_ach    = int(parts[9])   if len(parts) > 9  else 0
+            midi_field = int(parts[11])  if len(parts) > 11 else 0
+        except (ValueError, IndexError):
+            return None
+        return Connection(src_idx, dst_idx, fader_mode, src_ach, dst_ach, midi_field)
+
+    def _parse_fxchain(self, tok: RPPTokenizer, track: Track):
+        current_fx = None
+        for tag, line, pos in tok.children():
+            if tag is None:
+                continue
+
+            fx_match = _FX_RE.match(line)
+            if fx_match:
+                # Plugin state (base64 blobs) is skipped, not parsed.
+                current_fx = FX(_text(fx_match.group(1)),
+                                _text(fx_match.group(2) or fx_match.group(3)),
+                                tok.line_no(pos))
+                track.fx_list.append(current_fx)
+                if current_fx.type == 'JS':
+                    # The first line holds the slider values; the rest is skipped.
+                    for sub, sub_line, sub_pos in tok.children():
+                        if sub is None and current_fx.sliders is None:
+                            start = tok.find(sub_line, sub_pos)
+                            current_fx.sliders = parse_js_sliders(sub_line)
+                            current_fx.slider_span = (start, start + len(sub_line))
+
+            elif tag == b'PROGRAMENV':
+                m = _PROGRAMENV_RE.match(line)
+                if not m:
+                    continue
+                programenv = Modulation(_text(m.group(1)), _text(m.group(3)), int(m.group(2)),
+                                        programenv_line=tok.line_no(pos))
+                if current_fx is not None:
+                    current_fx.modulations.append(programenv)
+                elif track.fx_list:
+                    track.fx_list[-1].modulations.append(programenv)
+
+                for sub, sub_line, sub_pos in tok.children():
+                    if sub is None and sub_line.startswith(b'MIDIPLINK '):
+                        mm = _MIDIPLINK_RE.match(sub_line)
                         if mm:
-                            current_programenv['midi_bus']       = int(mm.group(1))
-                            current_programenv['midi_channel']   = int(mm.group(2))
-                            current_programenv['midi_msg_type']  = int(mm.group(3))
-                            current_programenv['midiplink_line'] = i
-                            cc_val = int(mm.group(4))
-                            if int(mm.group(3)) == 176:
-                                current_programenv['midi_cc'] = cc_val
+                            msg_type = int(mm.group(3))
+                            programenv.midi_bus       = int(mm.group(1))
+                            programenv.midi_channel   = int(mm.group(2))
+                            programenv.midi_msg_type  = msg_type
+                            programenv.midiplink_line = tok.line_no(sub_pos)
+                            start = tok.find(b'MIDIPLINK', sub_pos)
+                            programenv.midiplink_span = (start, start + len(sub_line))
+                            track.has_midiplink = True
+                            if msg_type == 176:
+                                programenv.midi_cc = int(mm.group(4))
                             else:
-                                current_programenv['midi_note'] = cc_val
-
-                    elif stripped == '>' and current_programenv:
-                        current_programenv = None
-
-                    if stripped == '>' and indent <= fxchain_depth:
-                        in_fxchain = False
-                        current_fx = None
-                        current_programenv = None
-
-        # Post-pass: derive sends list on source tracks from receive data on dest tracks
-        for dst_idx, track in enumerate(self.tracks):
-            for recv in track['receives']:
-                src_idx = recv['src_idx']
-                if 0 <= src_idx < len(self.tracks):
-                    self.tracks[src_idx]['sends'].append({
-                        'dst_idx':     dst_idx,
-                        'fader_mode':  recv['fader_mode'],
-                        'has_audio':   recv['has_audio'],
-                        'src_ach':     recv['src_ach'],
-                        'dst_ach':     recv['dst_ach'],
-                        'has_midi':    recv['has_midi'],
-                        'midi_src_ch': recv['midi_src_ch'],
-                        'midi_dst_ch': recv['midi_dst_ch'],
-                    })
+                                programenv.midi_note = int(mm.group(4))
+
+    def fx_loaded(self, track_idx: int) -> bool:
+        return self.tracks[track_idx].fx_list is not None
+
+    def fx_list(self, track_idx: int) -> List[FX]:
+        """Return the track's fx_list, parsing its FXCHAIN on first use."""
+        track = self.tracks[track_idx]
+        if track.fx_list is None:
+            track.fx_list = []
+            if self._map is not None:
+                for start, _ in track.fxchain_spans:
+                    tok = RPPTokenizer(self._map, count_lines=False)
+                    tok.pos = start
+                    self._parse_fxchain(tok, track)
+            elif track.fxchain_spans:
+                self._check_unchanged()
+                with open(self.filepath, 'rb') as f:
+                    for start, end in track.fxchain_spans:
+                        f.seek(start)
+                        tok = RPPTokenizer(f.read(end - start), count_lines=False,
+                                           origin=start)
+                        self._parse_fxchain(tok, track)
+            self.bindings.add_track(track_idx, track.fx_list)
+        return track.fx_list
+
+    def load_all_fx(self):
+        for ti in range(len(self.tracks)):
+            self.fx_list(ti)
+
+    def _check_unchanged(self):
+        """Byte offsets recorded at load time are only valid for that file."""
+        st = os.stat(self.filepath)
+        if (st.st_size, st.st_mtime_ns) != self._stat:
+            raise RuntimeError(f"{self.filepath} changed on disk since it was loaded; "
+                               "reopen it before continuing")
 
     def update_midi_cc(self, track_idx, fx_idx, mod_idx,
-                       new_cc, new_channel, new_bus) -> bool:
+                       new_cc, new_channel, new_bus, msg_type: int = MSG_CC) -> bool:
         try:
-            mod = self.tracks[track_idx]['fx_list'][fx_idx]['modulations'][mod_idx]
-            if mod['midiplink_line'] is None:
+            mod = self.fx_list(track_idx)[fx_idx].modulations[mod_idx]
+            span = mod.midiplink_span
+            if span is None:
                 return False
-            line_num = mod['midiplink_line']
-            old_line = self.lines[line_num]
-            indent = old_line[:len(old_line) - len(old_line.lstrip())]
-            self.lines[line_num] = f"{indent}MIDIPLINK {new_bus} {new_channel} 176 {new_cc}\r\n"
-            mod['midi_cc']       = new_cc
-            mod['midi_channel']  = new_channel
-            mod['midi_bus']      = new_bus
-            mod['midi_msg_type'] = 176
+            # Indentation and line ending lie outside the span and are kept.
+            new = f"MIDIPLINK {new_bus} {new_channel} {msg_type} {new_cc}".encode()
+            self._patches[span[0]] = (span[1], new)
+            old_key = binding_key(mod)
+            mod.midi_cc       = new_cc if msg_type == MSG_CC else None
+            mod.midi_channel  = new_channel
+            mod.midi_bus      = new_bus
+            mod.midi_msg_type = msg_type
+            mod.midi_note     = None if msg_type == MSG_CC else new_cc
+            self.bindings.move((track_idx, fx_idx, mod_idx), old_key, binding_key(mod))
             self.modified = True
             return True
         except (IndexError, KeyError) as e:
             print(f"Error updating MIDI CC: {e}")
             return False
 
+    def set_js_slider(self, track_idx: int, fx_idx: int, slider: int, value: float) -> bool:
+        """Set a JS plugin's slider (1-based) by patching its state line."""
+        try:
+            fx = self.fx_list(track_idx)[fx_idx]
+        except IndexError:
+            return False
+        span = fx.slider_span
+        if span is None or not 1 <= slider <= len(fx.sliders):
+            return False
+        line = self._span_bytes(span)
+        tok = list(_TOKEN_RE.finditer(line))[slider - 1]
+        new = line[:tok.start()] + js_slider_text(value).encode() + line[tok.end():]
+        self._patches[span[0]] = (span[1], new)
+        fx.sliders[slider - 1] = float(value)
+        self.modified = True
+        return True
+
+    def _span_bytes(self, span: Tuple[int, int]) -> bytes:
+        """Current text of a recorded span, pending patch included."""
+        patch = self._patches.get(span[0])
+        if patch is not None:
+            return patch[1]
+        if self._map is not None:
+            return bytes(self._map[span[0]:span[1]])
+        self._check_unchanged()
+        with open(self.filepath, 'rb') as f:
+            f.seek(span[0])
+            return f.read(span[1] - span[0])
+
     def save_file(self, filepath=None):
+        """
+        Splice the pending patches into the loaded file and write the result
+        atomically (temp file in the target directory + rename).  Unchanged
+        byte ranges are copied file-to-file, so the cost is one sequential
+        copy regardless of how many lines the project has.
+        """
         if filepath is None:
             filepath = self.filepath
-        with open(filepath, 'w', encoding='utf-8', newline='') as f:
-            f.writelines(self.lines)
+        src_path = self.filepath
+        self._check_unchanged()
+        size = self._stat[0]
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filepath)),
+                                   prefix='.' + os.path.basename(filepath), suffix='.tmp')
+        try:
+            with open(src_path, 'rb') as src:
+                src_fd = src.fileno()
+                pos = 0
+                for start in sorted(self._patches):
+                    end, new = self._patches[start]
+                    copy_range(src_fd, fd, pos, start - pos)
+                    _write_all(fd, new)
+                    pos = end
+                copy_range(src_fd, fd, pos, size - pos)
+            os.close(fd)
+            fd = -1
+            if os.path.exists(filepath):
+                shutil.copymode(filepath, tmp)
+            # Unmap before replacing: Windows refuses to replace a mapped file.
+            if self._map is not None:
+                self._map.close()
+            os.replace(tmp, filepath)
+        except BaseException:
+            if fd >= 0:
+                os.close(fd)
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            if self._map is not None and self._map.closed:
+                self._map = self._open_map(src_path)
+            raise
+
+        if self._map is not None:
+            self._map = self._open_map(filepath)
+        self._rebase_spans()
+        self._patches = {}
+        st = os.stat(filepath)
+        self._stat = (st.st_size, st.st_mtime_ns)
+        self.filepath = filepath
         self.modified = False
+        if self._cache is not None:
+            with open(filepath, 'rb') as f:
+                self._cache.put(filepath, st, self._cache.fingerprint(f), self.tracks)
         return True
 
+    @staticmethod
+    def _open_map(filepath: str) -> mmap.mmap:
+        with open(filepath, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _rebase_spans(self):
+        """Shift recorded byte spans to their offsets after applying patches."""
+        if not self._patches:
+            return
+        starts = sorted(self._patches)
+        shifts = [0]                # shifts[i] = size delta of the first i patches
+        for start in starts:
+            end, new = self._patches[start]
+            shifts.append(shifts[-1] + len(new) - (end - start))
+
+        def moved(off):
+            return off + shifts[bisect.bisect_left(starts, off)]
+
+        def rebased(span):
+            if span is None:
+                return None
+            patch = self._patches.get(span[0])
+            length = len(patch[1]) if patch else span[1] - span[0]
+            start = moved(span[0])
+            return (start, start + length)
+
+        for track in self.tracks:
+            track.fxchain_spans = [(moved(a), moved(b)) for a, b in track.fxchain_spans]
+            for fx in track.fx_list or ():
+                fx.slider_span = rebased(fx.slider_span)
+                for mod in fx.modulations:
+                    mod.midiplink_span = rebased(mod.midiplink_span)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Batch analysis
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Histograms kept per project and merged across a batch.  Keys are ints or
+# tuples of ints; render_key() turns them into the labels used in reports.
+HISTOGRAMS = ('cc', 'channel', 'bus', 'msg_type', 'binding', 'route')
+SUMMARY_FIELDS = ('tracks', 'fx', 'modulations', 'bound', 'cc_bound',
+                  'audio_sends', 'midi_sends')
+
+_worker_cache: Optional[ProjectCache] = None
+
+
+def render_key(hist: str, key) -> str:
+    if hist == 'binding':                       # (bus, channel, cc)
+        return '{}/{}/{}'.format(*key)
+    if hist == 'route':                         # raw AUXRECV (src, dst) codes
+        return f'{midi_src_label(key[0])} -> {midi_dst_label(key[1])}'
+    return str(key)
+
+
+def find_projects(paths: List[str]) -> List[str]:
+    """Expand directories to the .RPP files below them; files pass through."""
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            found.extend(os.path.join(root, name) for name in sorted(files)
+                         if name.lower().endswith('.rpp'))
+    return found
+
+
+def analyze_project(filepath: str, cache: Optional[ProjectCache] = None) -> dict:
+    """
+    Parse one project and summarise its CC bindings and routing.  Never
+    raises for a bad file: the report carries the error text instead.
+    """
+    report = {'path': filepath, 'error': None}
+    report.update((f, 0) for f in SUMMARY_FIELDS)
+    report.update((h, Counter()) for h in HISTOGRAMS)
+    t0 = time.perf_counter()
+    project = REAPERProject()
+    try:
+        project.load_file(filepath, cache=cache)
+    except (OSError, ValueError) as e:
+        report['error'] = str(e)
+        report['seconds'] = round(time.perf_counter() - t0, 4)
+        return report
+    finally:
+        project.close()
+    cc, channel, bus = report['cc'], report['channel'], report['bus']
+    msg_type, binding, route = report['msg_type'], report['binding'], report['route']
+    for track in project.tracks:
+        report['fx'] += len(track.fx_list)
+        for fx in track.fx_list:
+            report['modulations'] += len(fx.modulations)
+            for mod in fx.modulations:
+                if mod.midi_msg_type is None:
+                    continue
+                report['bound'] += 1
+                channel[mod.midi_channel] += 1
+                bus[mod.midi_bus] += 1
+                msg_type[mod.midi_msg_type] += 1
+                if mod.midi_cc is not None:
+                    report['cc_bound'] += 1
+                    cc[mod.midi_cc] += 1
+                    binding[mod.midi_bus, mod.midi_channel, mod.midi_cc] += 1
+        for send in track.sends:
+            report['audio_sends'] += send.has_audio
+            if send.has_midi:
+                report['midi_sends'] += 1
+                route[send.midi_src, send.midi_dst] += 1
+    report['tracks'] = len(project.tracks)
+    report['seconds'] = round(time.perf_counter() - t0, 4)
+    return report
+
+
+def _init_worker(cache_dir: Optional[str]):
+    global _worker_cache
+    _worker_cache = ProjectCache(cache_dir) if cache_dir else None
+
+
+def _analyze_in_worker(filepath: str) -> dict:
+    return analyze_project(filepath, _worker_cache)
+
+
+def batch_analyze(paths: List[str], jobs: Optional[int] = None,
+                  cache_dir: Optional[str] = None):
+    """
+    Analyse many projects across a process pool, yielding each report as
+    soon as it is ready (completion order, not input order).  The largest
+    files are submitted first so one big session does not finish last on
+    an otherwise idle pool.  jobs=1 runs in this process.
+    """
+    def size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    paths = sorted(paths, key=size, reverse=True)
+    if jobs == 1 or len(paths) < 2:
+        cache = ProjectCache(cache_dir) if cache_dir else None
+        for path in paths:
+            yield analyze_project(path, cache)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache_dir,)) as pool:
+        for fut in as_completed([pool.submit(_analyze_in_worker, p) for p in paths]):
+            yield fut.result()
+
+
+def merge_reports(reports: List[dict]) -> dict:
+    """
+    Sum the per-project counts.  For every histogram key, 'projects'
+    counts how many projects use it at least once.
+    """
+    merged = {'projects': 0, 'failed': 0}
+    merged.update((f, 0) for f in SUMMARY_FIELDS)
+    merged.update((h, Counter()) for h in HISTOGRAMS)
+    spread = {h: Counter() for h in HISTOGRAMS}
+    for report in reports:
+        merged['projects'] += 1
+        if report['error']:
+            merged['failed'] += 1
+            continue
+        for f in SUMMARY_FIELDS:
+            merged[f] += report[f]
+        for h in HISTOGRAMS:
+            merged[h].update(report[h])
+            spread[h].update(report[h].keys())
+    merged['spread'] = spread
+    return merged
+
+
+def report_json(report: dict) -> dict:
+    """Copy of a report with histogram keys rendered as strings."""
+    out = {k: v for k, v in report.items() if k not in HISTOGRAMS and k != 'spread'}
+    for h in HISTOGRAMS:
+        out[h] = {render_key(h, k): n for k, n in sorted(report[h].items())}
+    return out
+
+
+def write_histogram_csv(f, merged: dict):
+    w = csv.writer(f)
+    w.writerow(('histogram', 'key', 'count', 'projects'))
+    for h in HISTOGRAMS:
+        for key, n in sorted(merged[h].items()):
+            w.writerow((h, render_key(h, key), n, merged['spread'][h][key]))
+
+
+def format_batch_summary(merged: dict) -> str:
+    lines = [
+        f"Projects: {merged['projects']}  (failed: {merged['failed']})",
+        f"Tracks: {merged['tracks']}  FX: {merged['fx']}  "
+        f"Modulations: {merged['modulations']}  MIDI-linked: {merged['bound']}  "
+        f"CC: {merged['cc_bound']}",
+        f"Audio sends: {merged['audio_sends']}  MIDI sends: {merged['midi_sends']}",
+        "",
+        "MIDI CC usage (bindings / projects):",
+    ]
+    spread = merged['spread']['cc']
+    for cc, n in sorted(merged['cc'].items()):
+        lines.append(f"  CC {cc:3d}: {n:6d} / {spread[cc]}")
+    lines.append("")
+    lines.append("Channels: " + ', '.join(f"{k}:{n}" for k, n in sorted(merged['channel'].items())))
+    lines.append("Buses:    " + ', '.join(f"{k}:{n}" for k, n in sorted(merged['bus'].items())))
+    return '\n'.join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  MIDI replay
+# ═══════════════════════════════════════════════════════════════════════════
+
+REPLAY_CHUNK = 1 << 20         # events per chunk handed from reader to replay
+SMF_READ     = 4 * 1024 * 1024  # bytes read from a track chunk at a time
+MIDI_CODES   = 7 * 16 * 128     # (status 0x8-0xE, channel, number) dispatch codes
+
+
+def _vlq(buf, i: int) -> Tuple[int, int]:
+    value = 0
+    while True:
+        b = buf[i]
+        i += 1
+        value = (value << 7) | (b & 0x7F)
+        if not b & 0x80:
+            return value, i
+
+
+def _smf_track(path: str, start: int, length: int, chunk: int):
+    """
+    Stream one MTrk chunk as (ticks, status, data1, data2, tempo_ticks,
+    tempo_usec) arrays of up to `chunk` channel events.  Running status is
+    honoured; SysEx and meta events other than Set Tempo are skipped.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        left = length                       # bytes of the chunk not yet read
+        buf = b''
+        i = end = 0
+        tick = running = 0
+        ticks, status_b, d1_b, d2_b = [], bytearray(), bytearray(), bytearray()
+        tempo_t, tempo_v = [], []
+        while True:
+            if end - i < 64 and left:       # keep a whole event in the buffer
+                data = f.read(min(SMF_READ, left))
+                left -= len(data)
+                if not data:
+                    left = 0
+                buf = buf[i:] + data
+                i = 0
+                end = len(buf)
+            if i >= end:
+                break
+            try:
+                b = buf[i]
+                if b & 0x80:
+                    delta, i = _vlq(buf, i)
+                    tick += delta
+                else:                       # one-byte delta: nearly every event
+                    tick += b
+                    i += 1
+                b = buf[i]
+                if b & 0x80:
+                    st = b
+                    i += 1
+                else:
+                    st = running
+                if st < 0xF0:
+                    running = st
+                    ticks.append(tick)
+                    status_b.append(st)
+                    d1_b.append(buf[i])
+                    if st & 0xE0 == 0xC0:   # program change / channel pressure
+                        d2_b.append(0)
+                        i += 1
+                    else:
+                        d2_b.append(buf[i + 1])
+                        i += 2
+                    if len(ticks) >= chunk:
+                        yield (np.array(ticks, np.int64), np.frombuffer(status_b, np.uint8),
+                               np.frombuffer(d1_b, np.uint8), np.frombuffer(d2_b, np.uint8),
+                               np.array(tempo_t, np.int64), np.array(tempo_v, np.float64))
+                        ticks, status_b, d1_b, d2_b = [], bytearray(), bytearray(), bytearray()
+                        tempo_t, tempo_v = [], []
+                    continue
+                if st == 0xFF:
+                    meta = buf[i]
+                    size, i = _vlq(buf, i + 1)
+                    if meta == 0x51 and size == 3:
+                        tempo_t.append(tick)
+                        tempo_v.append(int.from_bytes(buf[i:i + 3], 'big'))
+                    elif meta == 0x2F:
+                        left = 0
+                        end = i
+                else:                       # SysEx F0 / escape F7
+                    size, i = _vlq(buf, i)
+            except IndexError:
+                raise ValueError(f"{path}: truncated MIDI track") from None
+            i += size
+            if i > end:                     # long SysEx/meta: skip in the file
+                f.seek(i - end, os.SEEK_CUR)
+                left -= i - end
+                buf = b''
+                i = end = 0
+        yield (np.array(ticks, np.int64), np.frombuffer(status_b, np.uint8),
+               np.frombuffer(d1_b, np.uint8), np.frombuffer(d2_b, np.uint8),
+               np.array(tempo_t, np.int64), np.array(tempo_v, np.float64))
+
+
+def read_smf(path: str, chunk: int = REPLAY_CHUNK):
+    """
+    Stream a Standard MIDI File as (seconds, status, data1, data2) chunks
+    in time order.  The tracks of a format 1 file are read side by side
+    and merged up to the lowest tick every track has reached, so memory
+    stays at a few chunks whatever the file length.
+    """
+    if np is None:
+        raise RuntimeError("MIDI replay requires NumPy")
+    tracks = []
+    with open(path, 'rb') as f:
+        head = f.read(14)
+        if head[:4] != b'MThd':
+            raise ValueError(f"{path}: not a Standard MIDI File")
+        if len(head) < 14:
+            raise ValueError(f"{path}: truncated MIDI file header")
+        division = struct.unpack('>H', head[12:14])[0]
+        if not division & 0x7FFF or division & 0x8000 and not division & 0xFF:
+            raise ValueError(f"{path}: bad MIDI time division {division:#06x}")
+        f.seek(8 + struct.unpack('>I', head[4:8])[0])
+        while True:
+            hdr = f.read(8)
+            if len(hdr) < 8:
+                break
+            size = struct.unpack('>I', hdr[4:8])[0]
+            if hdr[:4] == b'MTrk':
+                tracks.append((f.tell(), size))
+            f.seek(size, os.SEEK_CUR)
+
+    if division & 0x8000:                   # SMPTE: fixed ticks per second
+        fps = 256 - (division >> 8)
+        sec_per_tick = 1.0 / (fps * (division & 0xFF))
+        ppq = None
+    else:
+        ppq = division
+        sec_per_tick = 500000 / 1e6 / ppq   # 120 BPM until the first tempo event
+    seg_tick, seg_sec = 0, 0.0
+
+    readers = [_smf_track(path, start, size, chunk) for start, size in tracks]
+    bufs = [None] * len(readers)            # per track: the six arrays not yet emitted
+    while True:
+        # Every unfinished track needs buffered events to set the mark
+        for k, reader in enumerate(readers):
+            while reader is not None and (bufs[k] is None or not len(bufs[k][0])):
+                part = next(reader, None)
+                if part is None:
+                    reader = readers[k] = None
+                elif bufs[k] is None:
+                    bufs[k] = part
+                else:
+                    bufs[k] = tuple(np.concatenate(ab) for ab in zip(bufs[k], part))
+        if all(r is None for r in readers) and all(b is None for b in bufs):
+            return
+        # Emit everything up to the lowest tick an unfinished track has reached
+        marks = [bufs[k][0][-1] for k, r in enumerate(readers) if r is not None]
+        mark = min(marks) if marks else None
+        parts = []
+        for k, b in enumerate(bufs):
+            if b is None:
+                continue
+            if mark is None:
+                parts.append(b)
+                bufs[k] = None
+                continue
+            cut = int(np.searchsorted(b[0], mark, 'right'))
+            tcut = int(np.searchsorted(b[4], mark, 'right'))
+            parts.append(tuple(a[:cut] for a in b[:4]) + (b[4][:tcut], b[5][:tcut]))
+            rest = tuple(a[cut:] for a in b[:4]) + (b[4][tcut:], b[5][tcut:])
+            done = readers[k] is None and not len(rest[0]) and not len(rest[4])
+            bufs[k] = None if done else rest
+
+        ticks = np.concatenate([p[0] for p in parts])
+        order = np.argsort(ticks, kind='stable')
+        ticks = ticks[order]
+        status, d1, d2 = (np.concatenate([p[j] for p in parts])[order] for j in (1, 2, 3))
+
+        # Ticks to seconds through the tempo segments of this batch
+        seg_ticks, seg_secs, rates = [seg_tick], [seg_sec], [sec_per_tick]
+        t_ticks = np.concatenate([p[4] for p in parts])
+        if ppq is not None and len(t_ticks):
+            t_usec = np.concatenate([p[5] for p in parts])
+            o = np.argsort(t_ticks, kind='stable')
+            for tt, us in zip(t_ticks[o].tolist(), t_usec[o].tolist()):
+                seg_secs.append(seg_secs[-1] + (tt - seg_ticks[-1]) * rates[-1])
+                seg_ticks.append(tt)
+                rates.append(us / 1e6 / ppq)
+        seg_tick, seg_sec, sec_per_tick = seg_ticks[-1], seg_secs[-1], rates[-1]
+        if len(ticks):
+            seg = np.array(seg_ticks)
+            k = np.searchsorted(seg, ticks, 'right') - 1
+            yield (np.array(seg_secs)[k] + (ticks - seg[k]) * np.array(rates)[k],
+                   status, d1, d2)
+
+
+def read_midi_log(path: str, chunk: int = REPLAY_CHUNK):
+    """
+    Stream a text MIDI log (e.g. a recorded APC session) in the same
+    chunks as read_smf.  One message per line: time in seconds, then the
+    status and data bytes in hex ('12.5 B0 30 7F'); '#' starts a comment.
+    Only channel messages are kept.
+    """
+    if np is None:
+        raise RuntimeError("MIDI replay requires NumPy")
+    times, msgs = [], bytearray()
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line_no, line in enumerate(f, 1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            try:
+                t = float(fields[0])
+                msg = bytes(int(b, 16) for b in fields[1:4])
+            except ValueError:
+                raise ValueError(f"{path}:{line_no}: cannot parse {line.strip()!r}") from None
+            if not msg or not 0x80 <= msg[0] < 0xF0:
+                continue
+            times.append(t)
+            msgs += msg[:3].ljust(3, b'\0')
+            if len(times) >= chunk:
+                m = np.frombuffer(bytes(msgs), np.uint8).reshape(-1, 3)
+                yield np.array(times), m[:, 0], m[:, 1], m[:, 2]
+                times, msgs = [], bytearray()
+    if times:
+        m = np.frombuffer(bytes(msgs), np.uint8).reshape(-1, 3)
+        yield np.array(times), m[:, 0], m[:, 1], m[:, 2]
+
+
+def read_midi(path: str, chunk: int = REPLAY_CHUNK):
+    """read_smf for Standard MIDI Files, read_midi_log for anything else."""
+    with open(path, 'rb') as f:
+        smf = f.read(4) == b'MThd'
+    return read_smf(path, chunk) if smf else read_midi_log(path, chunk)
+
+
+class MIDIReplay:
+    """
+    Replays MIDI arriving on one track through the project's MIDI sends and
+    counts, per MIDI-linked parameter, the events that reach its MIDIPLINK
+    binding.  Routing is resolved once into a table from (message type,
+    input channel, number) to parameters: for each input channel,
+    RoutingIndex.reach() gives the channels it arrives on at every track,
+    with the sends' AUXRECV channel remapping applied.  A (track, channel)
+    reached over several paths counts once.
+
+    feed() takes time-ordered (seconds, status, data1, data2) chunks, so a
+    recording of any length is processed in constant memory.
+    """
+
+    def __init__(self, project: 'REAPERProject', track: int, bus: int = 0):
+        if np is None:
+            raise RuntimeError("MIDI replay requires NumPy")
+        self.project = project
+        self.track = track
+        self.bus = bus
+        self.params: List[ModRef] = []
+        codes, targets = [], []
+        index: Dict[ModRef, int] = {}
+        for ch in range(16):
+            reach = project.routing.reach(track, EDGE_MIDI, 1 << ch)
+            for ti, mask in reach.masks.items():
+                for fi, fx in enumerate(project.fx_list(ti)):
+                    for mi, mod in enumerate(fx.modulations):
+                        key = binding_key(mod)
+                        if key is None or key[0] != bus or not 0x80 <= key[2] <= 0xEF:
+                            continue
+                        if key[1] and not mask >> (key[1] - 1) & 1:   # 0 = omni
+                            continue
+                        ref = (ti, fi, mi)
+                        if ref not in index:
+                            index[ref] = len(self.params)
+                            self.params.append(ref)
+                        codes.append((((key[2] >> 4) - 8) * 16 + ch) * 128 + key[3])
+                        targets.append(index[ref])
+        # CSR from dispatch code to parameter ids
+        order = np.argsort(np.array(codes, np.int64), kind='stable')
+        codes_sorted = np.array(codes, np.int64)[order]
+        self._targets = np.array(targets, np.int64)[order]
+        self._start = np.searchsorted(codes_sorted, np.arange(MIDI_CODES + 1))
+        self._degree = np.diff(self._start)
+
+        n = len(self.params)
+        self.hits = np.zeros(n, np.int64)
+        self.first = np.full(n, np.nan)
+        self.last = np.full(n, np.nan)
+        self.peak = np.zeros(n, np.int64)           # most hits in one second
+        self.vmin = np.full(n, 255, np.int16)
+        self.vmax = np.full(n, -1, np.int16)
+        self.events = 0
+        self.routed = 0
+        self.duration = 0.0
+        self._carry = None                          # events of an unfinished second
+
+    def feed(self, seconds, status, data1, data2):
+        """Count one chunk.  The last second is held back until the next
+        chunk (or finish()), so per-second peaks span chunk boundaries."""
+        if self._carry is not None:
+            seconds, status, data1, data2 = (np.concatenate(ab) for ab in
+                                             zip(self._carry, (seconds, status, data1, data2)))
+            self._carry = None
+        if not len(seconds):
+            return
+        cut = int(np.searchsorted(seconds, np.floor(seconds[-1])))
+        self._carry = (seconds[cut:], status[cut:], data1[cut:], data2[cut:])
+        self._count(seconds[:cut], status[:cut], data1[:cut], data2[:cut])
+
+    def finish(self):
+        if self._carry is not None:
+            self._count(*self._carry)
+            self._carry = None
+
+    def _count(self, seconds, status, data1, data2):
+        if not len(seconds):
+            return
+        self.events += len(seconds)
+        self.duration = max(self.duration, float(seconds[-1]))
+        kind = (status >> 4).astype(np.int64) - 8
+        kind[(kind == 1) & (data2 == 0)] = 0        # Note On velocity 0 is a Note Off
+        # Program change / channel pressure carry their value in data1;
+        # pressure and pitch bend are bound with number 0
+        one_byte = (kind == 4) | (kind == 5)
+        value = np.where(one_byte, data1, data2)
+        number = np.where(kind >= 5, 0, data1)
+        code = (kind * 16 + (status & 0x0F)) * 128 + number
+        deg = self._degree[code]
+        hit = np.flatnonzero(deg)
+        if not hit.size:
+            return
+        self.routed += hit.size
+        # One row per (event, parameter) pair, in time order
+        deg = deg[hit]
+        rows = np.repeat(hit, deg)
+        k = np.arange(len(rows)) - np.repeat(np.cumsum(deg) - deg, deg)
+        param = self._targets[self._start[code[rows]] + k]
+        t = seconds[rows]
+        value = value[rows].astype(np.int16)
+
+        n = len(self.params)
+        self.hits += np.bincount(param, minlength=n)
+        ids, at = np.unique(param, return_index=True)
+        fresh = np.isnan(self.first[ids])
+        self.first[ids[fresh]] = t[at[fresh]]
+        ids, at = np.unique(param[::-1], return_index=True)
+        self.last[ids] = t[::-1][at]
+        np.minimum.at(self.vmin, param, value)
+        np.maximum.at(self.vmax, param, value)
+        per_sec, count = np.unique(np.floor(t).astype(np.int64) * n + param, return_counts=True)
+        np.maximum.at(self.peak, per_sec % n, count)
+
+    def rows(self) -> List[dict]:
+        """Per-parameter results, most hit first."""
+        tracks = self.project.tracks
+        out = []
+        for p in np.argsort(-self.hits, kind='stable'):
+            ti, fi, mi = self.params[p]
+            fx = self.project.fx_list(ti)[fi]
+            mod = fx.modulations[mi]
+            hit = int(self.hits[p])
+            out.append({
+                'track': ti + 1, 'track_name': tracks[ti].name or '',
+                'fx': fx.name, 'param': mod.param_name,
+                'bus': mod.midi_bus, 'channel': mod.midi_channel,
+                'msg_type': mod.midi_msg_type,
+                'number': mod.midi_cc if mod.midi_cc is not None else mod.midi_note,
+                'hits': hit,
+                'first_s': round(float(self.first[p]), 4) if hit else None,
+                'last_s': round(float(self.last[p]), 4) if hit else None,
+                'peak_per_s': int(self.peak[p]),
+                'value_min': int(self.vmin[p]) if hit else None,
+                'value_max': int(self.vmax[p]) if hit else None,
+            })
+        return out
+
+
+def find_track(project: 'REAPERProject', spec: str) -> int:
+    """Track index from a 1-based number or a (case-insensitive) name."""
+    tracks = project.tracks
+    if spec.isdigit() and 1 <= int(spec) <= len(tracks):
+        return int(spec) - 1
+    names = [(t.name or '').lower() for t in tracks]
+    for want in (lambda n: n == spec.lower(), lambda n: spec.lower() in n):
+        found = [ti for ti, n in enumerate(names) if want(n)]
+        if found:
+            return found[0]
+    raise ValueError(f"no track {spec!r}")
+
+
+def format_replay(replay: MIDIReplay, seconds: float) -> str:
+    track = replay.project.tracks[replay.track]
+    lines = [f"Replayed {replay.events:,} events ({replay.duration:.1f} s of MIDI) into "
+             f"[{replay.track + 1}] {track.name or 'unnamed'} in {seconds:.2f} s "
+             f"({replay.events / max(seconds, 1e-9):,.0f} events/s); "
+             f"{replay.routed:,} reached a binding.", '']
+    rows = replay.rows()
+    if not rows:
+        lines.append("No MIDI-linked parameter is reachable from this track.")
+        return '\n'.join(lines)
+    lines.append(f"{'hits':>10} {'peak/s':>7} {'first s':>9} {'last s':>9} {'values':>8}  "
+                 f"binding        parameter")
+    for r in rows:
+        kind = 'CC' if r['msg_type'] == MSG_CC else f"{r['msg_type']}"
+        binding = f"{kind} {r['number']} ch{r['channel']} b{r['bus']}"
+        when = (f"{r['first_s']:>9.2f} {r['last_s']:>9.2f} {r['value_min']:>3}-{r['value_max']:<4}"
+                if r['hits'] else f"{'-':>9} {'-':>9} {'-':>8}")
+        lines.append(f"{r['hits']:>10,} {r['peak_per_s']:>7} {when}  {binding:<14} "
+                     f"[{r['track']}] {r['track_name']} / {r['fx']} / {r['param']}")
+    return '\n'.join(lines)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  APC mini pad map
+# ═══════════════════════════════════════════════════════════════════════════
+
+APC_PADS = 64           # APC mini mk2 grid: notes 0-63, bottom-left first
+APC_ROW  = 8
+MSG_NOTE = 144
+
+# JS plugins that claim APC pads, by file name: (role, window slider, slots,
+# highest window start, input channel slider, output type slider, output
+# channel slider).  Sliders are 1-based, None where the plugin has no such
+# setting; channel sliders read 0 = omni / follow input, n = channel n.
+# Roles: 'toggle' turns pads into CCs or notes, 'led' drives the pad LEDs,
+# 'view' only mirrors pad state.  Two instances only clash in the same role,
+# so a toggle and its LED feedback may share a window.
+PAD_PLUGINS = {
+    'midi_cc_toggle.jsfx':            ('toggle', 3, 16, 112, 1, 5, 4),
+    'midi_cc_to_apc_mini_color.jsfx': ('led',    3, 16, 112, 1, None, None),
+    'akai_apc_mini_blinker.jsfx':     ('led',    1, 1,  77,  None, None, None),
+    'aka _toggle_template.jsfx':      ('view',   3, 16, 112, 1, None, None),
+}
+
+
+def _channel_mask(value) -> int:
+    return ALL_CHANNELS if not value else 1 << (int(value) - 1 & 0x0F)
+
+
+class PadClaim:
+    """One JS instance's pad window and, for toggles, what it sends."""
+    __slots__ = ('track', 'fx', 'plugin', 'role', 'start', 'slots', 'max_start',
+                 'in_mask', 'out_msg', 'out_ch', 'links')
+
+    def __init__(self, track: int, fx: int, plugin: str, sliders: List[Optional[float]]):
+        role, win, slots, max_start, in_sl, type_sl, ch_sl = PAD_PLUGINS[plugin]
+
+        def get(n):
+            v = sliders[n - 1] if n and n <= len(sliders) else None
+            return int(v) if v is not None else 0
+
+        self.track     = track
+        self.fx        = fx
+        self.plugin    = plugin
+        self.role      = role
+        self.start     = get(win)
+        self.slots     = slots
+        self.max_start = max_start
+        self.in_mask   = _channel_mask(get(in_sl))
+        self.out_msg   = None if role != 'toggle' else (MSG_NOTE if get(type_sl) else MSG_CC)
+        self.out_ch    = get(ch_sl)             # 0 = same channel as the input
+        self.links: List[Tuple[ModRef, int, int]] = []   # (ref, channel, number) driven
+
+    def out_mask(self, out_ch: Optional[int] = None) -> int:
+        out_ch = self.out_ch if out_ch is None else out_ch
+        return self.in_mask if not out_ch else _channel_mask(out_ch)
+
+    @property
+    def pads(self) -> range:
+        return range(self.start, self.start + self.slots)
+
+
+class PadMap:
+    """
+    Which JS instances claim which APC pads, and where they collide.
+
+    Toggles send their pad window's numbers (CC or note) down the chain and
+    through the MIDI sends; an explicit-channel MIDIPLINK that hears them is
+    taken to be driven on purpose (claim.links).  conflicts lists
+    (kind, claim, other) with kind:
+      'pad'     two instances of one role share pads on a common input channel
+      'output'  two toggles send the same numbers on a common channel into a
+                track both reach
+      'omni'    an omni-channel MIDIPLINK (other is its ModRef) hears a toggle,
+                so a pad press also moves that parameter
+    """
+
+    def __init__(self, project: 'REAPERProject'):
+        self.project = project
+        self.claims: List[PadClaim] = []
+        self._hear: Dict[tuple, list] = {}
+        for ti in range(len(project.tracks)):
+            for fi, fx in enumerate(project.fx_list(ti)):
+                plugin = os.path.basename(fx.name.replace('\\', '/'))
+                if fx.type == 'JS' and plugin in PAD_PLUGINS and fx.sliders is not None:
+                    self.claims.append(PadClaim(ti, fi, plugin, fx.sliders))
+        for c in self.claims:
+            if c.out_msg is not None:
+                c.links = [h for h in self._hearers(c, c.out_ch) if h[1] and h[2] in c.pads]
+        self.conflicts = self._conflicts()
+
+    def _hearers(self, c: PadClaim, out_ch: int) -> List[Tuple[ModRef, int, int]]:
+        """Bus-0 MIDIPLINKs of c's message type that hear what c sends on out_ch."""
+        key = (c.track, c.fx, c.out_msg, c.out_mask(out_ch))
+        hit = self._hear.get(key)
+        if hit is not None:
+            return hit
+        project = self.project
+        hit = []
+        for ti, mask in project.routing.reach(c.track, EDGE_MIDI, key[3]).masks.items():
+            for fi, fx in enumerate(project.fx_list(ti)):
+                if ti == c.track and fi <= c.fx:
+                    continue
+                for mi, mod in enumerate(fx.modulations):
+                    k = binding_key(mod)
+                    if k is None or k[0] != 0 or k[2] != c.out_msg:
+                        continue
+                    if k[1] and not mask >> (k[1] - 1) & 1:     # 0 = omni
+                        continue
+                    hit.append(((ti, fi, mi), k[1], k[3]))
+        self._hear[key] = hit
+        return hit
+
+    def _clash(self, a: PadClaim, a_start: int, a_out: int,
+               b: PadClaim, b_start: int, b_out: int) -> Optional[str]:
+        if not (a_start < b_start + b.slots and b_start < a_start + a.slots):
+            return None
+        if a.role == b.role != 'view' and a.in_mask & b.in_mask:
+            return 'pad'
+        if a.out_msg is not None and a.out_msg == b.out_msg and a.out_mask(a_out) & b.out_mask(b_out):
+            reach = self.project.routing.reach
+            ra = reach(a.track, EDGE_MIDI, a.out_mask(a_out)).masks
+            rb = reach(b.track, EDGE_MIDI, b.out_mask(b_out)).masks
+            if any(ra[t] & m for t, m in rb.items() if t in ra):
+                return 'output'
+        return None
+
+    def _stray(self, c: PadClaim, start: int, out_ch: int) -> List[ModRef]:
+        """MIDIPLINKs c would drive at (start, out_ch) besides its own links."""
+        if c.out_msg is None:
+            return []
+        own = {h[0] for h in c.links}
+        return [h[0] for h in self._hearers(c, out_ch)
+                if start <= h[2] < start + c.slots and h[0] not in own]
+
+    def _conflicts(self) -> List[Tuple[str, PadClaim, object]]:
+        found = []
+        for i, a in enumerate(self.claims):
+            for b in self.claims[i + 1:]:
+                kind = self._clash(a, a.start, a.out_ch, b, b.start, b.out_ch)
+                if kind:
+                    found.append((kind, a, b))
+            found += [('omni', a, ref) for ref in self._stray(a, a.start, a.out_ch)]
+        return found
+
+    def grid(self) -> List[List[PadClaim]]:
+        """Claims per note 0-127."""
+        cells = [[] for _ in range(128)]
+        for c in self.claims:
+            for n in c.pads:
+                if 0 <= n < 128:
+                    cells[n].append(c)
+        return cells
+
+    def assign(self) -> List[Tuple[str, tuple, int, int]]:
+        """
+        Move clashing instances to free windows and output channels and
+        write the result back as slider and MIDIPLINK edits.
+
+        Instances on one track that share a window start move together (a
+        toggle with its LED feedback), as long as they do not clash with each
+        other: a group holds at most one toggle, and an instance that clashes
+        with every group so far starts a new one.  In track order, a group keeps its
+        place if it clashes with no group placed before it; otherwise the
+        first free setting is taken: its own window on another output channel
+        (colouring the output clash graph), then window starts packed from
+        the bottom of the grid, whole rows first, then any start on the grid,
+        then past it up to the slider's limit.  Links of a moved toggle
+        follow it, so each parameter stays on its pad.  Returns the changes:
+        ('window' | 'channel', (track, fx), old, new) and
+        ('link', ModRef, old number, new number); groups without a free
+        setting stay where they are and remain in conflicts.
+        """
+        groups: Dict[Tuple[int, int, int], List[PadClaim]] = {}
+        for c in self.claims:
+            k = 0
+            while (c.track, c.start, k) in groups:
+                group = groups[(c.track, c.start, k)]
+                if not ((c.out_msg is not None and any(g.out_msg is not None for g in group)) or
+                        any(self._clash(c, c.start, c.out_ch, g, g.start, g.out_ch)
+                            for g in group)):
+                    break
+                k += 1
+            groups.setdefault((c.track, c.start, k), []).append(c)
+        placed: List[Tuple[PadClaim, int, int]] = []
+        moves = []
+
+        def fits(group, start, out_ch):
+            for c in group:
+                ch = out_ch if c.out_msg is not None else c.out_ch
+                if self._stray(c, start, ch):
+                    return False
+                for p, p_start, p_out in placed:
+                    if self._clash(c, start, ch, p, p_start, p_out):
+                        return False
+            return True
+
+        for (_, start, _), group in sorted(groups.items()):
+            toggles = [c for c in group if c.out_msg is not None]
+            out_ch = toggles[0].out_ch if toggles else 0
+            slots = max(c.slots for c in group)
+            limit = min(c.max_start for c in group)
+            choice = None
+            if fits(group, start, out_ch):
+                choice = (start, out_ch)
+            else:
+                channels = [out_ch] + [ch for ch in range(17) if ch != out_ch] if toggles else [out_ch]
+                in_grid = range(0, APC_PADS - slots + 1)
+                starts = ([start] + [s for s in in_grid if s % APC_ROW == 0] +
+                          [s for s in in_grid if s % APC_ROW] +
+                          list(range(APC_PADS - slots + 1, limit + 1)))
+                for s in starts:
+                    if s > limit:
+                        continue
+                    for ch in channels:
+                        if fits(group, s, ch):
+                            choice = (s, ch)
+                            break
+                    if choice:
+                        break
+            if choice is None:
+                choice = (start, out_ch)
+            elif choice != (start, out_ch):
+                moves.append((group, start, out_ch) + choice)
+            placed += [(c, choice[0], choice[1] if c.out_msg is not None else c.out_ch)
+                       for c in group]
+
+        return self._write(moves)
+
+    def _write(self, moves) -> List[Tuple[str, tuple, int, int]]:
+        project = self.project
+        changes = []
+        moving = {id(c) for m in moves for c in m[0]}
+        # a MIDIPLINK also driven by an instance that stays keeps its binding
+        followed = {h[0] for c in self.claims if id(c) not in moving for h in c.links}
+        for group, old_start, old_ch, new_start, new_ch in moves:
+            for c in group:
+                win_slider = PAD_PLUGINS[c.plugin][1]
+                if new_start != old_start and project.set_js_slider(c.track, c.fx, win_slider,
+                                                                    new_start):
+                    changes.append(('window', (c.track, c.fx), old_start, new_start))
+                c.start = new_start
+                if c.out_msg is None:
+                    continue
+                if new_ch != old_ch and project.set_js_slider(c.track, c.fx,
+                                                              PAD_PLUGINS[c.plugin][6], new_ch):
+                    changes.append(('channel', (c.track, c.fx), old_ch, new_ch))
+                for ref, ch, number in c.links:
+                    if ref in followed:
+                        continue
+                    followed.add(ref)
+                    mod = project.fx_list(ref[0])[ref[1]].modulations[ref[2]]
+                    new_number = number - old_start + new_start
+                    if project.update_midi_cc(*ref, new_number, new_ch or ch, mod.midi_bus,
+                                              c.out_msg):
+                        changes.append(('link', ref, number, new_number))
+                c.out_ch = new_ch
+        self._hear.clear()                  # bindings moved
+        for c in self.claims:
+            if c.out_msg is not None:
+                c.links = [h for h in self._hearers(c, c.out_ch) if h[1] and h[2] in c.pads]
+        self.conflicts = self._conflicts()
+        return changes
+
+
+def _claim_label(project: 'REAPERProject', c: PadClaim) -> str:
+    return f"[{c.track + 1}] {project.tracks[c.track].name or 'unnamed'} / FX {c.fx + 1} {c.plugin}"
+
+
+def _ref_label(project: 'REAPERProject', ref: ModRef) -> str:
+    fx = project.fx_list(ref[0])[ref[1]]
+    mod = fx.modulations[ref[2]]
+    return f"[{ref[0] + 1}] {project.tracks[ref[0]].name or 'unnamed'} / {fx.name} / {mod.param_name}"
+
+
+def format_pad_map(pads: PadMap, changes=None) -> str:
+    """The 8×8 grid (top row first) with one letter per instance, then the
+    legend, conflicts and changes."""
+    project = pads.project
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+    label = {id(c): letters[i % len(letters)] for i, c in enumerate(pads.claims)}
+    clashing = set()
+    for kind, a, b in pads.conflicts:
+        if kind != 'omni':
+            clashing.update(n for n in a.pads if n in b.pads)
+    cells = pads.grid()
+    lines = ["APC mini pads (top row first; * = conflict, + = shared by roles):"]
+    for row in range(APC_PADS // APC_ROW - 1, -1, -1):
+        marks = []
+        for n in range(row * APC_ROW, (row + 1) * APC_ROW):
+            owners = cells[n]
+            marks.append('*' if n in clashing else '.' if not owners else
+                         label[id(owners[0])] if len(owners) == 1 else '+')
+        lines.append(f"  {row * APC_ROW:>3}  {' '.join(marks)}")
+    lines.append('')
+    if not pads.claims:
+        lines.append("No APC pad plugins in this project.")
+    for c in pads.claims:
+        out = ''
+        if c.out_msg is not None:
+            out = (f"  out {'CC' if c.out_msg == MSG_CC else 'note'} "
+                   f"ch {channel_mask_label(c.out_mask())}, {len(c.links)} linked")
+        lines.append(f"  {label[id(c)]}  {c.role:<6} pads {c.start}-{c.start + c.slots - 1:<4} "
+                     f"in ch {channel_mask_label(c.in_mask)}{out}  {_claim_label(project, c)}")
+    if pads.conflicts:
+        lines += ['', f"{len(pads.conflicts)} conflicts:"]
+        for kind, a, b in pads.conflicts:
+            other = _ref_label(project, b) if kind == 'omni' else f"{label[id(b)]} {b.plugin}"
+            lines.append(f"  {kind:<7} {label[id(a)]} {a.plugin} × {other}")
+    if changes is not None:
+        lines += ['', f"{len(changes)} changes:" if changes else "No changes needed."]
+        for what, ref, old, new in changes:
+            where = (_ref_label(project, ref) if what == 'link' else
+                     f"[{ref[0] + 1}] {project.tracks[ref[0]].name or 'unnamed'} / FX {ref[1] + 1}")
+            lines.append(f"  {what:<7} {old:>3} → {new:<3} {where}")
+    return '\n'.join(lines)
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 #  Colors
@@ -267,12 +2374,684 @@ AUDIO_COLOR  = '#4a9eff'
 MIDI_COLOR   = '#ff7043'
 BOTH_COLOR   = '#ffcc00'
 FOLDER_COLOR = '#66bb6a'
+LOOP_COLOR   = '#ff5252'
 NODE_FILL    = '#2d2d2d'
 NODE_OUTLINE = '#888888'
 NODE_TEXT    = '#eeeeee'
 BG_COLOR     = '#1a1a1a'
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+#  Spatial grid
+# ═══════════════════════════════════════════════════════════════════════════
+
+class SpatialGrid:
+    """
+    Uniform grid over 2-D points (graph nodes in world coordinates), so a
+    hit test or box query only looks at the few cells it overlaps.
+    """
+
+    def __init__(self, cell: float = 64.0):
+        self.cell = cell
+        self._cells: Dict[Tuple[int, int], set] = {}
+        self._pos: Dict[int, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pos)
+
+    def _key(self, x: float, y: float) -> Tuple[int, int]:
+        return int(x // self.cell), int(y // self.cell)
+
+    def clear(self):
+        self._cells.clear()
+        self._pos.clear()
+
+    def set(self, item: int, x: float, y: float):
+        old = self._pos.get(item)
+        key = self._key(x, y)
+        self._pos[item] = (x, y)
+        if old is not None:
+            old_key = self._key(*old)
+            if old_key == key:
+                return
+            cell = self._cells[old_key]
+            cell.discard(item)
+            if not cell:
+                del self._cells[old_key]
+        self._cells.setdefault(key, set()).add(item)
+
+    def remove(self, item: int):
+        old = self._pos.pop(item, None)
+        if old is not None:
+            key = self._key(*old)
+            cell = self._cells[key]
+            cell.discard(item)
+            if not cell:
+                del self._cells[key]
+
+    def _cells_in(self, x0, y0, x1, y1):
+        gx0, gy0 = self._key(x0, y0)
+        gx1, gy1 = self._key(x1, y1)
+        if (gx1 - gx0 + 1) * (gy1 - gy0 + 1) > len(self._cells):
+            # Query wider than the occupied grid (zoomed far out)
+            return [cell for (gx, gy), cell in self._cells.items()
+                    if gx0 <= gx <= gx1 and gy0 <= gy <= gy1]
+        cells = self._cells
+        return [cells[gx, gy] for gx in range(gx0, gx1 + 1) for gy in range(gy0, gy1 + 1)
+                if (gx, gy) in cells]
+
+    def nearest(self, x: float, y: float, radius: float) -> Optional[int]:
+        """The item closest to (x, y) within radius, or None."""
+        best, best_d = None, radius * radius
+        pos = self._pos
+        for cell in self._cells_in(x - radius, y - radius, x + radius, y + radius):
+            for item in cell:
+                px, py = pos[item]
+                d = (px - x) ** 2 + (py - y) ** 2
+                if d <= best_d:
+                    best, best_d = item, d
+        return best
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> List[int]:
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        pos = self._pos
+        return [item for cell in self._cells_in(x0, y0, x1, y1) for item in cell
+                if x0 <= pos[item][0] <= x1 and y0 <= pos[item][1] <= y1]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Graph layout
+# ═══════════════════════════════════════════════════════════════════════════
+
+CIRCLE_MAX_NODES = 40      # 'Auto' keeps the circle up to this many tracks
+LAYER_GAP = 220            # world units between layers (layered layout)
+NODE_GAP  = 90             # world units between nodes in a layer / grid
+FORCE_EDGE_LEN = 120       # ideal edge length of the force-directed layout
+LAYOUT_POLL_MS = 40        # how often the Tk thread picks up layout progress
+GRAVITY = 1.0              # pull towards the origin, relative to repulsion
+
+
+def circle_layout(n: int) -> List[Tuple[float, float]]:
+    cx, cy = 450, 320
+    r = min(280, max(100, n * 22))
+    return [(cx + r * math.cos(2 * math.pi * i / n - math.pi / 2),
+             cy + r * math.sin(2 * math.pi * i / n - math.pi / 2)) for i in range(n)]
+
+
+def layered_layout(n: int, edges: List[Tuple[int, int]],
+                   sweeps: int = 4) -> List[Tuple[float, float]]:
+    """
+    Sugiyama-style layout for the (mostly acyclic) send graph: back edges
+    found by DFS are reversed, nodes go to their longest-path layer, and
+    barycenter sweeps order each layer to reduce crossings.  Unconnected
+    tracks are packed in a grid below.  Pure Python; O(V + E) per sweep.
+    """
+    succ: List[List[int]] = [[] for _ in range(n)]
+    for a, b in edges:
+        if a != b:
+            succ[a].append(b)
+
+    # Break cycles: edges to a node still on the DFS stack are reversed
+    state = [0] * n                     # 0 new, 1 on stack, 2 done
+    dag: List[List[int]] = [[] for _ in range(n)]
+    for root in range(n):
+        if state[root]:
+            continue
+        state[root] = 1
+        stack = [(root, iter(succ[root]))]
+        while stack:
+            v, it = stack[-1]
+            for w in it:
+                if state[w] == 1:
+                    dag[w].append(v)
+                else:
+                    dag[v].append(w)
+                    if state[w] == 0:
+                        state[w] = 1
+                        stack.append((w, iter(succ[w])))
+                    break
+            else:
+                state[v] = 2
+                stack.pop()
+
+    # Longest-path layering in topological order
+    indeg = [0] * n
+    for v in range(n):
+        for w in dag[v]:
+            indeg[w] += 1
+    layer = [0] * n
+    order = [v for v in range(n) if indeg[v] == 0]
+    for v in order:                     # order grows while iterating
+        for w in dag[v]:
+            layer[w] = max(layer[w], layer[v] + 1)
+            indeg[w] -= 1
+            if indeg[w] == 0:
+                order.append(w)
+
+    nbrs: List[List[int]] = [[] for _ in range(n)]
+    for v in range(n):
+        for w in dag[v]:
+            nbrs[v].append(w)
+            nbrs[w].append(v)
+    linked = [v for v in range(n) if nbrs[v]]
+    loose  = [v for v in range(n) if not nbrs[v]]
+
+    layers: Dict[int, List[int]] = {}
+    for v in linked:
+        layers.setdefault(layer[v], []).append(v)
+    rank = [0.0] * n
+    for members in layers.values():
+        for i, v in enumerate(members):
+            rank[v] = i / len(members)
+    for sweep in range(sweeps):
+        keys = sorted(layers) if sweep % 2 == 0 else sorted(layers, reverse=True)
+        for k in keys:
+            members = layers[k]
+            members.sort(key=lambda v: sum(rank[w] for w in nbrs[v]) / len(nbrs[v]))
+            for i, v in enumerate(members):
+                rank[v] = i / len(members)
+
+    pos: List[Tuple[float, float]] = [(0.0, 0.0)] * n
+    tallest = max((len(m) for m in layers.values()), default=0)
+    for k, members in layers.items():
+        top = (tallest - len(members)) * NODE_GAP / 2
+        for i, v in enumerate(members):
+            pos[v] = (k * LAYER_GAP, top + i * NODE_GAP)
+    if loose:
+        cols = max(1, int(math.ceil(math.sqrt(len(loose)))))
+        base = tallest * NODE_GAP + (NODE_GAP * 2 if linked else 0)
+        for i, v in enumerate(loose):
+            pos[v] = ((i % cols) * NODE_GAP, base + (i // cols) * NODE_GAP)
+    return pos
+
+
+def force_layout(n: int, edges: List[Tuple[int, int]],
+                 init: Optional[List[Tuple[float, float]]] = None,
+                 iterations: int = 80, seed: int = 1,
+                 progress=None, progress_every: int = 10,
+                 stop=None) -> List[Tuple[float, float]]:
+    """
+    Fruchterman–Reingold layout vectorised with NumPy.  Repulsion is
+    grid-approximated: occupied cells of a grid about two edge lengths wide
+    repel each other through their centroids and nodes sharing a cell
+    repel exactly, so an iteration costs O(cells² + V · cell size + E)
+    instead of O(V²).
+
+    progress(positions) is called every progress_every iterations and
+    stop() is polled to abort early; both may run on a worker thread.
+    """
+    if np is None:
+        raise RuntimeError("force layout requires NumPy")
+    k = float(FORCE_EDGE_LEN)
+    rng = np.random.default_rng(seed)
+    if init is not None:
+        pos = np.array(init, dtype=float).reshape(-1, 2)
+    else:
+        pos = rng.uniform(0, k * math.sqrt(n), (n, 2))
+    if n < 2:
+        return [tuple(p) for p in pos.tolist()]
+    pos -= pos.mean(axis=0)
+    pos += rng.uniform(-1, 1, pos.shape)          # separate coincident starts
+    e = np.array([(a, b) for a, b in edges if a != b], dtype=np.intp).reshape(-1, 2)
+    src, dst = e[:, 0], e[:, 1]
+    k2 = k * k
+    eps = 1e-2
+    temp = k * math.sqrt(n) / 8
+    cool = (1.0 / 200) ** (1.0 / iterations)     # temperature ends at 1/200
+
+    for it in range(iterations):
+        if stop is not None and stop():
+            break
+        # ── Grid-approximated repulsion ────────────────────────────────
+        lo = pos.min(axis=0)
+        span = np.ptp(pos, axis=0) + 1e-6
+        g = np.clip(span // (2 * k) + 1, 1, 24).astype(np.intp)    # cells per axis
+        ij = np.minimum(((pos - lo) * (g / span)).astype(np.intp), g - 1)
+        cells = int(g[0] * g[1])
+        cid = ij[:, 0] * g[1] + ij[:, 1]
+        mass = np.bincount(cid, minlength=cells).astype(float)
+        sx = np.bincount(cid, weights=pos[:, 0], minlength=cells)
+        sy = np.bincount(cid, weights=pos[:, 1], minlength=cells)
+        occ = np.flatnonzero(mass)
+        m = mass[occ]
+        sums = np.stack([sx[occ], sy[occ]], axis=1)
+        cent = sums / m[:, None]
+
+        # Far field: cells push each other through their centroids, and
+        # every node takes its cell's share.  Near field: a node feels its
+        # cell-mates exactly.
+        slot = np.empty(cells, dtype=np.intp)
+        slot[occ] = np.arange(len(occ))
+        own = slot[cid]
+        dc = cent[:, None, :] - cent[None, :, :]                 # C × C × 2
+        fc = k2 * m[None, :] / (np.einsum('ijk,ijk->ij', dc, dc) + eps)
+        np.fill_diagonal(fc, 0.0)
+        disp = np.einsum('ijk,ij->ik', dc, fc)[own]
+        order = np.argsort(cid, kind='stable')
+        size = mass[cid[order]].astype(np.intp)                  # cell-mates of each
+        first = np.searchsorted(cid[order], cid[order])          # cell start, sorted
+        a = np.repeat(order, size)
+        b = order[np.repeat(first, size) + np.arange(size.sum())
+                  - np.repeat(np.cumsum(size) - size, size)]
+        dv = pos[a] - pos[b]
+        push = dv * (k2 / ((dv * dv).sum(axis=1) + eps))[:, None]
+        disp[:, 0] += np.bincount(a, weights=push[:, 0], minlength=n)
+        disp[:, 1] += np.bincount(a, weights=push[:, 1], minlength=n)
+
+        # ── Edge attraction ────────────────────────────────────────────
+        if len(e):
+            dv = pos[src] - pos[dst]
+            pull = dv * (np.sqrt((dv * dv).sum(axis=1)) / k)[:, None]
+            for axis in (0, 1):
+                disp[:, axis] -= np.bincount(src, weights=pull[:, axis], minlength=n)
+                disp[:, axis] += np.bincount(dst, weights=pull[:, axis], minlength=n)
+
+        disp -= pos * GRAVITY                   # keeps the layout about k·√V across
+
+        length = np.sqrt((disp * disp).sum(axis=1)) + 1e-9
+        pos += disp * (np.minimum(length, temp) / length)[:, None]
+        temp *= cool
+        if progress is not None and (it + 1) % progress_every == 0:
+            progress([tuple(p) for p in pos.tolist()])
+    return [tuple(p) for p in pos.tolist()]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+#  Offscreen export
+# ═══════════════════════════════════════════════════════════════════════════
+
+EXPORT_MAX_PX = 4096       # longest side of an exported PNG
+EXPORT_MARGIN = 60         # px around the graph drawing
+EXPORT_FLUSH  = 1 << 16    # output bytes buffered between writes
+
+
+def routing_edges(project) -> List[Tuple[int, int]]:
+    """Sends plus folder links, as drawn."""
+    tracks = project.tracks
+    r = project.routing
+    edges = {(s, d) for s, d in zip(r.src, r.dst) if s != d}
+    for ti, t in enumerate(tracks):
+        if t.folder_depth > 0 and ti + 1 < len(tracks):
+            edges.add((ti, ti + 1))
+    return sorted(edges)
+
+
+def project_layout(project, mode: str = 'Auto') -> List[Tuple[float, float]]:
+    """
+    Node positions computed synchronously (for export).  'Auto' is the
+    circle up to CIRCLE_MAX_NODES tracks and the layered layout above;
+    'Force' refines the layered layout when NumPy is available.
+    """
+    n = len(project.tracks)
+    if mode == 'Auto':
+        mode = 'Circle' if n <= CIRCLE_MAX_NODES else 'Layered'
+    if mode == 'Circle' or n == 0:
+        return circle_layout(n)
+    edges = routing_edges(project)
+    positions = layered_layout(n, edges)
+    if mode == 'Force' and np is not None:
+        positions = force_layout(n, edges, init=positions)
+    return positions
+
+
+def _rgb(color: str) -> bytes:
+    """'#rgb' or '#rrggbb' as three bytes."""
+    h = color[1:]
+    return bytes.fromhex(''.join(c * 2 for c in h) if len(h) == 3 else h)
+
+
+class SVGWriter:
+    """Streams SVG elements to a binary file, EXPORT_FLUSH bytes at a time."""
+    __slots__ = ('f', '_buf', '_size', '_defs')
+    TEXT = True
+
+    def __init__(self, f, width: int, height: int, bg: str = BG_COLOR):
+        self.f = f
+        self._buf: List[str] = []
+        self._size = 0
+        self._defs: set = set()
+        self._emit('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                   f'viewBox="0 0 {width} {height}" font-family="Arial, sans-serif">\n'
+                   f'<rect width="100%" height="100%" fill="{bg}"/>\n')
+
+    def _emit(self, s: str):
+        self._buf.append(s)
+        self._size += len(s)
+        if self._size >= EXPORT_FLUSH:
+            self.flush()
+
+    def flush(self):
+        self.f.write(''.join(self._buf).encode('utf-8'))
+        self._buf = []
+        self._size = 0
+
+    def _arrow(self, color: str) -> str:
+        """Id of the arrowhead marker in this color, defined on first use."""
+        mid = 'arrow' + color[1:]
+        if mid not in self._defs:
+            self._defs.add(mid)
+            self._emit(f'<defs><marker id="{mid}" viewBox="0 0 10 10" refX="10" refY="5" '
+                       f'markerWidth="5" markerHeight="5" orient="auto">'
+                       f'<path d="M0,0L10,5L0,10z" fill="{color}"/></marker></defs>\n')
+        return mid
+
+    def line(self, pts, color: str, width: float = 1, dash=None, arrow: bool = False):
+        """Polyline through pts, or a quadratic curve for three points."""
+        xy = [f'{v:.1f}' for v in pts]
+        if len(pts) == 6:
+            d = f'M{xy[0]},{xy[1]}Q{xy[2]},{xy[3]} {xy[4]},{xy[5]}'
+        else:
+            d = f'M{xy[0]},{xy[1]}' + ''.join(f'L{xy[k]},{xy[k+1]}' for k in range(2, len(xy), 2))
+        extra = ''
+        if dash:
+            extra += f' stroke-dasharray="{",".join(map(str, dash))}"'
+        if arrow:
+            extra += f' marker-end="url(#{self._arrow(color)})"'
+        self._emit(f'<path d="{d}" fill="none" stroke="{color}" stroke-width="{width}"{extra}/>\n')
+
+    def circle(self, x: float, y: float, r: float, fill: str, outline: str, width: float = 1):
+        self._emit(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="{r:.1f}" fill="{fill}" '
+                   f'stroke="{outline}" stroke-width="{width}"/>\n')
+
+    def rect(self, x0: float, y0: float, x1: float, y1: float, fill: str,
+             outline: Optional[str] = None):
+        stroke = f' stroke="{outline}"' if outline else ''
+        self._emit(f'<rect x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}" '
+                   f'fill="{fill}"{stroke}/>\n')
+
+    def text(self, x: float, y: float, s: str, color: str, size: int,
+             bold: bool = False, anchor: str = 'middle', angle: float = 0):
+        """Text centred vertically on y; angle in degrees counter-clockwise."""
+        extra = ' font-weight="bold"' if bold else ''
+        if angle:
+            extra += f' transform="rotate({-angle} {x:.1f} {y:.1f})"'
+        self._emit(f'<text x="{x:.1f}" y="{y:.1f}" fill="{color}" font-size="{size}" '
+                   f'text-anchor="{anchor}" dominant-baseline="central"{extra}>'
+                   f'{html.escape(s, quote=False)}</text>\n')
+
+    def checker(self, x: int, y: int, w: int, h: int, cell: int,
+                colors: Tuple[str, str], grid: str):
+        """Two-colour checkerboard of cell-sized squares with grid lines."""
+        c0, c1 = colors
+        self._emit(f'<defs><pattern id="checker" x="{x}" y="{y}" width="{2*cell}" '
+                   f'height="{2*cell}" patternUnits="userSpaceOnUse">'
+                   f'<rect width="{2*cell}" height="{2*cell}" fill="{c0}"/>'
+                   f'<rect x="{cell}" width="{cell}" height="{cell}" fill="{c1}"/>'
+                   f'<rect y="{cell}" width="{cell}" height="{cell}" fill="{c1}"/>'
+                   f'<path d="M0,0.5H{2*cell}M0,{cell+0.5}H{2*cell}'
+                   f'M0.5,0V{2*cell}M{cell+0.5},0V{2*cell}" stroke="{grid}"/>'
+                   f'</pattern></defs>\n'
+                   f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="url(#checker)"/>\n')
+
+    def close(self):
+        self._emit('</svg>\n')
+        self.flush()
+
+
+class PNGWriter:
+    """
+    Minimal RGB rasterizer with the SVGWriter drawing calls.  Text is not
+    rendered (there is no font engine), so PNG exports are unlabelled.
+    Rows are deflated and written as IDAT chunks on close().
+    """
+    __slots__ = ('f', 'width', 'height', 'px')
+    TEXT = False
+
+    def __init__(self, f, width: int, height: int, bg: str = BG_COLOR):
+        self.f = f
+        self.width = width
+        self.height = height
+        self.px = bytearray(_rgb(bg) * (width * height))
+
+    def _span(self, y: int, x0: int, x1: int, rgb: bytes):
+        """Fill pixels x0 <= x < x1 of row y."""
+        if 0 <= y < self.height:
+            x0 = max(0, x0)
+            x1 = min(self.width, x1)
+            if x0 < x1:
+                i = (y * self.width + x0) * 3
+                self.px[i:i + (x1 - x0) * 3] = rgb * (x1 - x0)
+
+    def _segment(self, x0, y0, x1, y1, rgb: bytes, width: int, dash):
+        px, W, H = self.px, self.width, self.height
+        steps = int(max(abs(x1 - x0), abs(y1 - y0))) or 1
+        sx = (x1 - x0) / steps
+        sy = (y1 - y0) / steps
+        thick = range(-(width // 2), width - width // 2)
+        steep = abs(y1 - y0) > abs(x1 - x0)
+        period = sum(dash) if dash else 0
+        for k in range(steps + 1):
+            if period and k % period >= dash[0]:
+                continue
+            x = int(x0 + sx * k)
+            y = int(y0 + sy * k)
+            for t in thick:
+                xx, yy = (x + t, y) if steep else (x, y + t)
+                if 0 <= xx < W and 0 <= yy < H:
+                    i = (yy * W + xx) * 3
+                    px[i:i + 3] = rgb
+
+    def line(self, pts, color: str, width: float = 1, dash=None, arrow: bool = False):
+        rgb, w = _rgb(color), max(1, int(width))
+        if len(pts) == 6:                   # quadratic curve as 8 segments
+            ax, ay, cx, cy, bx, by = pts
+            pts = []
+            for k in range(9):
+                t = k / 8
+                u = 1 - t
+                pts += (u*u*ax + 2*u*t*cx + t*t*bx, u*u*ay + 2*u*t*cy + t*t*by)
+        for k in range(0, len(pts) - 2, 2):
+            self._segment(*pts[k:k + 4], rgb, w, dash)
+        if arrow:
+            ex, ey = pts[-2], pts[-1]
+            ang = math.atan2(ey - pts[-3], ex - pts[-4])
+            size = 5 + 3 * w
+            for da in (2.7, -2.7):          # ~155° either side of the direction
+                self._segment(ex, ey, ex + size * math.cos(ang + da),
+                              ey + size * math.sin(ang + da), rgb, w, None)
+
+    def circle(self, x: float, y: float, r: float, fill: str, outline: str, width: float = 1):
+        out_rgb, in_rgb = _rgb(outline), _rgb(fill)
+        inner = r - max(1, width)
+        for dy in range(-int(r), int(r) + 1):
+            h = int(math.sqrt(max(0.0, r * r - dy * dy)))
+            self._span(int(y) + dy, int(x) - h, int(x) + h + 1, out_rgb)
+            if abs(dy) <= inner:
+                h = int(math.sqrt(max(0.0, inner * inner - dy * dy)))
+                self._span(int(y) + dy, int(x) - h, int(x) + h + 1, in_rgb)
+
+    def rect(self, x0: float, y0: float, x1: float, y1: float, fill: str,
+             outline: Optional[str] = None):
+        x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
+        rgb = _rgb(fill)
+        for y in range(y0, y1):
+            self._span(y, x0, x1, rgb)
+        if outline:
+            rgb = _rgb(outline)
+            self._span(y0, x0, x1, rgb)
+            self._span(y1 - 1, x0, x1, rgb)
+            for y in range(y0, y1):
+                self._span(y, x0, x0 + 1, rgb)
+                self._span(y, x1 - 1, x1, rgb)
+
+    def text(self, *args, **kw):
+        pass
+
+    def checker(self, x: int, y: int, w: int, h: int, cell: int,
+                colors: Tuple[str, str], grid: str):
+        """Two-colour checkerboard; each pixel row is one of a few patterns."""
+        c0, c1, g = _rgb(colors[0]), _rgb(colors[1]), _rgb(grid)
+        lines = cell >= 8
+
+        def row(first, second):
+            one = (g if lines else first) + first * (cell - 1) + \
+                  (g if lines else second) + second * (cell - 1)
+            return (one * (w // (2 * cell) + 1))[:w * 3]
+
+        rows = (row(c0, c1), row(c1, c0), g * w)
+        for yy in range(h):
+            band = (yy // cell) & 1
+            r = rows[2] if lines and yy % cell == 0 else rows[band]
+            if 0 <= y + yy < self.height:
+                x0 = max(0, x)
+                x1 = min(self.width, x + w)
+                i = ((y + yy) * self.width + x0) * 3
+                self.px[i:i + (x1 - x0) * 3] = r[(x0 - x) * 3:(x1 - x) * 3]
+
+    def close(self):
+        f, W = self.f, self.width
+
+        def chunk(tag: bytes, data: bytes):
+            f.write(struct.pack('>I', len(data)) + tag + data +
+                    struct.pack('>I', zlib.crc32(tag + data)))
+
+        f.write(b'\x89PNG\r\n\x1a\n')
+        chunk(b'IHDR', struct.pack('>IIBBBBB', W, self.height, 8, 2, 0, 0, 0))
+        z = zlib.compressobj(6)
+        view = memoryview(self.px)
+        stride = W * 3
+        out: List[bytes] = []
+        size = 0
+        for y in range(self.height):
+            for part in (z.compress(b'\0'), z.compress(view[y * stride:(y + 1) * stride])):
+                if part:
+                    out.append(part)
+                    size += len(part)
+            if size >= EXPORT_FLUSH:
+                chunk(b'IDAT', b''.join(out))
+                out = []
+                size = 0
+        out.append(z.flush())
+        chunk(b'IDAT', b''.join(out))
+        chunk(b'IEND', b'')
+
+
+EXPORT_FORMATS = {'svg': SVGWriter, 'png': PNGWriter}
+
+
+def export_graph(f, project, fmt: str = 'svg',
+                 positions: Optional[List[Tuple[float, float]]] = None,
+                 layout: str = 'Auto', max_px: int = EXPORT_MAX_PX) -> Tuple[int, int]:
+    """
+    Draw the node graph as the routing window shows it with nothing
+    selected, writing to the binary file f.  SVG keeps world units; PNG is
+    scaled to fit max_px.  Returns the image size.
+    """
+    writer = EXPORT_FORMATS[fmt]
+    tracks = project.tracks
+    n = len(tracks)
+    if positions is None:
+        positions = project_layout(project, layout)
+    xs = [x for x, _ in positions] or [0]
+    ys = [y for _, y in positions] or [0]
+    x0, y0 = min(xs), min(ys)
+    m = EXPORT_MARGIN
+    scale = 1.0
+    if writer is PNGWriter:
+        scale = min(1.0, (max_px - 2 * m) / (max(max(xs) - x0, max(ys) - y0) or 1))
+    width = int((max(xs) - x0) * scale) + 2 * m
+    height = int((max(ys) - y0) * scale) + 2 * m
+    out = writer(f, width, height)
+
+    at = [((x - x0) * scale + m, (y - y0) * scale + m) for x, y in positions]
+    labels = writer.TEXT and scale >= 0.5
+    R = max(22, 28 * scale) if labels else max(3, 28 * scale)
+    fs = max(7, int(9 * scale))
+    lw = max(1, int(2 * scale))
+    r = project.routing
+    drawn: set = set()
+
+    def edge(src, dst, color, dash=None):
+        if src == dst or (src, dst) in drawn:
+            return
+        drawn.add((src, dst))
+        (sx, sy), (dx, dy) = at[src], at[dst]
+        mx = (sx + dx) / 2 + (dy - sy) * 0.18
+        my = (sy + dy) / 2 + (sx - dx) * 0.18
+        out.line((sx, sy, mx, my, dx, dy), color, lw, dash, arrow=True)
+
+    for e in range(len(r.conns)):
+        k = r.kind[e]
+        edge(r.src[e], r.dst[e], BOTH_COLOR if k == EDGE_AUDIO | EDGE_MIDI else
+             (MIDI_COLOR if k & EDGE_MIDI else AUDIO_COLOR))
+    for ti, track in enumerate(tracks):
+        if track.folder_depth > 0 and ti + 1 < n:
+            edge(ti, ti + 1, FOLDER_COLOR, dash=(6, 3))
+
+    for i, track in enumerate(tracks):
+        x, y = at[i]
+        out.circle(x, y, R, NODE_FILL, AUDIO_COLOR if r.degree(i) else NODE_OUTLINE, lw)
+        if not labels:
+            continue
+        lbl = track.name or f'T{i+1}'
+        if len(lbl) > 12:
+            lbl = lbl[:11] + '…'
+        out.text(x, y - 4, lbl, NODE_TEXT, fs, bold=True)
+        nfx = len(track.fx_list or ())
+        if nfx:
+            out.text(x, y + fs, f'{nfx} FX', '#aaa', max(6, fs - 1))
+    out.close()
+    return width, height
+
+
+def export_matrix(f, project, fmt: str = 'svg',
+                  max_px: int = EXPORT_MAX_PX) -> Tuple[int, int]:
+    """
+    Draw the full send matrix to the binary file f.  PNG has no header
+    bands and shrinks cells (down to 1 px) to fit max_px.  Returns the
+    image size.
+    """
+    writer = EXPORT_FORMATS[fmt]
+    tracks = project.tracks
+    n = len(tracks)
+    cell, LW, LH = RoutingWindow.CELL, RoutingWindow.LW, RoutingWindow.LH
+    if not writer.TEXT:
+        LW = LH = 0
+        cell = max(1, min(cell, max_px // max(n, 1)))
+    width, height = LW + n * cell + 4, LH + n * cell + 4
+    out = writer(f, width, height)
+    out.checker(LW, LH, n * cell, n * cell, cell, ('#2d2d2d', '#272727'), '#333333')
+
+    if writer.TEXT:
+        for j, track in enumerate(tracks):
+            x0 = LW + j * cell
+            out.rect(x0, 0, x0 + cell, LH, '#2a2a2a', '#444')
+            out.text(x0 + cell / 2, LH / 2, (track.name or f'T{j+1}')[:8], '#ccc', 8, angle=45)
+        for i, track in enumerate(tracks):
+            y0 = LH + i * cell
+            out.rect(0, y0, LW, y0 + cell, '#222', '#444')
+            out.text(6, y0 + cell / 2, f'{i+1}. {(track.name or f"T{i+1}")[:24]}',
+                     '#ccc', 8, anchor='start')
+        out.text(LW / 2, LH / 2, 'SRC \\ DST', '#888', 8, bold=True)
+    if cell >= 8:
+        for i in range(n):
+            out.line((LW + i * cell, LH + i * cell, LW + (i + 1) * cell, LH + (i + 1) * cell), '#444')
+
+    r = project.routing
+    p = 5 if cell >= 16 else 0
+    seen: set = set()
+    for e in range(len(r.conns)):
+        si, di = r.src[e], r.dst[e]
+        if (si, di) in seen:
+            continue
+        seen.add((si, di))
+        k = r.kind[e]
+        if k == EDGE_AUDIO | EDGE_MIDI:
+            color, sym = BOTH_COLOR, '♪M'
+        elif k & EDGE_MIDI:
+            color, sym = MIDI_COLOR, 'M'
+        else:
+            color, sym = AUDIO_COLOR, '♪'
+        x0, y0 = LW + di * cell, LH + si * cell
+        out.rect(x0 + p, y0 + p, x0 + cell - p, y0 + cell - p, color)
+        if writer.TEXT:
+            out.text(x0 + cell / 2, y0 + cell / 2, sym, 'white', 8, bold=True)
+    out.close()
+    return width, height
+
+
 # ═══════════════════════════════════════════════════════════════════════════
 #  Routing Visualisation Window
 # ═══════════════════════════════════════════════════════════════════════════
@@ -293,13 +3072,36 @@ class RoutingWindow:
         self._selected_node: Optional[int] = None
         self._drag_moved = False
 
+        # Retained graph items: redrawn in full only when styling changes;
+        # drags, pans and zooms adjust these in place.
+        self._node_items: Dict[int, Tuple[int, Optional[int], Optional[int]]] = {}   # oval, label, caption
+        self._edge_items: Dict[Tuple[int, int], Tuple[int, Optional[int]]] = {}   # line, label
+        self._node_edges: Dict[int, List[Tuple[int, int]]] = {}
+        self._redraw_job = None
+        self._curves = True                 # level of detail of the last full draw
+        self._clustered = False
+
+        self._grid = SpatialGrid()          # mirrors _node_pos for hit tests
+        self._multi_sel: set = set()        # box-selected nodes
+        self._band = None                   # (x0, y0, rect item) while box-selecting
+
+        # Background layout: a worker thread posts snapshots to _layout_queue
+        # and _poll_layout applies them on the Tk thread
+        self._layout_mode  = tk.StringVar(value='Auto')
+        self._layout_stop: Optional[threading.Event] = None
+        self._layout_queue: Optional[queue.Queue] = None
+        self._layout_job = None
+
         # Graph filter state — must exist before _draw_graph is first called
         self._gf_audio   = tk.BooleanVar(value=True)
         self._gf_midi    = tk.BooleanVar(value=True)
-        self._gf_midi_ch = tk.StringVar(value='All')
+        self._gf_ch_mask = ALL_CHANNELS      # MIDI channels shown (bit n = ch n)
         self._gf_ch_dir  = tk.StringVar(value='either')
+        self._gf_trace   = tk.StringVar(value='off')   # 'off', 'MIDI', 'audio'
+        self._trace: Optional[Reach] = None            # last traced selection
 
         self._build_ui()
+        self.win.bind('<Destroy>', lambda e: e.widget is self.win and self._stop_layout())
         self._layout_nodes()
         self._refresh_all()
 
@@ -320,10 +3122,20 @@ class RoutingWindow:
         self._build_graph_tab()
         self._build_matrix_tab()
         self._build_list_tab()
-        nb.bind('<<NotebookTabChanged>>', lambda e: self._refresh_all())
+        nb.bind('<<NotebookTabChanged>>', self._refresh_visible)
+        self.nb = nb
+        self._stale: set = set()            # tab indexes needing a redraw
 
     # ── Node graph ───────────────────────────────────────────────────────
 
+    # Level of detail: below these scales labels are dropped, edges become
+    # straight lines, and edges between nearby nodes merge per cluster pair
+    LOD_LABELS   = 0.5
+    LOD_CURVES   = 0.35
+    LOD_CLUSTERS = 0.2
+    CLUSTER_PX   = 48       # cluster cell size on screen
+    CULL_MARGIN  = 150      # px drawn beyond the canvas so short pans show no gaps
+
     def _build_graph_tab(self):
         # ── Row 1: legend + reset ────────────────────────────────────────
         tb = tk.Frame(self.graph_frame, bg='#252525')
@@ -333,9 +3145,16 @@ class RoutingWindow:
         tk.Label(tb, text='━ MIDI',       bg='#252525', fg=MIDI_COLOR,   font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=4)
         tk.Label(tb, text='━ Audio+MIDI', bg='#252525', fg=BOTH_COLOR,   font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=4)
         tk.Label(tb, text='╌ Folder',     bg='#252525', fg=FOLDER_COLOR, font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=4)
+        tk.Button(tb, text='⤓ Export…', bg='#333', fg='#ddd', relief=tk.FLAT,
+                  command=self._export, padx=8).pack(side=tk.RIGHT, padx=(0, 6), pady=3)
         tk.Button(tb, text='⟳ Reset layout', bg='#333', fg='#ddd', relief=tk.FLAT,
                   command=self._reset_layout, padx=8).pack(side=tk.RIGHT, padx=6, pady=3)
-        tk.Label(tb, text='Drag nodes • Scroll to zoom', bg='#252525', fg='#555',
+        lm = ttk.Combobox(tb, textvariable=self._layout_mode, state='readonly', width=8,
+                          values=['Auto', 'Circle', 'Layered', 'Force'])
+        lm.pack(side=tk.RIGHT, pady=3)
+        lm.bind('<<ComboboxSelected>>', lambda e: self._reset_layout())
+        tk.Label(tb, text='Drag nodes • Shift+drag to box-select • Scroll to zoom',
+                 bg='#252525', fg='#555',
                  font=('Arial', 8)).pack(side=tk.RIGHT, padx=8)
 
         # ── Row 2: connection filters ────────────────────────────────────
@@ -354,11 +3173,10 @@ class RoutingWindow:
         tk.Label(fb, text='│', bg='#1e1e1e', fg='#444').pack(side=tk.LEFT, padx=4)
         tk.Label(fb, text='MIDI ch:', bg='#1e1e1e', fg='#aaa', font=('Arial', 9)).pack(side=tk.LEFT, padx=(4,2))
 
-        ch_options = ['All'] + [str(i) for i in range(0, 16)]
-        ch_menu = ttk.Combobox(fb, textvariable=self._gf_midi_ch, values=ch_options,
-                                width=5, state='readonly')
-        ch_menu.pack(side=tk.LEFT, padx=2)
-        ch_menu.bind('<<ComboboxSelected>>', lambda e: self.win.after(10, self._draw_graph))
+        def set_graph_channels(mask):
+            self._gf_ch_mask = mask
+            self._draw_graph()
+        self._gf_ch_reset = self._channel_menu(fb, '#1e1e1e', set_graph_channels)
 
         tk.Label(fb, text='as:', bg='#1e1e1e', fg='#aaa', font=('Arial', 9)).pack(side=tk.LEFT, padx=(6,2))
         for val, txt in [('src','src'), ('dst','dst'), ('either','either')]:
@@ -367,6 +3185,14 @@ class RoutingWindow:
                            activebackground='#1e1e1e',
                            command=self._draw_graph).pack(side=tk.LEFT, padx=2)
 
+        tk.Label(fb, text='│', bg='#1e1e1e', fg='#444').pack(side=tk.LEFT, padx=4)
+        tk.Label(fb, text='Trace:', bg='#1e1e1e', fg='#aaa', font=('Arial', 9)).pack(side=tk.LEFT, padx=(4,2))
+        for val in ('off', 'MIDI', 'audio'):
+            tk.Radiobutton(fb, text=val, variable=self._gf_trace, value=val,
+                           bg='#1e1e1e', fg='#ccc', selectcolor='#333',
+                           activebackground='#1e1e1e',
+                           command=self._draw_graph).pack(side=tk.LEFT, padx=2)
+
         tk.Button(fb, text='✕ clear', bg='#2a2a2a', fg='#aaa', relief=tk.FLAT,
                   font=('Arial', 8),
                   command=self._graph_filter_clear).pack(side=tk.RIGHT, padx=8, pady=2)
@@ -376,6 +3202,9 @@ class RoutingWindow:
         self.gc.bind('<ButtonPress-1>',   self._gp)
         self.gc.bind('<B1-Motion>',       self._gd)
         self.gc.bind('<ButtonRelease-1>', self._gr)
+        self.gc.bind('<Shift-ButtonPress-1>',   self._band_start)
+        self.gc.bind('<Shift-B1-Motion>',       self._band_drag)
+        self.gc.bind('<Shift-ButtonRelease-1>', self._band_end)
         self.gc.bind('<MouseWheel>',      self._gz)
         self.gc.bind('<Button-4>',        self._gz)
         self.gc.bind('<Button-5>',        self._gz)
@@ -385,57 +3214,171 @@ class RoutingWindow:
         self._tip = tk.Label(self.graph_frame, text='', bg='#333', fg='#eee',
                               font=('Arial', 8), relief=tk.FLAT, padx=4, pady=2)
 
+    def _channel_menu(self, parent, bg, on_change):
+        """
+        Menubutton for picking any set of MIDI channels.  on_change(mask) gets
+        the 16-bit selection; the returned function resets it to all channels.
+        """
+        mb = tk.Menubutton(parent, text='All', width=9, bg='#333', fg='#ddd',
+                           activebackground='#444', relief=tk.FLAT, font=('Arial', 9))
+        mb.pack(side=tk.LEFT, padx=2)
+        menu = tk.Menu(mb, tearoff=False)
+        chans = [tk.BooleanVar(value=True) for _ in range(16)]
+
+        def changed():
+            mask = sum(1 << ch for ch, v in enumerate(chans) if v.get())
+            mb.config(text=channel_mask_label(mask))
+            on_change(mask)
+
+        def set_all(on, notify=True):
+            for v in chans:
+                v.set(on)
+            if notify:
+                changed()
+            else:
+                mb.config(text=channel_mask_label(ALL_CHANNELS if on else 0))
+
+        menu.add_command(label='All channels', command=lambda: set_all(True))
+        menu.add_command(label='No channels',  command=lambda: set_all(False))
+        menu.add_separator()
+        for ch, v in enumerate(chans):
+            menu.add_checkbutton(label=f'Ch {ch}', variable=v, command=changed)
+        mb['menu'] = menu
+        return lambda: set_all(True, notify=False)
+
     def _graph_filter_clear(self):
         self._gf_audio.set(True)
         self._gf_midi.set(True)
-        self._gf_midi_ch.set('All')
+        self._gf_ch_mask = ALL_CHANNELS
+        self._gf_ch_reset()
         self._gf_ch_dir.set('either')
+        self._gf_trace.set('off')
         self._selected_node = None
         self.win.after(10, self._draw_graph)
 
-    def _send_passes_filter(self, send: dict) -> bool:
-        """Return True if this send should be visible given current graph filters."""
+    def _send_filter(self):
+        """
+        Predicate for the current graph filters, with the widget state read
+        once per redraw.  The MIDI channel test is a bitwise AND of the
+        selected channels against the send's src/dst channel masks.
+        """
         show_audio = self._gf_audio.get()
         show_midi  = self._gf_midi.get()
-        ch_filter  = self._gf_midi_ch.get()   # 'All' or '1'..'16'
+        mask       = self._gf_ch_mask
         ch_dir     = self._gf_ch_dir.get()    # 'src', 'dst', 'either'
 
-        ha = send.get('has_audio', False)
-        hm = send.get('has_midi',  False)
-
-        # Type visibility
-        visible_audio = ha and show_audio
-        visible_midi  = hm and show_midi
-
-        if not visible_audio and not visible_midi:
-            return False
+        if mask == ALL_CHANNELS:
+            def passes(send: Connection) -> bool:
+                return (send.has_audio and show_audio) or (send.has_midi and show_midi)
+            return passes
 
-        # MIDI channel filter (only applies when a specific channel is chosen)
-        if visible_midi and ch_filter != 'All':
-            # Both dropdown and Ch labels are now 0-based
-            wanted = f'Ch {ch_filter}'
-            src_ch = send.get('midi_src_ch') or ''
-            dst_ch = send.get('midi_dst_ch') or ''
+        def passes(send: Connection) -> bool:
+            if send.has_audio and show_audio:
+                return True
+            if not (send.has_midi and show_midi):
+                return False
             if ch_dir == 'src':
-                ch_ok = (src_ch == wanted)
-            elif ch_dir == 'dst':
-                ch_ok = (dst_ch == wanted)
-            else:  # either
-                ch_ok = (src_ch == wanted or dst_ch == wanted)
-            if not ch_ok:
-                visible_midi = False
-
-        return visible_audio or visible_midi
+                return bool(send.src_mask & mask)
+            if ch_dir == 'dst':
+                return bool(send.dst_mask & mask)
+            return bool((send.src_mask | send.dst_mask) & mask)
+        return passes
 
     def _layout_nodes(self):
+        """
+        Place nodes with the chosen engine.  'Auto' keeps the circle for
+        small projects; otherwise the layered layout is shown at once and,
+        with NumPy available, refined by a force layout on a worker thread.
+        """
+        self._stop_layout()
+        self._grid.clear()
         n = len(self.project.tracks)
         if n == 0:
             return
-        cx, cy = 450, 320
-        r = min(280, max(100, n * 22))
-        for i in range(n):
-            a = 2 * math.pi * i / n - math.pi / 2
-            self._node_pos[i] = (cx + r * math.cos(a), cy + r * math.sin(a))
+        mode = self._layout_mode.get()
+        if mode == 'Auto':
+            mode = 'Circle' if n <= CIRCLE_MAX_NODES else 'Force'
+        if mode == 'Circle':
+            self._set_positions(circle_layout(n))
+            return
+        edges = routing_edges(self.project)
+        positions = layered_layout(n, edges)
+        self._set_positions(positions)
+        self._fit_view()
+        if mode == 'Force' and np is not None:
+            self._start_force_layout(n, edges, positions)
+
+    def _set_positions(self, positions):
+        for i, (x, y) in enumerate(positions):
+            self._node_pos[i] = (x, y)
+            self._grid.set(i, x, y)
+
+    def _fit_view(self):
+        """Scale and centre the view on all nodes (never zooming in past 1:1)."""
+        if not self._node_pos:
+            return
+        xs = [x for x, _ in self._node_pos.values()]
+        ys = [y for _, y in self._node_pos.values()]
+        w, h = self._canvas_size()
+        margin = 60
+        s = min(1.0, (w - 2 * margin) / ((max(xs) - min(xs)) or 1),
+                     (h - 2 * margin) / ((max(ys) - min(ys)) or 1))
+        self._scale = s
+        self._offset = [(w - (max(xs) + min(xs)) * s) / 2,
+                        (h - (max(ys) + min(ys)) * s) / 2]
+
+    def _canvas_size(self) -> Tuple[int, int]:
+        w, h = self.gc.winfo_width(), self.gc.winfo_height()
+        if w < 50 or h < 50:                    # not mapped yet
+            return 1060, 600
+        return w, h
+
+    def _view_rect(self) -> Tuple[float, float, float, float]:
+        """World rectangle worth drawing: the canvas plus CULL_MARGIN."""
+        m = self.CULL_MARGIN
+        w, h = self._canvas_size()
+        return (*self._s2w(-m, -m), *self._s2w(w + m, h + m))
+
+    def _start_force_layout(self, n, edges, init):
+        stop, q = threading.Event(), queue.Queue()
+        self._layout_stop, self._layout_queue = stop, q
+
+        def run():
+            positions = force_layout(n, edges, init, stop=stop.is_set,
+                                     progress=lambda p: q.put((False, p)))
+            q.put((True, positions))
+
+        threading.Thread(target=run, daemon=True).start()
+        self._layout_job = self.win.after(LAYOUT_POLL_MS, self._poll_layout)
+
+    def _poll_layout(self):
+        """Apply the newest layout snapshot; Tk is only touched from here."""
+        latest = None
+        try:
+            while True:
+                latest = self._layout_queue.get_nowait()
+        except queue.Empty:
+            pass
+        if latest is not None:
+            done, positions = latest
+            self._set_positions(positions)
+            if done:
+                self._layout_job = None
+                self._fit_view()
+                self._draw_graph()
+                return
+            for i in self._node_items.keys() | self._node_edges.keys():
+                self._move_node(i)
+        self._layout_job = self.win.after(LAYOUT_POLL_MS, self._poll_layout)
+
+    def _stop_layout(self):
+        """Abandon a running background layout, keeping its last snapshot."""
+        if self._layout_stop is not None:
+            self._layout_stop.set()
+            self._layout_stop = None
+        if self._layout_job is not None:
+            self.win.after_cancel(self._layout_job)
+            self._layout_job = None
 
     def _reset_layout(self):
         self._node_pos.clear()
@@ -444,6 +3387,30 @@ class RoutingWindow:
         self._layout_nodes()
         self._draw_graph()
 
+    def _export(self):
+        """Save the graph (as currently laid out) or, from the matrix tab,
+        the full matrix as SVG or PNG."""
+        if not self.project.tracks:
+            return
+        view = 'matrix' if self.nb.index('current') == 1 else 'graph'
+        fp = filedialog.asksaveasfilename(
+            parent=self.win, title=f"Export {view}", defaultextension='.svg',
+            filetypes=[("SVG image", "*.svg"), ("PNG image", "*.png")])
+        if not fp:
+            return
+        fmt = 'png' if fp.lower().endswith('.png') else 'svg'
+        try:
+            with open(fp, 'wb') as f:
+                if view == 'matrix':
+                    export_matrix(f, self.project, fmt)
+                else:
+                    n = len(self.project.tracks)
+                    positions = ([self._node_pos[i] for i in range(n)]
+                                 if len(self._node_pos) >= n else None)
+                    export_graph(f, self.project, fmt, positions)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export:\n{str(e)}", parent=self.win)
+
     def _w2s(self, wx, wy):
         s = self._scale; ox, oy = self._offset
         return wx * s + ox, wy * s + oy
@@ -453,17 +3420,15 @@ class RoutingWindow:
         return (sx - ox) / s, (sy - oy) / s
 
     def _node_at(self, sx, sy):
-        R = 30 * self._scale
-        for i, (wx, wy) in self._node_pos.items():
-            cx, cy = self._w2s(wx, wy)
-            if math.hypot(sx - cx, sy - cy) <= R:
-                return i
-        return None
+        # Hit radius in screen pixels, never smaller than the drawn node
+        R = max(30 * self._scale, self._node_radius())
+        return self._grid.nearest(*self._s2w(sx, sy), R / self._scale)
 
     def _gp(self, e):
         nd = self._node_at(e.x, e.y)
         self._drag_moved = False
         if nd is not None:
+            self._stop_layout()             # the user takes over placement
             self._drag_node = nd
             wx, wy = self._node_pos[nd]
             sx, sy = self._w2s(wx, wy)
@@ -477,13 +3442,23 @@ class RoutingWindow:
         if self._drag_node is not None:
             dx, dy = self._drag_off
             wx, wy = self._s2w(e.x - dx, e.y - dy)
-            self._node_pos[self._drag_node] = (wx, wy)
+            ox, oy = self._node_pos[self._drag_node]
+            # A box-selected node drags the whole selection with it
+            group = self._multi_sel if self._drag_node in self._multi_sel else (self._drag_node,)
+            for i in group:
+                x, y = self._node_pos[i]
+                self._node_pos[i] = (x + wx - ox, y + wy - oy)
+                self._grid.set(i, *self._node_pos[i])
+                self._move_node(i)
+            if self._clustered:             # merged edges are not retained
+                self._schedule_redraw()
         else:
             px, py = self._drag_off
             self._offset[0] += e.x - px
             self._offset[1] += e.y - py
             self._drag_off = (e.x, e.y)
-        self._draw_graph()
+            self.gc.move('world', e.x - px, e.y - py)
+            self._schedule_redraw()         # bring in what the pan uncovered
 
     def _gr(self, e):
         """Release: if no drag, treat as selection click."""
@@ -493,67 +3468,158 @@ class RoutingWindow:
                 self._selected_node = None if nd == self._selected_node else nd
             else:
                 self._selected_node = None
+                self._multi_sel = set()
             self._draw_graph()
         self._drag_node = None
 
+    def _band_start(self, e):
+        rect = self.gc.create_rectangle(e.x, e.y, e.x, e.y, outline='#aaaaaa', dash=(3, 2))
+        self._band = (e.x, e.y, rect)
+
+    def _band_drag(self, e):
+        if self._band is not None:
+            x0, y0, rect = self._band
+            self.gc.coords(rect, x0, y0, e.x, e.y)
+
+    def _band_end(self, e):
+        """Select every node inside the rubber band (an empty band clears)."""
+        if self._band is None:
+            return
+        x0, y0, rect = self._band
+        self._band = None
+        self.gc.delete(rect)
+        self._multi_sel = set(self._grid.in_rect(*self._s2w(x0, y0), *self._s2w(e.x, e.y)))
+        self._draw_graph()
+
     def _gz(self, e):
         f = 1.1 if (e.num == 4 or e.delta > 0) else 0.9
         self._offset[0] = e.x + (self._offset[0] - e.x) * f
         self._offset[1] = e.y + (self._offset[1] - e.y) * f
         self._scale *= f
-        self._draw_graph()
+        # Scale the existing items now; fonts, widths and minimum sizes
+        # catch up in one full redraw once the wheel stops.
+        self.gc.scale('world', e.x, e.y, f, f)
+        self._schedule_redraw()
+
+    def _schedule_redraw(self, delay=150):
+        if self._redraw_job is not None:
+            self.win.after_cancel(self._redraw_job)
+        self._redraw_job = self.win.after(delay, self._draw_graph)
 
     def _gt(self, e):
         nd = self._node_at(e.x, e.y)
         if nd is not None and nd < len(self.project.tracks):
             t = self.project.tracks[nd]
-            midi_sends  = sum(1 for s in t['sends']    if s['has_midi'])
-            audio_sends = sum(1 for s in t['sends']    if s['has_audio'])
-            midi_recv   = sum(1 for r in t['receives'] if r['has_midi'])
-            audio_recv  = sum(1 for r in t['receives'] if r['has_audio'])
-            tip = (f"[{nd+1}] {t['name'] or 'unnamed'} | {len(t['fx_list'])} FX | "
-                   f"Audio sends:{audio_sends} recv:{audio_recv} | "
-                   f"MIDI sends:{midi_sends} recv:{midi_recv}")
+            r = self.project.routing
+            nfx = '…' if t.fx_list is None else len(t.fx_list)
+            tip = (f"[{nd+1}] {t.name or 'unnamed'} | {nfx} FX | "
+                   f"Audio sends:{r.audio_out[nd]} recv:{r.audio_in[nd]} | "
+                   f"MIDI sends:{r.midi_out[nd]} recv:{r.midi_in[nd]}")
+            trace = self._trace
+            if trace is not None and nd in trace.via:
+                tip += f" | {len(trace.path_to(nd))} hop(s) from [{trace.start+1}]"
+                if trace.kind == EDGE_MIDI:
+                    tip += f", arrives on ch {channel_mask_label(trace.masks[nd])}"
             self._tip.config(text=tip)
             self._tip.place(x=e.x + 12, y=e.y - 20)
         else:
             self._tip.place_forget()
 
+    def _node_radius(self) -> int:
+        if self._scale < self.LOD_LABELS:   # unlabelled dots may shrink
+            return max(3, int(28 * self._scale))
+        return max(22, int(28 * self._scale))
+
+    def _font_size(self) -> int:
+        return max(7, int(9 * self._scale))
+
+    def _edge_coords(self, src, dst):
+        """Screen points of the edge src→dst (curved unless zoomed far out)
+        and of its label."""
+        sx, sy = self._w2s(*self._node_pos[src])
+        dx, dy = self._w2s(*self._node_pos[dst])
+        if not self._curves:
+            return (sx, sy, dx, dy), ((sx + dx) / 2, (sy + dy) / 2)
+        # Curved midpoint offset (perpendicular to the line)
+        mx = (sx + dx) / 2 + (dy - sy) * 0.18
+        my = (sy + dy) / 2 + (sx - dx) * 0.18
+        # Label 10px "above" the curve midpoint: rotate 90° CCW = (-dy, dx)
+        length = math.hypot(dx - sx, dy - sy) or 1
+        lx = mx - (dy - sy) / length * 10
+        ly = my + (dx - sx) / length * 10
+        return (sx, sy, mx, my, dx, dy), (lx, ly)
+
+    def _move_node(self, i):
+        """Re-place node i and its incident edges after its position changed."""
+        c = self.gc
+        items = self._node_items.get(i)
+        if items is not None:               # None when culled
+            sx, sy = self._w2s(*self._node_pos[i])
+            R, fs = self._node_radius(), self._font_size()
+            oval, label, caption = items
+            c.coords(oval, sx-R, sy-R, sx+R, sy+R)
+            if label is not None:
+                c.coords(label, sx, sy - 4)
+            if caption is not None:
+                c.coords(caption, sx, sy + fs)
+        for key in self._node_edges.get(i, ()):
+            line, text = self._edge_items[key]
+            pts, lpos = self._edge_coords(*key)
+            c.coords(line, *pts)
+            if text is not None:
+                c.coords(text, *lpos)
+
     def _draw_graph(self):
+        """
+        Recreate the graph items inside the view.  Used when styling changes
+        (selection, filters, zoom or pan settling); interaction moves the
+        retained items.  Detail drops with the zoom level (see LOD_*).
+        """
         c = self.gc
         c.delete('all')
+        if self._redraw_job is not None:
+            self.win.after_cancel(self._redraw_job)
+            self._redraw_job = None
+        self._node_items = {}
+        self._edge_items = {}
+        self._node_edges = {}
         if not self.project.tracks:
             c.create_text(400, 300, text='No project loaded', fill='#555', font=('Arial', 16))
             return
 
         sel = self._selected_node          # None = show all
         tracks = self.project.tracks
+        r = self.project.routing
 
         # Build sets of nodes and edges relevant to the selection,
         # taking the current send filter into account.
-        if sel is not None:
+        passes = self._send_filter()
+        # Tracing follows the selection's signal over every hop; loop
+        # edges on its path are drawn in LOOP_COLOR
+        trace = self._trace = None
+        loop_keys: set = set()
+        if sel is not None and self._gf_trace.get() != 'off':
+            kind = EDGE_MIDI if self._gf_trace.get() == 'MIDI' else EDGE_AUDIO
+            trace = self._trace = r.reach(sel, kind,
+                                          self._gf_ch_mask if kind == EDGE_MIDI else ALL_CHANNELS)
+            loop_keys = {(r.src[e], r.dst[e]) for e in trace.edges & r.feedback_edges(kind)}
+
+        if trace is not None:
+            visible_nodes = set(trace.masks)
+            active_edges  = {(r.src[e], r.dst[e]) for e in trace.edges}
+        elif sel is not None:
             connected_to:   set = {sel}
             connected_from: set = {sel}
             active_edges:   set = set()
 
-            for send in tracks[sel]['sends']:
-                if self._send_passes_filter(send):
-                    dst = send['dst_idx']
+            for e in r.out(sel):
+                if passes(r.conns[e]):
+                    dst = r.dst[e]
                     connected_to.add(dst)
                     active_edges.add((sel, dst))
-            for recv in tracks[sel]['receives']:
-                # Build a synthetic send dict for the receive so we can filter it
-                src = recv['src_idx']
-                recv_as_send = {
-                    'has_audio':   recv.get('has_audio', False),
-                    'has_midi':    recv.get('has_midi',  False),
-                    'midi_src_ch': recv.get('midi_src_ch'),
-                    'midi_dst_ch': recv.get('midi_dst_ch'),
-                    'src_ach':     recv.get('src_ach', 0),
-                    'dst_ach':     recv.get('dst_ach', 0),
-                    'fader_mode':  recv.get('fader_mode', 0),
-                }
-                if self._send_passes_filter(recv_as_send):
+            for e in r.ins(sel):
+                if passes(r.conns[e]):
+                    src = r.src[e]
                     connected_from.add(src)
                     active_edges.add((src, sel))
 
@@ -562,21 +3628,42 @@ class RoutingWindow:
             visible_nodes = set(self._node_pos.keys())
             active_edges  = None   # draw all, dimming handled per-edge
 
-        R  = max(22, int(28 * self._scale))
-        fs = max(7,  int(9  * self._scale))
+        R  = self._node_radius()
+        fs = self._font_size()
         lfs = max(6, int(8  * self._scale))   # label font size
         drawn: set = set()
 
-        def build_send_label(send: dict) -> str:
+        scale = self._scale
+        labels          = scale >= self.LOD_LABELS
+        self._curves    = scale >= self.LOD_CURVES
+        self._clustered = scale < self.LOD_CLUSTERS
+        pos = self._node_pos
+        x0, y0, x1, y1 = self._view_rect()
+
+        def in_view(a, b):
+            """Bounding-box test for the segment between world points a and b."""
+            (ax, ay), (bx, by) = a, b
+            return not (ax < x0 and bx < x0 or ax > x1 and bx > x1 or
+                        ay < y0 and by < y0 or ay > y1 and by > y1)
+
+        # Zoomed far out, edges that are not highlighted merge into one
+        # line per pair of screen cells
+        cluster: Dict[int, Tuple[int, int]] = {}
+        merged: Dict[tuple, list] = {}      # (cell, cell) → [count, fills]
+        if self._clustered:
+            cw = self.CLUSTER_PX / scale
+            cluster = {i: (int(x // cw), int(y // cw)) for i, (x, y) in pos.items()}
+
+        def build_send_label(send: Connection) -> str:
             """Build a compact info string for an edge label."""
             parts = []
-            if send.get('has_audio'):
-                ach = f"{decode_audio_ch(send['src_ach'])}→{decode_audio_ch(send['dst_ach'])}"
-                mode = FADER_MODES.get(send.get('fader_mode', 0), '?')
+            if send.has_audio:
+                ach = f"{decode_audio_ch(send.src_ach)}→{decode_audio_ch(send.dst_ach)}"
+                mode = FADER_MODES.get(send.fader_mode, '?')
                 parts.append(f"♪ {ach} ({mode})")
-            if send.get('has_midi'):
-                sc = send.get('midi_src_ch') or 'All'
-                dc = send.get('midi_dst_ch') or 'Orig'
+            if send.has_midi:
+                sc = send.midi_src_ch or 'All'
+                dc = send.midi_dst_ch or 'Orig'
                 parts.append(f"M {sc}→{dc}")
             return "  |  ".join(parts) if parts else ''
 
@@ -585,70 +3672,85 @@ class RoutingWindow:
             if key in drawn or src not in self._node_pos or dst not in self._node_pos:
                 return
             drawn.add(key)
-            sx2, sy2 = self._w2s(*self._node_pos[src])
-            dx2, dy2 = self._w2s(*self._node_pos[dst])
-            # Curved midpoint offset (perpendicular to the line)
-            mx_ = (sx2 + dx2) / 2 + (dy2 - sy2) * 0.18
-            my_ = (sy2 + dy2) / 2 + (sx2 - dx2) * 0.18
+            fill = '#3a3a3a' if alpha_dim else color
+            if cluster and (sel is None or alpha_dim):
+                ca, cb = cluster[src], cluster[dst]
+                if ca != cb:
+                    entry = merged.setdefault((ca, cb) if ca < cb else (cb, ca), [0, set()])
+                    entry[0] += 1
+                    entry[1].add(fill)
+                return
+            if not in_view(pos[src], pos[dst]):
+                return
+            pts, (lx, ly) = self._edge_coords(src, dst)
             w  = max(1, int(2 * self._scale))
             ar = (max(6, int(10*self._scale)), max(8, int(12*self._scale)), max(3, int(4*self._scale)))
-            fill = '#3a3a3a' if alpha_dim else color
             lw   = max(1, int(1 * self._scale)) if alpha_dim else w
-            c.create_line(sx2, sy2, mx_, my_, dx2, dy2,
-                          smooth=True, fill=fill, width=lw, dash=dash,
-                          arrow=tk.LAST, arrowshape=ar)
+            line = c.create_line(*pts,
+                                 smooth=self._curves, fill=fill, width=lw, dash=dash,
+                                 arrow=tk.LAST, arrowshape=ar, tags='world')
 
             # Draw label on active edges when a node is selected
-            if not alpha_dim and sel is not None and send is not None:
+            text = None
+            if labels and not alpha_dim and sel is not None and send is not None:
                 label = build_send_label(send)
                 if label:
-                    # Perpendicular unit vector (points "above" the line)
-                    dx_ = dx2 - sx2
-                    dy_ = dy2 - sy2
-                    length = math.hypot(dx_, dy_) or 1
-                    # Perpendicular: rotate 90° CCW = (-dy, dx)
-                    px_ = -dy_ / length
-                    py_ =  dx_ / length
-                    # Offset 10px above the curve midpoint
-                    offset = 10
-                    lx = mx_ + px_ * offset
-                    ly = my_ + py_ * offset
-                    c.create_text(lx, ly, text=label, fill=color,
-                                  font=('Arial', lfs, 'bold'), anchor='center',
-                                  tags='edgelabel')
+                    text = c.create_text(lx, ly, text=label, fill=color,
+                                         font=('Arial', lfs, 'bold'), anchor='center',
+                                         tags=('world', 'edgelabel'))
+            self._edge_items[key] = (line, text)
+            self._node_edges.setdefault(src, []).append(key)
+            self._node_edges.setdefault(dst, []).append(key)
 
         # ── Edges ──────────────────────────────────────────────────────
-        for ti, track in enumerate(tracks):
-            if ti not in self._node_pos:
+        show_audio = self._gf_audio.get()
+        show_midi  = self._gf_midi.get()
+        for e, send in enumerate(r.conns):
+            ti, dst = r.src[e], r.dst[e]
+            if ti not in pos or dst not in pos:
                 continue
-            for send in track['sends']:
-                dst = send['dst_idx']
-                if dst not in self._node_pos:
-                    continue
-                # Apply connection type + MIDI channel filter
-                if not self._send_passes_filter(send):
-                    continue
-                ha, hm = send['has_audio'], send['has_midi']
-                # Recompute color after filter (audio may be hidden)
-                show_audio = self._gf_audio.get()
-                show_midi  = self._gf_midi.get()
-                ha_vis = ha and show_audio
-                hm_vis = hm and show_midi
-                color = BOTH_COLOR if (ha_vis and hm_vis) else (MIDI_COLOR if hm_vis else AUDIO_COLOR)
-                is_active = (active_edges is None) or ((ti, dst) in active_edges)
-                draw_edge(ti, dst, color, alpha_dim=not is_active, send=send)
-
-            if track['folder_depth'] > 0:
+            # Apply connection type + MIDI channel filter
+            if not passes(send):
+                continue
+            # Recompute color after filter (audio may be hidden)
+            ha_vis = r.kind[e] & EDGE_AUDIO and show_audio
+            hm_vis = r.kind[e] & EDGE_MIDI and show_midi
+            color = BOTH_COLOR if (ha_vis and hm_vis) else (MIDI_COLOR if hm_vis else AUDIO_COLOR)
+            is_active = (active_edges is None) or ((ti, dst) in active_edges)
+            if (ti, dst) in loop_keys:
+                color = LOOP_COLOR
+            draw_edge(ti, dst, color, alpha_dim=not is_active, send=send)
+
+        for ti, track in enumerate(tracks):
+            if ti in pos and track.folder_depth > 0:
                 for ci in range(ti + 1, len(tracks)):
                     if ci in self._node_pos:
                         is_active = (active_edges is None) or ((ti, ci) in active_edges)
                         draw_edge(ti, ci, FOLDER_COLOR, dash=(6, 3), alpha_dim=not is_active)
                         break
 
+        if merged:
+            cells: Dict[Tuple[int, int], list] = {}
+            for i, cell in cluster.items():
+                acc = cells.setdefault(cell, [0.0, 0.0, 0])
+                acc[0] += pos[i][0]
+                acc[1] += pos[i][1]
+                acc[2] += 1
+            centre = {cell: (x / k, y / k) for cell, (x, y, k) in cells.items()}
+            for (ca, cb), (count, fills) in merged.items():
+                a, b = centre[ca], centre[cb]
+                if in_view(a, b):
+                    c.create_line(*self._w2s(*a), *self._w2s(*b),
+                                  fill=fills.pop() if len(fills) == 1 else '#777777',
+                                  width=min(6, 1 + int(math.log2(count))),
+                                  tags=('world', 'merged'))
+            c.tag_lower('merged')           # under the highlighted edges
+
         # ── Nodes ──────────────────────────────────────────────────────
-        for i, track in enumerate(tracks):
-            if i not in self._node_pos:
+        for i in sorted(self._grid.in_rect(x0, y0, x1, y1)):
+            if i >= len(tracks):
                 continue
+            track = tracks[i]
             wx, wy = self._node_pos[i]
             sx, sy = self._w2s(wx, wy)
 
@@ -661,13 +3763,18 @@ class RoutingWindow:
                 outline = '#ffffff'
                 ow      = max(2, int(3 * self._scale))
                 text_col = '#ffffff'
+            elif i in self._multi_sel:
+                fill    = '#3a3a3a'
+                outline = '#ffffff'
+                ow      = max(2, int(2 * self._scale))
+                text_col = '#ffffff'
             elif is_neighbour:
                 fill    = NODE_FILL
                 outline = AUDIO_COLOR
                 ow      = max(1, int(2 * self._scale))
                 text_col = NODE_TEXT
             elif sel is None:
-                has_conn = bool(track['sends'] or track['receives'])
+                has_conn = r.degree(i) > 0
                 fill    = NODE_FILL
                 outline = AUDIO_COLOR if has_conn else NODE_OUTLINE
                 ow      = max(1, int(2 * self._scale))
@@ -679,24 +3786,45 @@ class RoutingWindow:
                 ow      = 1
                 text_col = '#555555'
 
-            c.create_oval(sx-R, sy-R, sx+R, sy+R, fill=fill, outline=outline, width=ow)
+            oval = c.create_oval(sx-R, sy-R, sx+R, sy+R, fill=fill, outline=outline,
+                                 width=ow, tags='world')
 
-            lbl = (track['name'] or f'T{i+1}')
+            label = caption = None
+            if not labels:
+                self._node_items[i] = (oval, label, caption)
+                continue
+            lbl = (track.name or f'T{i+1}')
             if len(lbl) > 12:
                 lbl = lbl[:11] + '…'
-            c.create_text(sx, sy - 4, text=lbl, fill=text_col,
-                          font=('Arial', fs, 'bold'), anchor='center')
-            nfx = len(track['fx_list'])
+            label = c.create_text(sx, sy - 4, text=lbl, fill=text_col,
+                                  font=('Arial', fs, 'bold'), anchor='center', tags='world')
+            nfx = len(track.fx_list or ())   # unknown until parsed (lazy)
             if nfx:
-                c.create_text(sx, sy + fs, text=f'{nfx} FX',
-                              fill='#aaa' if is_visible else '#444',
-                              font=('Arial', max(6, fs-1)), anchor='center')
+                caption = c.create_text(sx, sy + fs, text=f'{nfx} FX',
+                                        fill='#aaa' if is_visible else '#444',
+                                        font=('Arial', max(6, fs-1)), anchor='center',
+                                        tags='world')
+            self._node_items[i] = (oval, label, caption)
 
         # ── Hint ───────────────────────────────────────────────────────
-        if sel is not None:
+        if trace is not None:
+            track = tracks[sel]
+            what = 'MIDI' if trace.kind == EDGE_MIDI else 'Audio'
+            hint = f"[{sel+1}] {track.name or 'unnamed'}  — {what} reaches {len(trace.reached)} track(s)"
+            if trace.feedback:
+                hint += ' and feeds back into itself'
+            if loop_keys:
+                hint += f'  •  {len(loop_keys)} loop edge(s) in red'
+            c.create_text(8, 8, text=hint + '  •  click again to deselect',
+                          fill='#aaa', font=('Arial', 8), anchor='nw')
+        elif sel is not None:
             track = tracks[sel]
-            hint = f"[{sel+1}] {track['name'] or 'unnamed'}  — {len(track['sends'])} sends, {len(track['receives'])} receives  •  click again to deselect"
+            hint = f"[{sel+1}] {track.name or 'unnamed'}  — {len(track.sends)} sends, {len(track.receives)} receives  •  click again to deselect"
             c.create_text(8, 8, text=hint, fill='#aaa', font=('Arial', 8), anchor='nw')
+        elif self._multi_sel:
+            c.create_text(8, 8, text=f'{len(self._multi_sel)} nodes selected  •  drag one to move '
+                                     'them together  •  click empty space to clear',
+                          fill='#aaa', font=('Arial', 8), anchor='nw')
         else:
             c.create_text(8, 8, text='Click a node to highlight its connections',
                           fill='#555', font=('Arial', 8), anchor='nw')
@@ -706,6 +3834,7 @@ class RoutingWindow:
     CELL = 36
     LW   = 170
     LH   = 36
+    MX_OVERSCAN = 8         # cells rendered beyond the viewport on each side
 
     def _build_matrix_tab(self):
         ctrl = tk.Frame(self.matrix_frame, bg='#252525')
@@ -717,6 +3846,13 @@ class RoutingWindow:
                        fg=AUDIO_COLOR, selectcolor='#333', command=self._draw_matrix).pack(side=tk.LEFT, padx=4)
         tk.Checkbutton(ctrl, text='MIDI',  variable=self.mx_midi,  bg='#252525',
                        fg=MIDI_COLOR,  selectcolor='#333', command=self._draw_matrix).pack(side=tk.LEFT, padx=4)
+        tk.Label(ctrl, text='MIDI ch:', bg='#252525', fg='#aaa', font=('Arial', 9)).pack(side=tk.LEFT, padx=(8,2))
+        self._mx_ch_mask = ALL_CHANNELS
+
+        def set_matrix_channels(mask):
+            self._mx_ch_mask = mask
+            self._draw_matrix()
+        self._channel_menu(ctrl, '#252525', set_matrix_channels)
         tk.Label(ctrl, text='♪=Audio  M=MIDI  ♪M=Both  |  Hover for channel details',
                  bg='#252525', fg='#777', font=('Arial', 8)).pack(side=tk.RIGHT, padx=10)
 
@@ -725,7 +3861,10 @@ class RoutingWindow:
         self.mc = tk.Canvas(fr, bg='#1a1a1a', highlightthickness=0)
         sy = ttk.Scrollbar(fr, orient=tk.VERTICAL,   command=self.mc.yview)
         sx = ttk.Scrollbar(fr, orient=tk.HORIZONTAL, command=self.mc.xview)
-        self.mc.configure(yscrollcommand=sy.set, xscrollcommand=sx.set)
+        # Every scroll or resize reports through these; the visible window
+        # is re-rendered once the view leaves what was drawn
+        self.mc.configure(yscrollcommand=lambda *a: self._mx_scrolled(sy, *a),
+                          xscrollcommand=lambda *a: self._mx_scrolled(sx, *a))
         sy.pack(side=tk.RIGHT, fill=tk.Y)
         sx.pack(side=tk.BOTTOM, fill=tk.X)
         self.mc.pack(fill=tk.BOTH, expand=True)
@@ -733,7 +3872,11 @@ class RoutingWindow:
         self._mx_tip = tk.Label(self.matrix_frame, text='', bg='#333', fg='#eee',
                                  font=('Arial', 8), relief=tk.FLAT, padx=4, pady=2)
         self.mc.bind('<Motion>', self._on_mx_motion)
-        self._mx_conn: Dict[Tuple[int,int], dict] = {}
+        self._mx_conn: Dict[Tuple[int,int], Connection] = {}
+        self._mx_rows: Dict[int, List[int]] = {}      # row → sorted connected columns
+        self._mx_window: Optional[Tuple[int, int, int, int]] = None   # rows, cols drawn
+        self._mx_job = None
+        self._mx_tile = self._mx_bg = None          # checkerboard images
 
     def _on_mx_motion(self, event):
         cx = self.mc.canvasx(event.x)
@@ -748,22 +3891,41 @@ class RoutingWindow:
                 src_t = self.project.tracks[row]
                 dst_t = self.project.tracks[col]
                 parts = []
-                if send['has_audio']:
+                if send.has_audio:
                     parts.append(
-                        f"Audio ({FADER_MODES.get(send['fader_mode'],'?')}) "
-                        f"ch {decode_audio_ch(send['src_ach'])}→{decode_audio_ch(send['dst_ach'])}")
-                if send['has_midi']:
+                        f"Audio ({FADER_MODES.get(send.fader_mode,'?')}) "
+                        f"ch {decode_audio_ch(send.src_ach)}→{decode_audio_ch(send.dst_ach)}")
+                if send.has_midi:
                     parts.append(
-                        f"MIDI in:{send['midi_src_ch']} → out:{send['midi_dst_ch']}")
-                tip = f"{src_t['name'] or f'T{row+1}'} → {dst_t['name'] or f'T{col+1}'}:  {'  |  '.join(parts)}"
+                        f"MIDI in:{send.midi_src_ch} → out:{send.midi_dst_ch}")
+                tip = f"{src_t.name or f'T{row+1}'} → {dst_t.name or f'T{col+1}'}:  {'  |  '.join(parts)}"
                 self._mx_tip.config(text=tip)
                 self._mx_tip.place(x=event.x + 10, y=event.y - 28, in_=self.mc)
                 return
         self._mx_tip.place_forget()
 
+    def _matrix_filter(self):
+        """send → (audio shown, MIDI shown) for the current matrix filters."""
+        show_audio = self.mx_audio.get()
+        show_midi  = self.mx_midi.get()
+        mask = self._mx_ch_mask
+
+        def shows(send: Connection) -> Tuple[bool, bool]:
+            hm = send.has_midi and show_midi and (
+                mask == ALL_CHANNELS or bool((send.src_mask | send.dst_mask) & mask))
+            return send.has_audio and show_audio, hm
+        return shows
+
+    def _mx_scrolled(self, bar, *args):
+        bar.set(*args)
+        if self._mx_job is None:
+            self._mx_job = self.win.after_idle(self._render_matrix)
+
     def _draw_matrix(self):
+        """Rebuild the sparse connection map and render the visible window."""
         c = self.mc
         c.delete('all')
+        self._mx_window = None
         tracks = self.project.tracks
         n = len(tracks)
         if n == 0:
@@ -773,53 +3935,107 @@ class RoutingWindow:
         CELL, LW, LH = self.CELL, self.LW, self.LH
         c.configure(scrollregion=(0, 0, LW + n*CELL + 4, LH + n*CELL + 4))
 
-        show_audio = self.mx_audio.get()
-        show_midi  = self.mx_midi.get()
-
+        # Sends come out of the routing index grouped by source and sorted
+        # by destination, so each row's column list is already in order
+        r = self.project.routing
+        shows = self._matrix_filter()
         self._mx_conn = {}
-        for si, track in enumerate(tracks):
-            for send in track['sends']:
-                di = send['dst_idx']
-                ha = send['has_audio'] and show_audio
-                hm = send['has_midi']  and show_midi
-                if ha or hm:
-                    self._mx_conn[(si, di)] = send
+        rows: Dict[int, List[int]] = {}
+        for e, send in enumerate(r.conns):
+            if any(shows(send)):
+                si, di = r.src[e], r.dst[e]
+                if (si, di) not in self._mx_conn:
+                    rows.setdefault(si, []).append(di)
+                self._mx_conn[(si, di)] = send
+        self._mx_rows = rows
+        self._render_matrix()
+
+    def _matrix_tiles(self, width: int, height: int):
+        """Checkerboard background: a two-cell tile copied across one image."""
+        CELL = self.CELL
+        if self._mx_tile is None:
+            tile = tk.PhotoImage(master=self.mc, width=2*CELL, height=2*CELL)
+            tile.put('#2d2d2d', to=(0, 0, 2*CELL, 2*CELL))
+            tile.put('#272727', to=(CELL, 0, 2*CELL, CELL))
+            tile.put('#272727', to=(0, CELL, CELL, 2*CELL))
+            for k in (0, CELL):             # cell outlines
+                tile.put('#333333', to=(0, k, 2*CELL, k + 1))
+                tile.put('#333333', to=(k, 0, k + 1, 2*CELL))
+            self._mx_tile = tile
+        bg = self._mx_bg
+        if bg is None or (bg.width(), bg.height()) != (width, height):
+            bg = tk.PhotoImage(master=self.mc, width=width, height=height)
+            bg.tk.call(bg, 'copy', self._mx_tile, '-to', 0, 0, width, height)
+            self._mx_bg = bg
+        return bg
+
+    def _render_matrix(self):
+        """
+        Draw headers, background and connection cells for the rows and
+        columns around the scrolled viewport.  Nothing is redrawn while the
+        view stays inside the window drawn last time.
+        """
+        self._mx_job = None
+        c = self.mc
+        tracks = self.project.tracks
+        n = len(tracks)
+        if n == 0:
+            return
+        CELL, LW, LH = self.CELL, self.LW, self.LH
+        x, y = c.canvasx(0), c.canvasy(0)
+        w, h = max(c.winfo_width(), 400), max(c.winfo_height(), 300)
+        r0 = max(0, int((y - LH) // CELL));  r1 = min(n, int((y + h - LH) // CELL) + 1)
+        c0 = max(0, int((x - LW) // CELL));  c1 = min(n, int((x + w - LW) // CELL) + 1)
+        win = self._mx_window
+        if win and win[0] <= r0 and r1 <= win[1] and win[2] <= c0 and c1 <= win[3]:
+            return
+        pad = self.MX_OVERSCAN
+        r0 = max(0, r0 - pad) & ~1           # even, so the tile parity matches (i+j)
+        c0 = max(0, c0 - pad) & ~1
+        r1 = min(n, r1 + pad)
+        c1 = min(n, c1 + pad)
+        self._mx_window = (r0, r1, c0, c1)
+
+        c.delete('all')
+        shows = self._matrix_filter()
+        bg = self._matrix_tiles((c1 - c0) * CELL, (r1 - r0) * CELL)
+        c.create_image(LW + c0 * CELL, LH + r0 * CELL, image=bg, anchor='nw')
 
         # Column headers
-        for j, t in enumerate(tracks):
+        for j in range(c0, c1):
             x0 = LW + j * CELL
-            name = (t['name'] or f'T{j+1}')[:8]
+            name = (tracks[j].name or f'T{j+1}')[:8]
             c.create_rectangle(x0, 0, x0+CELL, LH, fill='#2a2a2a', outline='#444')
             c.create_text(x0+CELL//2, LH//2, text=name, fill='#ccc',
                           font=('Arial', 8), angle=45, anchor='center')
 
-        # Rows
-        for i, t in enumerate(tracks):
+        # Rows: labels, the diagonal, and only the connected cells
+        for i in range(r0, r1):
             y0 = LH + i * CELL
-            name = (t['name'] or f'T{i+1}')[:24]
+            name = (tracks[i].name or f'T{i+1}')[:24]
             c.create_rectangle(0, y0, LW, y0+CELL, fill='#222', outline='#444')
             c.create_text(6, y0+CELL//2, text=f'{i+1}. {name}',
                           fill='#ccc', font=('Arial', 8), anchor='w')
-            for j in range(n):
+            if c0 <= i < c1:
+                x0 = LW + i * CELL
+                c.create_line(x0, y0, x0+CELL, y0+CELL, fill='#444')
+            cols = self._mx_rows.get(i)
+            if not cols:
+                continue
+            for j in cols[bisect.bisect_left(cols, c0):bisect.bisect_left(cols, c1)]:
+                send = self._mx_conn[(i, j)]
                 x0 = LW + j * CELL
-                bg = '#2d2d2d' if (i+j)%2==0 else '#272727'
-                c.create_rectangle(x0, y0, x0+CELL, y0+CELL, fill=bg, outline='#333')
-                if i == j:
-                    c.create_line(x0, y0, x0+CELL, y0+CELL, fill='#444')
-                send = self._mx_conn.get((i, j))
-                if send:
-                    ha = send['has_audio'] and show_audio
-                    hm = send['has_midi']  and show_midi
-                    if ha and hm:
-                        color, sym = BOTH_COLOR, '♪M'
-                    elif hm:
-                        color, sym = MIDI_COLOR, 'M'
-                    else:
-                        color, sym = AUDIO_COLOR, '♪'
-                    p = 5
-                    c.create_rectangle(x0+p, y0+p, x0+CELL-p, y0+CELL-p, fill=color, outline='')
-                    c.create_text(x0+CELL//2, y0+CELL//2, text=sym,
-                                  fill='white', font=('Arial', 8, 'bold'))
+                ha, hm = shows(send)
+                if ha and hm:
+                    color, sym = BOTH_COLOR, '♪M'
+                elif hm:
+                    color, sym = MIDI_COLOR, 'M'
+                else:
+                    color, sym = AUDIO_COLOR, '♪'
+                p = 5
+                c.create_rectangle(x0+p, y0+p, x0+CELL-p, y0+CELL-p, fill=color, outline='')
+                c.create_text(x0+CELL//2, y0+CELL//2, text=sym,
+                              fill='white', font=('Arial', 8, 'bold'))
 
         c.create_text(LW//2, LH//2, text='SRC \\ DST', fill='#888', font=('Arial', 8, 'bold'))
 
@@ -845,113 +4061,121 @@ class RoutingWindow:
         self.lt.tag_config('dim',    foreground='#555')
 
     def _draw_list(self):
-        t = self.lt
-        t.config(state=tk.NORMAL)
-        t.delete('1.0', tk.END)
+        """Build the whole listing as one string with per-tag line ranges,
+        then insert it and tag it in a handful of Tk calls."""
         tracks = self.project.tracks
-
-        if not tracks:
-            t.insert(tk.END, 'No project loaded.\n', 'dim')
-            t.config(state=tk.DISABLED)
-            return
+        conns = self.project.routing.conns
+        chunks: List[str] = []
+        ranges: Dict[str, List[str]] = {}
+        line = 1                            # Text line the next chunk starts on
+
+        def put(text, tag):
+            nonlocal line
+            chunks.append(text)
+            end = line + text.count('\n')
+            spans = ranges.setdefault(tag, [])
+            if spans and spans[-1] == f'{line}.0':
+                spans[-1] = f'{end}.0'      # extend the previous range
+            else:
+                spans += (f'{line}.0', f'{end}.0')
+            line = end
 
         def tlabel(idx):
             if idx < len(tracks):
-                return f"[{idx+1}] {tracks[idx]['name'] or f'Track {idx+1}'}"
+                return f"[{idx+1}] {tracks[idx].name or f'Track {idx+1}'}"
             return f'[{idx+1}] ?'
 
-        # Collect all connections
-        conns = []
-        for si, track in enumerate(tracks):
-            for send in track['sends']:
-                conns.append({'src': si, **send})
-
-        if not conns:
-            t.insert(tk.END, 'No sends/receives found.\n\n', 'dim')
-            t.insert(tk.END,
-                     'REAPER stores sends as AUXRECV entries on the destination\n'
-                     'track. Projects with only a default master bus will appear\n'
-                     'empty here.\n', 'dim')
-            t.config(state=tk.DISABLED)
-            return
+        def send_detail(s):
+            if s.has_audio:
+                ach = f"{decode_audio_ch(s.src_ach)}→{decode_audio_ch(s.dst_ach)}"
+                put(f"      Audio ({FADER_MODES.get(s.fader_mode,'?')})  ch {ach}\n", 'audio')
+            if s.has_midi:
+                put(f"      MIDI  in:{s.midi_src_ch} → out:{s.midi_dst_ch}\n", 'midi')
 
-        def send_detail(s) -> Tuple[str, List[Tuple[str, str]]]:
-            """Returns (tag, [(text, tag), ...])"""
-            lines = []
-            if s['has_audio'] and s['has_midi']:
-                tag = 'both'
-            elif s['has_midi']:
-                tag = 'midi'
-            else:
-                tag = 'audio'
+        def send_tag(s):
+            return 'both' if s.has_audio and s.has_midi else ('midi' if s.has_midi else 'audio')
 
-            if s['has_audio']:
-                ach = f"{decode_audio_ch(s['src_ach'])}→{decode_audio_ch(s['dst_ach'])}"
-                lines.append((f"      Audio ({FADER_MODES.get(s['fader_mode'],'?')})  ch {ach}\n", 'audio'))
-            if s['has_midi']:
-                lines.append((f"      MIDI  in:{s['midi_src_ch']} → out:{s['midi_dst_ch']}\n", 'midi'))
-            return tag, lines
+        def send_sym(s):
+            return '♪M' if (s.has_audio and s.has_midi) else ('M' if s.has_midi else '♪')
 
         grp = self.list_grp.get()
 
-        if grp == 'source':
+        if not tracks:
+            put('No project loaded.\n', 'dim')
+
+        elif not conns:
+            put('No sends/receives found.\n\n', 'dim')
+            put('REAPER stores sends as AUXRECV entries on the destination\n'
+                'track. Projects with only a default master bus will appear\n'
+                'empty here.\n', 'dim')
+
+        elif grp == 'source':
             by: Dict[int, list] = {}
             for c in conns:
-                by.setdefault(c['src'], []).append(c)
+                by.setdefault(c.src_idx, []).append(c)
             for src in sorted(by):
-                t.insert(tk.END, f'\n▶  {tlabel(src)}\n', 'header')
+                put(f'\n▶  {tlabel(src)}\n', 'header')
                 for s in by[src]:
-                    tag, detail = send_detail(s)
-                    sym = '♪M' if (s['has_audio'] and s['has_midi']) else ('M' if s['has_midi'] else '♪')
-                    t.insert(tk.END, f'   {sym}  →  {tlabel(s["dst_idx"])}\n', tag)
-                    for line, ltag in detail:
-                        t.insert(tk.END, line, ltag)
+                    put(f'   {send_sym(s)}  →  {tlabel(s.dst_idx)}\n', send_tag(s))
+                    send_detail(s)
 
         elif grp == 'dest':
             by: Dict[int, list] = {}
             for c in conns:
-                by.setdefault(c['dst_idx'], []).append(c)
+                by.setdefault(c.dst_idx, []).append(c)
             for dst in sorted(by):
-                t.insert(tk.END, f'\n◀  {tlabel(dst)}\n', 'header')
+                put(f'\n◀  {tlabel(dst)}\n', 'header')
                 for s in by[dst]:
-                    tag, detail = send_detail(s)
-                    sym = '♪M' if (s['has_audio'] and s['has_midi']) else ('M' if s['has_midi'] else '♪')
-                    t.insert(tk.END, f'   {sym}  ←  {tlabel(s["src"])}\n', tag)
-                    for line, ltag in detail:
-                        t.insert(tk.END, line, ltag)
+                    put(f'   {send_sym(s)}  ←  {tlabel(s.src_idx)}\n', send_tag(s))
+                    send_detail(s)
 
         elif grp == 'type':
-            audio_c = [c for c in conns if c['has_audio'] and not c['has_midi']]
-            midi_c  = [c for c in conns if c['has_midi']  and not c['has_audio']]
-            both_c  = [c for c in conns if c['has_audio'] and c['has_midi']]
+            audio_c = [c for c in conns if c.has_audio and not c.has_midi]
+            midi_c  = [c for c in conns if c.has_midi  and not c.has_audio]
+            both_c  = [c for c in conns if c.has_audio and c.has_midi]
 
             for label, lst, ttag in [
                 ('♪  AUDIO SENDS',        audio_c, 'audio'),
                 ('M  MIDI SENDS',          midi_c,  'midi'),
                 ('♪M AUDIO + MIDI SENDS',  both_c,  'both'),
             ]:
-                t.insert(tk.END, f'\n{label}\n', ttag)
+                put(f'\n{label}\n', ttag)
                 if lst:
                     for s in lst:
-                        _, detail = send_detail(s)
-                        t.insert(tk.END,
-                                 f'   {tlabel(s["src"])}  →  {tlabel(s["dst_idx"])}\n', ttag)
-                        for line, ltag in detail:
-                            t.insert(tk.END, line, ltag)
+                        put(f'   {tlabel(s.src_idx)}  →  {tlabel(s.dst_idx)}\n', ttag)
+                        send_detail(s)
                 else:
-                    t.insert(tk.END, '   (none)\n', 'dim')
+                    put('   (none)\n', 'dim')
+
+        if tracks and conns:
+            put(f'\n\nTotal connections: {len(conns)}\n', 'dim')
 
-        t.insert(tk.END, f'\n\nTotal connections: {len(conns)}\n', 'dim')
+        t = self.lt
+        t.config(state=tk.NORMAL)
+        t.delete('1.0', tk.END)
+        t.insert('1.0', ''.join(chunks))
+        for tag, spans in ranges.items():
+            t.tag_add(tag, *spans)
         t.config(state=tk.DISABLED)
 
     # ── Refresh ──────────────────────────────────────────────────────────
 
     def _refresh_all(self, *_):
+        """The project changed: every tab is stale, only the visible one is
+        redrawn now and the others when they are shown."""
         if not self._node_pos and self.project.tracks:
             self._layout_nodes()
-        self._draw_graph()
-        self._draw_matrix()
-        self._draw_list()
+        self._stale = {0, 1, 2}
+        self._refresh_visible()
+
+    def _refresh_visible(self, *_):
+        try:
+            tab = self.nb.index('current')
+        except tk.TclError:                 # window is being destroyed
+            return
+        if tab in self._stale:
+            self._stale.discard(tab)
+            (self._draw_graph, self._draw_matrix, self._draw_list)[tab]()
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -964,13 +4188,21 @@ class MIDICCEditorGUI:
         self.root.title("REAPER MIDI CC Editor")
         self.root.geometry("1200x720")
         self.project = REAPERProject()
-        self._track_item_ids: List[str] = []
-        self._item_to_indices: Dict[str, Tuple[int,int,int]] = {}
+        self._track_iids: Dict[int, str] = {}          # track idx -> iid
+        self._row_iids: Dict[ModRef, str] = {}           # param ref -> iid
+        self._fx_iids: Dict[Tuple[int, int], str] = {}   # (track, fx) -> iid
+        self._item_to_indices: Dict[str, ModRef] = {}
+        self._lazy_tracks: Dict[str, int] = {}   # unexpanded track iid -> track idx
+        self._linked: Dict[str, Tuple[str, ...]] = {}
+        self._all_children: Dict[str, Tuple[str, ...]] = {}
+        self._search: Optional[SearchIndex] = None   # built on first filter
+        self._filter_job = None
+        self._cache = ProjectCache()
         self._routing_win: Optional[RoutingWindow] = None
         self._filter_var = tk.StringVar()   # initialised before _create_widgets
         self._create_widgets()
         self._create_menu()
-        self._filter_var.trace_add('write', lambda *_: self._apply_filter())
+        self._filter_var.trace_add('write', lambda *_: self._schedule_filter())
 
     def _create_menu(self):
         mb = tk.Menu(self.root)
@@ -993,6 +4225,7 @@ class MIDICCEditorGUI:
         vm.add_command(label="Unfold All FX", command=self.unfold_all_fx)
         vm.add_separator()
         vm.add_command(label="🔀  Routing Visualisation", command=self.open_routing)
+        vm.add_command(label="⚠  CC Collisions",          command=self.show_collisions)
 
         self.file_menu = fm
 
@@ -1036,6 +4269,8 @@ class MIDICCEditorGUI:
         self._filter_clear = ttk.Button(ff, text="✕", width=2,
                                          command=lambda: self._filter_var.set(''))
         self._filter_clear.pack(side=tk.LEFT)
+        ttk.Label(ff, text="t: fx: cc: ch: bus:", foreground="#888",
+                  font=('Arial', 8)).pack(side=tk.LEFT, padx=(4,0))
         self._filter_active = False   # tracks whether filter is currently applied
 
         ts = ttk.Scrollbar(left)
@@ -1051,8 +4286,10 @@ class MIDICCEditorGUI:
         self.tree.column('CC',       width=80)
         self.tree.column('Channel',  width=50)
         self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.tag_configure('collision', foreground='#c62828')
         ts.config(command=self.tree.yview)
         self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
+        self.tree.bind('<<TreeviewOpen>>',   self.on_tree_open)
         self.tree.bind('<Double-1>',         self.on_dbl)
 
         right = ttk.Frame(main, padding="10")
@@ -1072,6 +4309,8 @@ class MIDICCEditorGUI:
         self.cc_sb.set(0)
         self.cc_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(ef, text="apply", variable=self.cc_var).grid(row=0, column=2, sticky=tk.W)
+        ttk.Button(ef, text="Free", width=5,
+                   command=self.pick_free_cc).grid(row=0, column=3, sticky=tk.W)
 
         ttk.Label(ef, text="MIDI Channel:").grid(row=1, column=0, sticky=tk.W, pady=5)
         self.ch_sb = ttk.Spinbox(ef, from_=0, to=16, width=8)
@@ -1122,35 +4361,37 @@ class MIDICCEditorGUI:
     # ── Fold/Unfold ──────────────────────────────────────────────────────
 
     def fold_all(self):
-        for iid in self._track_item_ids:
+        for iid in self._track_iids.values():
             self.tree.item(iid, open=False)
         self.status.config(text="All tracks folded")
 
-    def unfold_all(self):
-        for iid in self._track_item_ids:
+    def _set_all_open(self, fx_open: bool):
+        for iid in list(self._track_iids.values()):
+            self._expand_lazy(iid)
+            if not self.tree.exists(iid):
+                continue
             self.tree.item(iid, open=True)
             for fx in self.tree.get_children(iid):
-                self.tree.item(fx, open=True)
+                self.tree.item(fx, open=fx_open)
+
+    def unfold_all(self):
+        self._set_all_open(True)
         self.status.config(text="All tracks unfolded")
 
     def fold_all_fx(self):
-        for iid in self._track_item_ids:
-            self.tree.item(iid, open=True)
-            for fx in self.tree.get_children(iid):
-                self.tree.item(fx, open=False)
+        self._set_all_open(False)
 
     def unfold_all_fx(self):
-        for iid in self._track_item_ids:
-            self.tree.item(iid, open=True)
-            for fx in self.tree.get_children(iid):
-                self.tree.item(fx, open=True)
+        self._set_all_open(True)
 
     def on_dbl(self, event):
         item = self.tree.identify_row(event.y)
         if item:
             tags = self.tree.item(item, 'tags')
             if tags and tags[0] in ('track', 'fx'):
-                self.tree.item(item, open=not self.tree.item(item, 'open'))
+                self._expand_lazy(item)
+                if self.tree.exists(item):
+                    self.tree.item(item, open=not self.tree.item(item, 'open'))
 
     # ── File I/O ─────────────────────────────────────────────────────────
 
@@ -1161,7 +4402,7 @@ class MIDICCEditorGUI:
         if not fp:
             return
         try:
-            self.project.load_file(fp)
+            self.project.load_file(fp, lazy=True, cache=self._cache)
             self.file_label.config(text=os.path.basename(fp), fg='#ffffff')
             self.populate_tree()
             self.status.config(text=f"Loaded: {fp}")
@@ -1175,6 +4416,7 @@ class MIDICCEditorGUI:
                     self._routing_win.project = self.project
                     self._routing_win._node_pos.clear()
                     self._routing_win._selected_node = None
+                    self._routing_win._multi_sel = set()
                     self._routing_win._refresh_all()
             except Exception:
                 pass
@@ -1204,68 +4446,185 @@ class MIDICCEditorGUI:
                 messagebox.showerror("Error", f"Failed to save:\n{str(e)}")
 
     # ── Tree ─────────────────────────────────────────────────────────────
+    # Items are created once per load and then kept.  A track's FX and param
+    # rows are created when the track is first opened; the filter re-links
+    # existing items with set_children, and edits relabel only the rows they
+    # touch.  _linked mirrors each parent's currently attached children and
+    # _all_children its full list, so unchanged parents are skipped.
 
     def populate_tree(self):
-        """Rebuild tree, honouring the current filter string."""
-        query = self._filter_var.get().strip().lower() if hasattr(self, '_filter_var') else ''
-        filtering = bool(query)
-
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self._track_item_ids = []
+        """Recreate the track rows after a project load."""
+        # Detached items are not descendants of anything; re-attach them
+        # so that deleting the top level really deletes everything.
+        self._restore_links()
+        self.tree.delete(*self.tree.get_children())
+        self._track_iids = {}
+        self._row_iids = {}
+        self._fx_iids = {}
         self._item_to_indices = {}
+        self._lazy_tracks = {}
+        self._linked = {}
+        self._all_children = {}
+        self._search = None
+
+        p = self.project
+        for ti, track in enumerate(p.tracks):
+            if p.fx_loaded(ti):
+                if not any(m.midi_cc is not None for fx in track.fx_list for m in fx.modulations):
+                    continue
+            elif not track.has_midiplink:
+                continue
+            # Rows below a track are created on first open (see _expand_lazy)
+            track_id = self.tree.insert(
+                '', 'end', text=track.name or f"Track {ti+1}",
+                values=('Track', '', ''), tags=('track',))
+            self.tree.insert(track_id, 'end', text='…', tags=('placeholder',))
+            self._track_iids[ti] = track_id
+            self._lazy_tracks[track_id] = ti
+        self._linked[''] = self._all_children[''] = tuple(self._track_iids.values())
+
+        if self._filter_var.get().strip():
+            self._apply_filter()
+
+    def _row_values(self, mod: Modulation):
+        return ('Param', f"CC {mod.midi_cc}", f"{mod.midi_channel}")
+
+    def _row_tags(self, ref: ModRef, mod: Modulation):
+        tags = ('modulation',) + tuple(map(str, ref))
+        if self.project.bindings.is_shared(binding_key(mod)):
+            tags += ('collision',)
+        return tags
+
+    def _expand_lazy(self, track_id):
+        """Create the FX and MIDI-linked param rows of a track on first open."""
+        ti = self._lazy_tracks.pop(track_id, None)
+        if ti is None:
+            return
+        self.tree.delete(*self.tree.get_children(track_id))
+        fx_ids = []
+        for fi, fx in enumerate(self.project.fx_list(ti)):
+            mods = [(mi, mod) for mi, mod in enumerate(fx.modulations) if mod.midi_cc is not None]
+            if not mods:
+                continue
+            fx_id = self.tree.insert(
+                track_id, 'end', text=fx.name,
+                values=(fx.type, '', ''),
+                tags=('fx',), open=True)
+            self._fx_iids[ti, fi] = fx_id
+            rows = []
+            for mi, mod in mods:
+                ref = (ti, fi, mi)
+                iid = self.tree.insert(fx_id, 'end', text=mod.param_name,
+                                       values=self._row_values(mod),
+                                       tags=self._row_tags(ref, mod))
+                self._row_iids[ref] = iid
+                self._item_to_indices[iid] = ref
+                rows.append(iid)
+            self._linked[fx_id] = self._all_children[fx_id] = tuple(rows)
+            fx_ids.append(fx_id)
+        self._linked[track_id] = self._all_children[track_id] = tuple(fx_ids)
+
+        if not fx_ids:
+            # MIDIPLINK hint matched no CC binding (e.g. note links only)
+            self.tree.delete(track_id)
+            del self._track_iids[ti]
+            self._linked[''] = tuple(i for i in self._linked[''] if i != track_id)
+            self._all_children[''] = tuple(i for i in self._all_children[''] if i != track_id)
+
+    def _relink(self, parent, children):
+        """Attach exactly these children (in order) under parent."""
+        children = tuple(children)
+        if self._linked.get(parent) != children:
+            self.tree.set_children(parent, *children)
+            self._linked[parent] = children
+
+    def _restore_links(self):
+        """Re-attach every materialised item under its parent."""
+        for track_id in self._track_iids.values():
+            if track_id in self._lazy_tracks:
+                continue
+            for fx_id in self._all_children[track_id]:
+                self._relink(fx_id, self._all_children[fx_id])
+            self._relink(track_id, self._all_children[track_id])
+        if '' in self._all_children:
+            self._relink('', self._all_children[''])
 
-        for ti, track in enumerate(self.project.tracks):
-            track_name = track['name'] or f"Track {ti+1}"
-            track_id = None   # inserted lazily
+    def on_tree_open(self, event):
+        self._expand_lazy(self.tree.focus())
 
-            for fi, fx in enumerate(track['fx_list']):
-                fx_id = None   # inserted lazily
+    FILTER_DELAY_MS = 150
 
-                for mi, mod in enumerate(fx['modulations']):
-                    if mod['midi_cc'] is None:
-                        continue
-                    # Filter: skip param rows that don't match (when filter is active)
-                    if filtering and query not in mod['param_name'].lower():
-                        continue
+    def _schedule_filter(self):
+        """Debounce keystrokes: filter once typing pauses."""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(self.FILTER_DELAY_MS, self._apply_filter)
 
-                    # Ensure track header exists (inserted once per track)
-                    if track_id is None:
-                        track_id = self.tree.insert(
-                            '', 'end', text=track_name,
-                            values=('Track', '', ''),
-                            tags=('track',), open=True)
-                        self._track_item_ids.append(track_id)
-
-                    # Ensure FX header exists under this track
-                    if fx_id is None:
-                        fx_id = self.tree.insert(
-                            track_id, 'end', text=fx['name'],
-                            values=(fx['type'], '', ''),
-                            tags=('fx',), open=True)
-
-                    iid = self.tree.insert(
-                        fx_id, 'end',
-                        text=mod['param_name'],
-                        values=('Param', f"CC {mod['midi_cc']}", f"{mod['midi_channel']}"),
-                        tags=('modulation', str(ti), str(fi), str(mi)))
-                    self._item_to_indices[iid] = (ti, fi, mi)
+    def _apply_filter(self):
+        """Show only the rows matching the filter text."""
+        self._filter_job = None
+        query = self._filter_var.get().strip().lower()
+        match = None
+        if query:
+            if self._search is None:
+                self.project.load_all_fx()      # searching needs param names
+                self._search = SearchIndex(self.project.tracks, self.project.bindings)
+            match = self._search.search(query)
+
+        if match is None:
+            self._restore_links()
+        else:
+            hits: Dict[int, Dict[int, List[int]]] = {}
+            for ti, fi, mi in match:
+                hits.setdefault(ti, {}).setdefault(fi, []).append(mi)
+            shown = []
+            for ti, track_id in list(self._track_iids.items()):
+                if ti not in hits:
+                    continue
+                self._expand_lazy(track_id)
+                fx_ids = []
+                for fi, mis in hits[ti].items():
+                    # rows hidden by an earlier filter are detached and
+                    # have no parent, so the FX row comes from the map
+                    fx_id = self._fx_iids[ti, fi]
+                    self._relink(fx_id, [self._row_iids[ti, fi, mi] for mi in mis])
+                    self.tree.item(fx_id, open=True)
+                    fx_ids.append(fx_id)
+                self._relink(track_id, fx_ids)
+                self.tree.item(track_id, open=True)
+                shown.append(track_id)
+            self._relink('', shown)
+            keep = set(match)
+            hidden = [iid for iid in self.tree.selection()
+                      if self._item_to_indices.get(iid) not in keep]
+            if hidden:
+                self.tree.selection_remove(*hidden)
 
         # Update filter entry appearance to signal active state
         if hasattr(self, '_filter_entry'):
             self._filter_entry.configure(
-                style='Filter.TEntry' if filtering else 'TEntry')
-
-    def _apply_filter(self):
-        """Called whenever the filter text changes."""
-        self.populate_tree()
-        q = self._filter_var.get().strip()
-        if q:
-            total = len(self._item_to_indices)
-            self.status.config(text=f"Filter '{q}' — {total} param(s) shown")
+                style='Filter.TEntry' if query else 'TEntry')
+        if query:
+            self.status.config(text=f"Filter '{query}' — {len(match)} param(s) shown")
         else:
             self.status.config(text="Filter cleared")
 
+    def _refresh_rows(self, refs, keys=()):
+        """Relabel the given rows, plus every row bound to one of keys (their
+        collision marking may have changed)."""
+        touched = set(refs)
+        for key in keys:
+            if key is not None:
+                touched.update(self.project.bindings.refs(key))
+        tracks = self.project.tracks
+        for ref in touched:
+            iid = self._row_iids.get(ref)
+            if iid is None:
+                continue
+            ti, fi, mi = ref
+            mod = tracks[ti].fx_list[fi].modulations[mi]
+            self.tree.item(iid, values=self._row_values(mod), tags=self._row_tags(ref, mod))
+
     # ── Selection ────────────────────────────────────────────────────────
 
     def _get_sel(self):
@@ -1287,9 +4646,9 @@ class MIDICCEditorGUI:
         self.apply_btn.config(state=tk.NORMAL)
         ccs, chs, buses, names = set(), set(), set(), []
         for _, t, f, m in sel:
-            mod = self.project.tracks[t]['fx_list'][f]['modulations'][m]
-            ccs.add(mod['midi_cc']); chs.add(mod['midi_channel'])
-            buses.add(mod['midi_bus']); names.append(mod['param_name'])
+            mod = self.project.tracks[t].fx_list[f].modulations[m]
+            ccs.add(mod.midi_cc); chs.add(mod.midi_channel)
+            buses.add(mod.midi_bus); names.append(mod.param_name)
         self.cc_sb.set(next(iter(ccs))  if len(ccs)==1  else 0)
         self.ch_sb.set(next(iter(chs))  if len(chs)==1  else 0)
         self.bus_sb.set(next(iter(buses)) if len(buses)==1 else 0)
@@ -1299,9 +4658,9 @@ class MIDICCEditorGUI:
             self.sel_lbl.config(text=f"{n} parameters selected", foreground="#0055aa")
         lines = [f"{n} parameter(s) selected:\n"]
         for _, t, f, m in sel[:30]:
-            tr = self.project.tracks[t]; fx = tr['fx_list'][f]; mod = fx['modulations'][m]
-            lines.append(f"• {mod['param_name']}\n  Track: {tr['name'] or f'T{t+1}'}\n"
-                         f"  FX: {fx['name']}\n  CC {mod['midi_cc']}  Ch {mod['midi_channel']}  Bus {mod['midi_bus']}\n")
+            tr = self.project.tracks[t]; fx = tr.fx_list[f]; mod = fx.modulations[m]
+            lines.append(f"• {mod.param_name}\n  Track: {tr.name or f'T{t+1}'}\n"
+                         f"  FX: {fx.name}\n  CC {mod.midi_cc}  Ch {mod.midi_channel}  Bus {mod.midi_bus}\n")
         if n > 30:
             lines.append(f"… and {n-30} more")
         self._set_info("\n".join(lines))
@@ -1321,15 +4680,28 @@ class MIDICCEditorGUI:
         if do_cc  and not (0 <= ncc  <= 127): messagebox.showerror("Error","CC 0–127");      return
         if do_ch  and not (0 <= nch  <= 16):  messagebox.showerror("Error","Channel 0–16"); return
         if do_bus and not (0 <= nbus <= 15):  messagebox.showerror("Error","Bus 0–15");      return
-        ok = fail = 0
+        bindings = self.project.bindings
+        plan, was_shared = [], {}
         for _, t, f, m in sel:
-            mod = self.project.tracks[t]['fx_list'][f]['modulations'][m]
-            cc  = ncc  if do_cc  else mod['midi_cc']
-            ch  = nch  if do_ch  else mod['midi_channel']
-            bus = nbus if do_bus else mod['midi_bus']
+            mod = self.project.tracks[t].fx_list[f].modulations[m]
+            cc  = ncc  if do_cc  else mod.midi_cc
+            ch  = nch  if do_ch  else mod.midi_channel
+            bus = nbus if do_bus else mod.midi_bus
+            plan.append((t, f, m, cc, ch, bus))
+            for key in (binding_key(mod), (bus, ch, MSG_CC, cc)):
+                was_shared.setdefault(key, bindings.is_shared(key))
+        ok = fail = 0
+        for t, f, m, cc, ch, bus in plan:
             if self.project.update_midi_cc(t, f, m, cc, ch, bus): ok += 1
             else: fail += 1
-        self.populate_tree()
+        # Other rows only change when their binding gains or loses a collision
+        flipped = [k for k, shared in was_shared.items() if bindings.is_shared(k) != shared]
+        self._refresh_rows([ref[:3] for ref in plan], flipped)
+        if self._search is not None:
+            self._search.forget()
+            if self._filter_var.get().strip():
+                self._apply_filter()     # cc:/ch:/bus: terms may no longer match
+        self.on_tree_select(None)
         parts = ([f"CC→{ncc}"] if do_cc else []) + ([f"Ch→{nch}"] if do_ch else []) + ([f"Bus→{nbus}"] if do_bus else [])
         summary = ",  ".join(parts)
         if fail == 0:
@@ -1343,16 +4715,22 @@ class MIDICCEditorGUI:
 
     def show_stats(self):
         tr = self.project.tracks
-        midi_sends  = sum(1 for t in tr for s in t['sends'] if s['has_midi'])
-        audio_sends = sum(1 for t in tr for s in t['sends'] if s['has_audio'])
+        midi_sends  = self.project.routing.count(EDGE_MIDI)
+        audio_sends = self.project.routing.count(EDGE_AUDIO)
+        # FX counts only cover tracks whose FX chain has been parsed (lazy load)
+        loaded = [t for t in tr if t.fx_list is not None]
+        partial = f"  (FX parsed on {len(loaded)}/{len(tr)} tracks)\n" if len(loaded) < len(tr) else ""
         self.sel_lbl.config(text="No parameters selected", foreground="gray")
         self._set_info(
             "Project Statistics:\n\n"
             f"  Tracks:           {len(tr)}\n"
-            f"  FX Plugins:       {sum(len(t['fx_list']) for t in tr)}\n"
-            f"  MIDI CC Assigned: {sum(1 for t in tr for fx in t['fx_list'] for m in fx['modulations'] if m['midi_cc'] is not None)}\n"
+            f"  FX Plugins:       {sum(len(t.fx_list) for t in loaded)}\n"
+            f"  MIDI CC Assigned: {self.project.bindings.count(MSG_CC)}\n"
+            f"  CC collisions:    {len(self.project.bindings.collisions())}\n"
+            f"{partial}"
             f"  Audio sends:      {audio_sends}\n"
-            f"  MIDI sends:       {midi_sends}\n\n"
+            f"  MIDI sends:       {midi_sends}\n"
+            f"  MIDI loops:       {len(self.project.routing.feedback_loops(EDGE_MIDI))}\n\n"
             "─────────────────────────────\n"
             "AUXRECV field 11 encodes:\n"
             "  src = val & 0x1F\n"
@@ -1362,6 +4740,50 @@ class MIDICCEditorGUI:
             "Click 🔀 Routing to visualise."
         )
 
+    # ── Collisions ───────────────────────────────────────────────────────
+
+    def _param_label(self, ref: ModRef) -> str:
+        t, f, m = ref
+        tr = self.project.tracks[t]; fx = tr.fx_list[f]
+        return f"{fx.modulations[m].param_name} — {fx.name} — {tr.name or f'Track {t+1}'}"
+
+    def show_collisions(self):
+        if not self.project.tracks:
+            messagebox.showinfo("No project", "Please open a REAPER project first.")
+            return
+        self.project.load_all_fx()   # the index only covers parsed tracks
+        bindings = self.project.bindings
+        shared = [(k, refs) for k, refs in bindings.collisions() if k[2] == MSG_CC]
+        if not shared:
+            self._set_info(f"No CC collisions among {bindings.count(MSG_CC)} CC bindings.")
+            self.status.config(text="No CC collisions")
+            return
+        lines = [f"{len(shared)} CC binding(s) shared by "
+                 f"{sum(len(r) for _, r in shared)} parameters:\n"]
+        for (bus, ch, _, cc), refs in shared:
+            lines.append(f"Bus {bus}  Ch {ch}  CC {cc}  ({len(refs)} params)")
+            lines.extend(f"  • {self._param_label(r)}" for r in refs)
+            free = bindings.free_numbers(bus, ch, count=4, start=cc)
+            lines.append(f"  free on Bus {bus} Ch {ch}: "
+                         + (', '.join(f"CC {n}" for n in free) or 'none') + "\n")
+        self._set_info("\n".join(lines))
+        self.status.config(text=f"{len(shared)} CC collision(s)")
+
+    def pick_free_cc(self):
+        """Set the CC spinbox to the next CC unused on the chosen channel/bus."""
+        try:
+            cc, ch, bus = int(self.cc_sb.get()), int(self.ch_sb.get()), int(self.bus_sb.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid value."); return
+        self.project.load_all_fx()
+        free = self.project.bindings.free_numbers(bus, ch, start=cc)
+        if not free:
+            self.status.config(text=f"No free CC on Bus {bus} Ch {ch}")
+            return
+        self.cc_sb.set(free[0])
+        self.cc_var.set(True)
+        self.status.config(text=f"CC {free[0]} is free on Bus {bus} Ch {ch}")
+
     def _set_info(self, text):
         self.info_text.config(state=tk.NORMAL)
         self.info_text.delete(1.0, tk.END)
@@ -1369,11 +4791,233 @@ class MIDICCEditorGUI:
         self.info_text.config(state=tk.DISABLED)
 
 
-def main():
+# ═══════════════════════════════════════════════════════════════════════════
+#  Command line
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _open_output(path: str):
+    if path == '-':
+        return open(sys.stdout.fileno(), 'w', encoding='utf-8', newline='', closefd=False)
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _cmd_batch(args) -> int:
+    paths = find_projects(args.paths)
+    if not paths:
+        print("No .RPP files found.", file=sys.stderr)
+        return 1
+    cache_dir = None if args.no_cache else (args.cache_dir or _default_cache_dir())
+    stream = _open_output(args.jsonl) if args.jsonl else None
+    reports = []
+    t0 = time.perf_counter()
+    try:
+        for i, report in enumerate(batch_analyze(paths, args.jobs, cache_dir), 1):
+            reports.append(report)
+            if stream:
+                stream.write(json.dumps(report_json(report)) + '\n')
+                stream.flush()
+            if not args.quiet:
+                status = (f"error: {report['error']}" if report['error'] else
+                          f"{report['bound']} MIDI-linked params ({report['seconds']:.2f} s)")
+                print(f"[{i}/{len(paths)}] {report['path']}: {status}", file=sys.stderr)
+    finally:
+        if stream:
+            stream.close()
+    merged = merge_reports(reports)
+    if not args.quiet:
+        print(f"{len(paths)} projects in {time.perf_counter() - t0:.2f} s", file=sys.stderr)
+
+    if args.json:
+        reports.sort(key=lambda r: r['path'])
+        with _open_output(args.json) as f:
+            json.dump({'summary': report_json(merged),
+                       'projects': [report_json(r) for r in reports]}, f, indent=1)
+    if args.csv:
+        with _open_output(args.csv) as f:
+            write_histogram_csv(f, merged)
+    if not (args.json or args.csv or args.jsonl):
+        print(format_batch_summary(merged))
+    return 1 if merged['failed'] else 0
+
+
+def _cmd_export(args) -> int:
+    fmt = args.format or os.path.splitext(args.output)[1].lower().lstrip('.')
+    if fmt not in EXPORT_FORMATS:
+        print(f"Unknown export format {fmt!r}: use a .svg/.png output or --format.",
+              file=sys.stderr)
+        return 1
+    t0 = time.perf_counter()
+    project = REAPERProject()
+    # The matrix shows no FX counts, so FX chains need not be parsed
+    project.load_file(args.project, lazy=args.view == 'matrix')
+    if args.output == '-':
+        f = open(sys.stdout.fileno(), 'wb', closefd=False)
+    else:
+        f = open(args.output, 'wb')
+    with f:
+        if args.view == 'matrix':
+            w, h = export_matrix(f, project, fmt, args.max_size)
+        else:
+            w, h = export_graph(f, project, fmt, layout=args.layout.capitalize(),
+                                max_px=args.max_size)
+    if not args.quiet:
+        print(f"{args.output}: {args.view} of {len(project.tracks)} tracks, {w}×{h} "
+              f"{fmt.upper()} ({time.perf_counter() - t0:.2f} s)", file=sys.stderr)
+    return 0
+
+
+def _cmd_replay(args) -> int:
+    if np is None:
+        print("replay needs NumPy.", file=sys.stderr)
+        return 1
+    project = REAPERProject()
+    try:
+        project.load_file(args.project, lazy=True)
+        track = find_track(project, args.track)
+        t0 = time.perf_counter()
+        replay = MIDIReplay(project, track, args.bus)
+        # bad files raise worded ValueErrors (not a Standard MIDI File,
+        # file:line: cannot parse ...); report them, not a traceback
+        for i, chunk in enumerate(read_midi(args.midi), 1):
+            replay.feed(*chunk)
+            if not args.quiet and i % 16 == 0:
+                print(f"  {replay.events:,} events…", file=sys.stderr)
+    except (OSError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    replay.finish()
+    seconds = time.perf_counter() - t0
+
+    if args.json:
+        with _open_output(args.json) as f:
+            json.dump({'track': track + 1, 'events': replay.events, 'routed': replay.routed,
+                       'duration': replay.duration, 'seconds': round(seconds, 3),
+                       'params': replay.rows()}, f, indent=1)
+    if args.csv:
+        rows = replay.rows()
+        with _open_output(args.csv) as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['track'])
+            w.writeheader()
+            w.writerows(rows)
+    if not (args.json or args.csv):
+        print(format_replay(replay, seconds))
+    return 0
+
+
+def _pad_json(pads: PadMap, changes) -> dict:
+    project = pads.project
+    index = {id(c): i for i, c in enumerate(pads.claims)}
+
+    def ref(r):
+        return {'track': r[0] + 1, 'fx': r[1] + 1, 'param': _ref_label(project, r)}
+
+    return {
+        'instances': [{'track': c.track + 1, 'track_name': project.tracks[c.track].name,
+                       'fx': c.fx + 1, 'plugin': c.plugin, 'role': c.role,
+                       'pads': [c.start, c.start + c.slots - 1],
+                       'in_channels': channel_mask_label(c.in_mask),
+                       'out': None if c.out_msg is None else {
+                           'msg_type': c.out_msg,
+                           'channels': channel_mask_label(c.out_mask()),
+                           'links': [dict(ref(r), channel=ch, number=n) for r, ch, n in c.links]}}
+                      for c in pads.claims],
+        'conflicts': [{'kind': kind, 'instance': index[id(a)],
+                       **({'param': ref(b)} if kind == 'omni' else {'other': index[id(b)]})}
+                      for kind, a, b in pads.conflicts],
+        'changes': None if changes is None else [
+            {'what': what, **(ref(r) if what == 'link' else {'track': r[0] + 1, 'fx': r[1] + 1}),
+             'old': old, 'new': new} for what, r, old, new in changes],
+    }
+
+
+def _cmd_pads(args) -> int:
+    project = REAPERProject()
+    project.load_file(args.project)
+    pads = PadMap(project)
+    changes = pads.assign() if args.assign else None
+    if changes and args.output:
+        project.save_file(args.output)
+    if args.json:
+        with _open_output(args.json) as f:
+            json.dump(_pad_json(pads, changes), f, indent=1)
+    else:
+        print(format_pad_map(pads, changes))
+        if changes and not args.output:
+            print("\nNot saved: pass -o OUT.RPP to write the changes.")
+    return 1 if pads.conflicts else 0
+
+
+def cli_main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(
+        prog=os.path.basename(sys.argv[0]),
+        description="Headless tools for REAPER projects (run without arguments for the GUI).")
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    bp = sub.add_parser('batch', help="CC/channel/bus usage report over many projects")
+    bp.add_argument('paths', nargs='+', help=".RPP files or directories to scan recursively")
+    bp.add_argument('-j', '--jobs', type=int, default=None,
+                    help="worker processes (default: CPU count, 1 = no pool)")
+    bp.add_argument('--json', metavar='PATH', help="write merged + per-project report ('-' = stdout)")
+    bp.add_argument('--csv', metavar='PATH', help="write merged histograms as CSV ('-' = stdout)")
+    bp.add_argument('--jsonl', metavar='PATH',
+                    help="stream one JSON line per project as it finishes ('-' = stdout)")
+    bp.add_argument('--cache-dir', metavar='DIR', help="parsed-project cache directory")
+    bp.add_argument('--no-cache', action='store_true', help="do not read or write the cache")
+    bp.add_argument('-q', '--quiet', action='store_true', help="no progress on stderr")
+    bp.set_defaults(func=_cmd_batch)
+
+    ep = sub.add_parser('export', help="write the routing graph or matrix as SVG or PNG")
+    ep.add_argument('project', help=".RPP file")
+    ep.add_argument('output', help="output file ('-' = stdout, needs --format)")
+    ep.add_argument('--view', choices=('graph', 'matrix'), default='graph')
+    ep.add_argument('--layout', choices=('auto', 'circle', 'layered', 'force'), default='auto',
+                    help="graph layout (default: circle up to %d tracks, else layered)"
+                         % CIRCLE_MAX_NODES)
+    ep.add_argument('--format', choices=sorted(EXPORT_FORMATS),
+                    help="default: from the output file extension")
+    ep.add_argument('--max-size', type=int, default=EXPORT_MAX_PX, metavar='PX',
+                    help="longest side of a PNG (default: %(default)s)")
+    ep.add_argument('-q', '--quiet', action='store_true', help="no summary on stderr")
+    ep.set_defaults(func=_cmd_export)
+
+    rp = sub.add_parser('replay', help="replay a MIDI file through the project's MIDI sends "
+                                       "and count hits per MIDI-linked parameter")
+    rp.add_argument('project', help=".RPP file")
+    rp.add_argument('midi', help="Standard MIDI File, or a text log of 'seconds status data…' lines")
+    rp.add_argument('--track', default='1', help="track the MIDI arrives on: number or name "
+                                                 "(default: 1)")
+    rp.add_argument('--bus', type=int, default=0, help="MIDI bus of the input (default: 0)")
+    rp.add_argument('--json', metavar='PATH', help="write the report as JSON ('-' = stdout)")
+    rp.add_argument('--csv', metavar='PATH', help="write per-parameter rows as CSV ('-' = stdout)")
+    rp.add_argument('-q', '--quiet', action='store_true', help="no progress on stderr")
+    rp.set_defaults(func=_cmd_replay)
+
+    pp = sub.add_parser('pads', help="APC mini pad map of the JS pad plugins and their conflicts "
+                                     "(exit status 1 if any remain)")
+    pp.add_argument('project', help=".RPP file")
+    pp.add_argument('--assign', action='store_true',
+                    help="move clashing instances to free pad windows / output channels")
+    pp.add_argument('-o', '--output', metavar='RPP',
+                    help="save the assigned project here (may be the input file)")
+    pp.add_argument('--json', metavar='PATH', help="write the map as JSON ('-' = stdout)")
+    pp.set_defaults(func=_cmd_pads)
+
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return cli_main(argv)
+    if tk is None:
+        print("The editor needs tkinter (python3-tk); the subcommands work without it.",
+              file=sys.stderr)
+        return 1
     root = tk.Tk()
     MIDICCEditorGUI(root)
     root.mainloop()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())